@@ -0,0 +1,75 @@
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from quizbot.bank import OPTION_SEPARATOR, QUESTION_SEPARATOR, cache_path_for, compile_file, load_bank
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIPPED = os.path.join(ROOT, "barcha_maruza_2_19.txt")
+
+
+def write_synthetic(path, count):
+    with open(path, "w", encoding="utf-8") as file:
+        for i in range(count):
+            options = [f"{i}-savolning {j}-varianti" for j in range(4)]
+            options[i % 4] = "#" + options[i % 4]
+            file.write(f"{i}-savol: o‘zgaruvchi qanday e’lon qilinadi?\n{OPTION_SEPARATOR}\n")
+            file.write(f"\n{OPTION_SEPARATOR}\n".join(options))
+            file.write(f"\n\n{QUESTION_SEPARATOR}\n\n")
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        bank = fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times), bank
+
+
+def measure(path, repeat):
+    cache = cache_path_for(path)
+    parse, bank = timed(lambda: compile_file(path), repeat)
+    if os.path.exists(cache):
+        os.remove(cache)
+    write, _ = timed(lambda: load_bank(path), 1)  # Tahlil + kesh yozish
+    warm, cached = timed(lambda: load_bank(path), repeat)
+    assert len(cached) == len(bank)
+
+    def touched():
+        os.utime(path)  # Faqat mtime o‘zgardi: mazmun xeshi tekshiriladi
+        return load_bank(path)
+
+    rehash, _ = timed(touched, repeat)
+    return len(bank), os.path.getsize(path), os.path.getsize(cache), parse, write, warm, rehash
+
+
+# Bot ishga tushishida bankni yuklash: matnli faylni tahlil qilish va
+# kompilyatsiya qilingan .qbank keshidan (mmap) o‘qish. Repodagi bank va
+# sun’iy katta bank o‘lchanadi (nusxalari vaqtinchalik katalogda). Masalan:
+#   python -m bench.bank_cache --synthetic 100000
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.bank_cache")
+    parser.add_argument("--synthetic", type=int, default=100_000, help="sun’iy bankdagi savollar soni")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)  # Repodagi bankning diagnostikasi har tahlilda takrorlanadi
+    with tempfile.TemporaryDirectory() as tmp:
+        shipped = os.path.join(tmp, os.path.basename(SHIPPED))
+        shutil.copyfile(SHIPPED, shipped)
+        synthetic = os.path.join(tmp, "synthetic.txt")
+        write_synthetic(synthetic, args.synthetic)
+        print(f"{'bank':<22} {'savollar':>8} {'matn KB':>8} {'kesh KB':>8} {'tahlil ms':>10} "
+              f"{'+yozish ms':>10} {'keshdan ms':>10} {'mtime ms':>9}")
+        for name, path in (("barcha_maruza_2_19", shipped), ("synthetic", synthetic)):
+            count, text, cache, parse, write, warm, rehash = measure(path, args.repeat)
+            print(f"{name:<22} {count:>8} {text / 1024:>8.0f} {cache / 1024:>8.0f} {parse * 1e3:>10.2f} "
+                  f"{write * 1e3:>10.2f} {warm * 1e3:>10.2f} {rehash * 1e3:>9.2f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
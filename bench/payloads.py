@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import random
+import time
+
+from aiogram import Bot
+from aiogram.methods import SendPoll
+
+from quizbot.bank import QuestionBank
+from quizbot.payloads import PollPayloads
+
+
+def make_bank(size):
+    return QuestionBank.from_questions(
+        {"question": f"Savol {i}: O‘zbekiston poytaxti qaysi shahar?",
+         "options": [f"{i}-javob «a»", f"{i}-javob “b”", f"{i}-javob c", f"{i}-javob d"], "correct": i % 4}
+        for i in range(size)
+    )
+
+
+def per_call(fn, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - started) / repeat
+
+
+# sendPoll so‘rovini tayyorlash uchun CPU vaqti: RAW_POLLS=1 (PollPayloads
+# tanasi) va RAW_POLLS=0 (SendPoll modeli + aiogram form-data). Javob
+# (Message) modeli ham o‘lchanadi - RAW_POLLS=0 da har bir poll uchun quriladi.
+# To‘liq bot bo‘yicha (soniyasiga javoblar, javobga CPU):
+#   python -m bench.replay --variant RAW_POLLS=0 --variant RAW_POLLS=1
+# Masalan:
+#   python -m bench.payloads --questions 1000 --repeat 20000
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.payloads")
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+    bank = make_bank(args.questions)
+    payloads = PollPayloads()
+    bot = Bot("123456:ABCdef")
+    header = "❓ Savol 7/50: "
+
+    def pick():
+        index = rng.randrange(len(bank))
+        permutation = list(range(4))
+        rng.shuffle(permutation)
+        return index, permutation
+
+    def raw():
+        index, permutation = pick()
+        payloads.body(bank, index, permutation, header, 12345, 30)
+
+    def aiogram():
+        index, permutation = pick()
+        options, correct_option_id = bank.arrange(index, permutation)
+        method = SendPoll(chat_id=12345, question=payloads.question_text(bank, index, header), options=options,
+                          type="quiz", correct_option_id=correct_option_id, is_anonymous=False, open_period=30,
+                          explanation=f"✅ To‘g‘ri javob: {bank.correct_text(index)}")
+        bot.session.build_form_data(bot, method)
+
+    response = ('{"message_id":1,"date":1700000000,"chat":{"id":12345,"type":"private"},"poll":{"id":"5",'
+                '"question":"Savol?","options":[{"text":"a","voter_count":0},{"text":"b","voter_count":0}],'
+                '"total_voter_count":0,"is_closed":false,"is_anonymous":false,"type":"quiz",'
+                '"allows_multiple_answers":false,"correct_option_id":1}}')
+    method = SendPoll(chat_id=12345, question="Savol?", options=["a", "b"], type="quiz", correct_option_id=1)
+
+    def parse():
+        bot.session.check_response(bot=bot, method=method, status_code=200,
+                                   content=f'{{"ok":true,"result":{response}}}')
+
+    raw_us = per_call(raw, args.repeat) * 1e6
+    aiogram_us = per_call(aiogram, args.repeat) * 1e6
+    parse_us = per_call(parse, args.repeat) * 1e6
+    print(f"so‘rov tanasi: PollPayloads.body {raw_us:.1f} us, SendPoll + form-data {aiogram_us:.1f} us")
+    print(f"javob: Message modeli {parse_us:.1f} us (RAW_POLLS=1 da qurilmaydi)")
+    print(f"bir yadroga poll/s (faqat kodlash): {1e6 / raw_us:,.0f} va {1e6 / (aiogram_us + parse_us):,.0f}")
+    asyncio.run(bot.session.close())
+
+
+if __name__ == "__main__":
+    main()
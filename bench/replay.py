@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+
+from quizbot.loadgen import run_quiz, start_api, wait_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_TOKEN = "123456:ABCdef"
+
+# Bot jarayoni o‘lchanadigan muhit: Telegram limitlari (umumiy va chat)
+# ko‘tarilgan, chunki botning o‘z o‘tkazuvchanligi o‘lchanadi
+BASE_ENV = {
+    "BOT_TOKEN": BOT_TOKEN, "OUTBOUND_GLOBAL_RATE": "1000000", "OUTBOUND_CHAT_RATE": "1000",
+    "OUTBOUND_CHAT_BURST": "1000", "LOG_LEVEL": "WARNING",
+}
+
+
+# Jarayon va uning bevosita bolalari (workerlar) sarflagan CPU vaqti, soniyada (Linux /proc)
+def cpu_seconds(pid):
+    total = 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(entry) == pid or int(fields[1]) == pid:
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+    return total / os.sysconf("SC_CLK_TCK")
+
+
+async def measure(workers, variant, args, api, inboxes):
+    url = f"http://127.0.0.1:{args.port}/webhook/{BOT_TOKEN}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, **BASE_ENV, **variant)
+        env.update({
+            "WEB_WORKERS": str(workers), "PORT": str(args.port), "WEBHOOK_HOST": f"http://127.0.0.1:{args.port}",
+            "BOT_API_URL": f"http://127.0.0.1:{args.api_port}", "WORKER_BASE_PORT": str(args.port + 100),
+        })
+        for name in ("SESSION_DB", "REVIEW_DB", "RESULTS_DB", "QUESTION_STATS_DB", "CAMPAIGNS_DB"):
+            env[name] = os.path.join(tmp, f"{name.lower()}.sqlite3")
+        log_path = os.path.join(args.log_dir or tmp, f"bot-{workers}-{'-'.join(variant.values()) or 'default'}.log")
+        with open(log_path, "w") as log:
+            process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                await wait_ready(url, inboxes)
+                before = cpu_seconds(process.pid)
+                calls = Counter(api.calls)
+                result = await run_quiz(url, inboxes, args.users, args.questions)
+                cpu = cpu_seconds(process.pid) - before
+                calls = api.calls - calls  # /cancel va xatolar bilan, fake API tomonida
+            finally:
+                process.terminate()
+                await asyncio.to_thread(process.wait)
+                inboxes.clear()
+    result["fake_api_calls"] = dict(calls)
+    result["bot_cpu_ms_per_answer"] = round(cpu * 1000 / result["answers"], 3) if result["answers"] else 0.0
+    return {"workers": workers, **variant, **result}
+
+
+async def main_async(args):
+    variants = [dict(item.split("=", 1) for item in variant.split()) for variant in args.variant or [""]]
+    api, runner, inboxes = await start_api(args.api_port)
+    results = []
+    try:
+        for variant in variants:
+            for workers in args.workers:
+                result = await measure(workers, variant, args, api, inboxes)
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+                results.append(result)
+    finally:
+        await runner.cleanup()
+    return results
+
+
+# Quiz sessiyalarini (poll_answer bilan) WEB_WORKERS va muhit variantlari
+# bo‘yicha takrorlash. Masalan:
+#   python -m bench.replay --workers 1 2 4
+#   python -m bench.replay --variant COMPACT_FEEDBACK=0 --variant COMPACT_FEEDBACK=1
+#   python -m bench.replay --variant RAW_POLLS=0 --variant RAW_POLLS=1
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.replay")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1])
+    parser.add_argument("--variant", action="append", help="bo‘sh joy bilan ajratilgan KEY=VALUE muhit o‘zgaruvchilari")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--api-port", type=int, default=8081)
+    parser.add_argument("--log-dir", help="bot loglari shu katalogda qoldiriladi")
+    args = parser.parse_args(argv)
+    results = asyncio.run(main_async(args))
+    print(f"{'workers':>7} {'variant':<44} {'answers/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'calls/q':>7} {'cpu ms/ans':>10}")
+    for result in results:
+        variant = " ".join(f"{key}={result[key]}" for key in result if key.isupper())
+        print(f"{result['workers']:>7} {variant:<44} {result['answer_rate']:>9} {result['next_poll_p50_ms']:>8} "
+              f"{result['next_poll_p99_ms']:>8} {result['api_calls_per_question']:>7} {result['bot_cpu_ms_per_answer']:>10}")
+
+
+if __name__ == "__main__":
+    main()
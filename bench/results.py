@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from quizbot.results import ResultsStore, board_key
+
+BANKS = ("barcha_maruza_2_19", "js_asoslari", "python")
+
+
+def boards(count):
+    keys = [board_key(bank, mode) for bank in BANKS for mode in ("Random", "Tartibli")]
+    keys += [board_key(BANKS[0], "Tartibli", group) for group in range(1, count - len(keys) + 1)]
+    return keys[:count]
+
+
+# results jadvalini to‘g‘ridan-to‘g‘ri to‘ldirish, best va best_scores undan bir marta quriladi
+def fill(store, sessions, users, board_keys, rng):
+    now = time.time()
+    rows = []
+    for _ in range(sessions):
+        total = rng.choice((10, 20, 50))
+        score = rng.randint(0, total)
+        wrong = rng.randint(0, total - score)
+        rows.append((rng.randrange(users), rng.choice(board_keys), total, score, wrong, total - score - wrong,
+                     now - rng.uniform(0, 90 * 24 * 3600)))
+    with store._db:
+        store._db.execute("BEGIN")
+        store._db.executemany("INSERT INTO results (user_id, board, total, score, wrong, skipped, finished_at) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        store._db.execute("INSERT INTO best (board, user_id, name, score, total, achieved_at) "
+                          "SELECT board, user_id, 'User' || user_id, MAX(score), MAX(total), MIN(finished_at) "
+                          "FROM results GROUP BY board, user_id")
+        store._db.execute("INSERT INTO best_scores (board, score, users) "
+                          "SELECT board, score, COUNT(*) FROM best GROUP BY board, score")
+    store._db.execute("ANALYZE")
+
+
+def group_by_top(store, board):
+    return store._db.execute(
+        "SELECT user_id, MAX(score) AS best, MIN(finished_at) FROM results WHERE board = ? "
+        "GROUP BY user_id ORDER BY best DESC, 3 LIMIT 10", (board,)
+    ).fetchall()
+
+
+async def per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - started) / repeat
+
+
+async def bench(args):
+    rng = random.Random(1)
+    board_keys = boards(args.boards)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultsStore(os.path.join(tmp, "results.sqlite3"))
+        started = time.perf_counter()
+        await store.run(fill, store, args.sessions, args.users, board_keys, rng)
+        print(f"{args.sessions} sessiya, {args.users} foydalanuvchi, {len(board_keys)} reyting: "
+              f"to‘ldirish {time.perf_counter() - started:.1f} s")
+        rows = await store.run(lambda: store._db.execute("SELECT COUNT(*) FROM best WHERE board = ?",
+                                                         (board_keys[0],)).fetchone()[0])
+        last = await store.run(lambda: store._db.execute(
+            "SELECT user_id FROM best WHERE board = ? ORDER BY score, achieved_at DESC LIMIT 1",
+            (board_keys[0],)).fetchone()[0])
+        timings = {
+            "/top": await per_call(lambda: store.top(rng.choice(board_keys)), args.repeat),
+            "rank (tasodifiy)": await per_call(lambda: store.rank(rng.choice(board_keys), rng.randrange(args.users)),
+                                               args.repeat),
+            f"rank (oxirgi, {rows} ta)": await per_call(lambda: store.rank(board_keys[0], last), 100),
+            "/stats": await per_call(lambda: store.user_stats(rng.randrange(args.users)), args.repeat),
+            "record": await per_call(lambda: store.record(rng.randrange(args.users), "User", rng.choice(board_keys),
+                                                          20, rng.randint(0, 20), 0, 0), args.repeat),
+            "GROUP BY top": await per_call(lambda: store.run(group_by_top, store, rng.choice(board_keys)), 5),
+        }
+        for name, seconds in timings.items():
+            print(f"{name:<28} {seconds * 1e6:>12,.0f} us")
+        await store.close()
+
+
+# Natijalar va reytinglar: results jadvalida sessions ta yozuv bo‘lganda
+# /top, o‘rin, /stats va yozish narxi (bot kabi executor orqali) hamda
+# results ustida GROUP BY bilan hisoblanadigan top-10. Masalan:
+#   python -m bench.results --sessions 1000000 --users 200000 --boards 11
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.results")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--boards", type=int, default=11)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args(argv)
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from quizbot.bank import QuestionBank
+from quizbot.review import QUALITY, ReviewDeck, ReviewStore
+
+RESULTS = tuple(QUALITY)
+
+
+def make_bank(size):
+    return QuestionBank.from_questions(
+        {"question": f"Savol {i}?", "options": [f"{i}-a", f"{i}-b", f"{i}-c", f"{i}-d"], "correct": i % 4}
+        for i in range(size)
+    )
+
+
+# To‘liq tarixli deck: har bir savol bir necha marta, turli vaqtlarda javob berilgan
+def full_deck(bank, rng, now):
+    deck = ReviewDeck.new(len(bank), bank.layout())
+    for idx in range(len(bank)):
+        for _ in range(rng.randint(1, 4)):
+            deck.review(idx, rng.choice(RESULTS), now - rng.randint(0, 60 * 24 * 60))
+    return deck
+
+
+# Muddatlar heapsiz: har safar barcha savollarni ko‘rib chiqish
+def linear_next(deck, now):
+    best = None
+    for idx, due in enumerate(deck.due):
+        if due and due <= now and (best is None or due < deck.due[best]):
+            best = idx
+    if best is not None:
+        return best
+    return next((idx for idx, due in enumerate(deck.due) if not due), None)
+
+
+def per_call(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+async def store_bench(bank, decks, users, loads, rng):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reviews.sqlite3")
+        store = ReviewStore(path)
+        blobs = [deck.to_bytes() for deck in decks]
+        started = time.perf_counter()
+
+        def insert():
+            with store._db:
+                store._db.execute("BEGIN")
+                store._db.executemany(
+                    "INSERT OR REPLACE INTO decks (user_id, bank, data) VALUES (?, ?, ?)",
+                    ((user_id, "demo", blobs[user_id % len(blobs)]) for user_id in range(users))
+                )
+
+        await store.run(insert)
+        inserted = time.perf_counter() - started
+        await store.run(store._db.execute, "PRAGMA wal_checkpoint(TRUNCATE)")
+        size = os.path.getsize(path)
+        await store.load(0, "demo", bank)  # Tartib (layout) bir marta yoziladi
+        started = time.perf_counter()
+        for _ in range(loads):
+            await store.load(rng.randrange(users), "demo", bank)
+        loaded = (time.perf_counter() - started) / loads
+        await store.close()
+    return inserted, size, loaded
+
+
+# Takrorlash rejimi: heap bilan keyingi savol va baholash, deck blobi,
+# SQLite da ko‘p foydalanuvchi holatlari. Masalan:
+#   python -m bench.review --users 100000 --questions 1000
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.review")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--questions", type=int, default=1000)
+    parser.add_argument("--decks", type=int, default=200, help="bazaga yoziladigan har xil decklar soni")
+    parser.add_argument("--loads", type=int, default=2000)
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+    now = 30_000_000
+    bank = make_bank(args.questions)
+    deck = full_deck(bank, rng, now)
+
+    clock = [now]
+
+    # Har bir javob orasida bir daqiqa o‘tadi, shuning uchun muddatlar kelib turadi
+    def step(find):
+        clock[0] += 1
+        idx = find(deck, clock[0])
+        if idx is not None:
+            deck.review(idx, rng.choice(RESULTS), clock[0])
+
+    heap = per_call(lambda: step(ReviewDeck.next), 20_000)
+    linear = per_call(lambda: step(linear_next), 500)
+    blob = deck.to_bytes()
+    decode = per_call(lambda: ReviewDeck.from_bytes(blob), 500)
+    print(f"{args.questions} savollik deck: next()+review() {heap * 1e6:.1f} us, "
+          f"chiziqli qidiruv bilan {linear * 1e6:.1f} us")
+    print(f"blob {len(blob) / 1024:.1f} KB, from_bytes() {decode * 1e3:.2f} ms")
+    decks = [full_deck(bank, rng, now) for _ in range(args.decks)]
+    inserted, size, loaded = asyncio.run(store_bench(bank, decks, args.users, args.loads, rng))
+    print(f"{args.users} foydalanuvchi: yozish {inserted:.1f} s, baza {size / 2 ** 20:.0f} MB, "
+          f"tasodifiy load() {loaded * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
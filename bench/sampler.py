@@ -0,0 +1,49 @@
+import argparse
+import random
+import time
+
+from quizbot.sampler import QuestionSampler
+
+
+# Oldingi usul: har bir savolda ishlatilmagan indekslar ro‘yxati butun bank
+# bo‘yicha used_questions ro‘yxatiga qarab qayta quriladi - O(N*k)
+def scan_draws(size, draws, rng):
+    used = []
+    for _ in range(draws):
+        available = [i for i in range(size) if i not in used]
+        if not available:
+            break
+        used.append(rng.choice(available))
+    return used
+
+
+def sampler_draws(size, draws, rng):
+    sampler = QuestionSampler(size, rng)
+    return [sampler.draw() for _ in range(min(draws, size))]
+
+
+def per_draw(fn, size, draws, repeat):
+    rng = random.Random(1)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(size, draws, rng)
+    return (time.perf_counter() - started) / (repeat * min(draws, size))
+
+
+# Random rejimda savol tanlash: eski skan va QuestionSampler, bitta
+# sessiyaning birinchi draws ta savoli bo‘yicha o‘rtacha. Masalan:
+#   python -m bench.sampler --sizes 300 10000 100000 --draws 50
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.sampler")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 10_000, 100_000])
+    parser.add_argument("--draws", type=int, default=50, help="bitta sessiyadagi savollar (MAX_QUESTIONS_RANDOM)")
+    args = parser.parse_args(argv)
+    print(f"{'bank':>7} {'skan':>12} {'sampler':>10}")
+    for size in args.sizes:
+        scan = per_draw(scan_draws, size, args.draws, max(1, 20_000 // size))
+        sampler = per_draw(sampler_draws, size, args.draws, 2000)
+        print(f"{size:>7} {scan * 1e6:>9.1f} us {sampler * 1e6:>7.2f} us", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from quizbot.bank import QuestionBank
+from quizbot.sampler import QuestionSampler
+from quizbot.sessions import MemorySessionStore, RedisSessionStore, SQLiteSessionStore, encode_session
+
+
+def make_bank(size):
+    return QuestionBank.from_questions(
+        {"question": f"Savol {i}?", "options": [f"{i}-a", f"{i}-b", f"{i}-c", f"{i}-d"], "correct": i % 4}
+        for i in range(size)
+    )
+
+
+# main.py dagi Random rejim sessiyasiga o‘xshash: sampler bir necha savol oldinda
+def make_session(user_id, bank, rng):
+    sampler = QuestionSampler(len(bank), rng)
+    for _ in range(rng.randint(1, 40)):
+        sampler.draw()
+    return {
+        "bank_name": "demo", "bank": bank, "mode": "Random", "score": rng.randint(0, 20), "wrong": rng.randint(0, 20),
+        "skipped": 0, "question_count": sampler.drawn, "question_idx": rng.randrange(len(bank)),
+        "permutation": (2, 0, 3, 1), "poll_id": str(rng.getrandbits(63)), "time_limit": 60, "consecutive_skips": 0,
+        "poll_message_id": rng.randint(1, 10 ** 6), "sampler": sampler, "chat_id": user_id, "name": f"User{user_id}",
+    }
+
+
+async def measure(store, sessions, rounds):
+    users = list(sessions)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        # Bir "to‘lqin": har bir foydalanuvchi savol yuborilgandan keyin bir marta saqlaydi
+        await asyncio.gather(*(store.save(user_id, sessions[user_id]) for user_id in users))
+    saved = time.perf_counter() - started
+    started = time.perf_counter()
+    await store.close()  # Navbatda qolgan yozuvlar ham yoziladi
+    closed = time.perf_counter() - started
+    return len(users) * rounds / (saved + closed), closed
+
+
+# Sessiya saqlagichlarining o‘tkazuvchanligi: users ta foydalanuvchi rounds
+# marta parallel saqlaydi (close() dagi oxirgi yozish ham vaqtga kiradi).
+# Redis faqat --redis-url bilan (haqiqiy server) o‘lchanadi. Masalan:
+#   python -m bench.sessions --users 1000 --rounds 20
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.sessions")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=1000, help="bankdagi savollar")
+    parser.add_argument("--redis-url", help="haqiqiy Redis server, masalan redis://localhost:6379/0")
+    args = parser.parse_args(argv)
+    rng = random.Random(1)
+    bank = make_bank(args.questions)
+    sessions = {user_id: make_session(user_id, bank, rng) for user_id in range(1, args.users + 1)}
+    size = sum(len(encode_session(session)) for session in sessions.values()) / len(sessions)
+    print(f"sessiya: o‘rtacha {size:.0f} bayt")
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": MemorySessionStore,
+            "sqlite batched": lambda: SQLiteSessionStore(os.path.join(tmp, "batched.sqlite3"), flush_interval=1.0),
+            "sqlite write-through": lambda: SQLiteSessionStore(os.path.join(tmp, "through.sqlite3"), flush_interval=0),
+        }
+        if args.redis_url:
+            stores["redis"] = lambda: RedisSessionStore(args.redis_url)
+        print(f"{'saqlagich':<22} {'saqlash/s':>10} {'close ms':>9}")
+        for name, make in stores.items():
+            rate, closed = asyncio.run(measure(make(), sessions, args.rounds))
+            print(f"{name:<22} {rate:>10,.0f} {closed * 1e3:>9.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
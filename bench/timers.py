@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import gc
+import random
+import time
+import tracemalloc
+
+from quizbot.loadgen import percentile
+from quizbot.timers import TimerWheel
+
+
+# Oldingi usul: har bir ochiq poll uchun open_period davomida uxlaydigan
+# asyncio vazifasi, javob kelganda bekor qilinadi
+class TaskTimers:
+    def __init__(self):
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def schedule(self, key, delay, callback, *args):
+        self.cancel(key)
+        self._tasks[key] = asyncio.create_task(self._sleep(key, delay, callback, args))
+
+    async def _sleep(self, key, delay, callback, args):
+        await asyncio.sleep(delay)
+        del self._tasks[key]
+        callback(*args)
+
+    def cancel(self, key):
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    def close(self):
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+
+async def loop_iterations(count):
+    started = time.perf_counter()
+    for _ in range(count):
+        await asyncio.sleep(0)
+    return time.perf_counter() - started
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+async def measure(make, count, churn, rng):
+    loop = asyncio.get_running_loop()
+    noop = lambda: None  # noqa: E731
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    timers = make()
+    for key in range(count):
+        timers.schedule(key, rng.uniform(30, 60), noop)
+    await settle()
+    memory = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    timers.close()
+    await settle()
+
+    timers = make()
+    started = time.perf_counter()
+    for key in range(count):
+        timers.schedule(key, rng.uniform(30, 60), noop)
+    await settle()
+    scheduled = time.perf_counter() - started
+    idle = await loop_iterations(100)
+
+    # Javoblar: bekor qilish va keyingi savol uchun qayta rejalash
+    keys = [rng.randrange(count) for _ in range(churn)]
+    started = time.perf_counter()
+    for key in keys:
+        timers.cancel(key)
+        timers.schedule(key, rng.uniform(30, 60), noop)
+    await settle()
+    churned = time.perf_counter() - started
+    timers.close()
+    await settle()
+
+    # Muddatlar tugashi: count ta muddat 1 soniya ichida, kechikish va CPU
+    timers = make()
+    lags = []
+    spread = 1.0
+    cpu = time.process_time()
+    origin = loop.time() + 0.2
+    for key in range(count):
+        due = origin + rng.uniform(0, spread)
+        timers.schedule(key, due - loop.time(), lambda due=due: lags.append(loop.time() - due))
+    while len(lags) < count and loop.time() < origin + spread + 5:
+        await asyncio.sleep(0.05)
+    cpu = time.process_time() - cpu
+    timers.close()
+    await settle()
+    return {
+        "schedule_us": scheduled / count * 1e6, "bytes_per_timer": memory / count,
+        "loop100_ms": idle * 1e3, "churn_us": churned / churn * 1e6,
+        "expire_cpu_s": cpu, "lag_p50_ms": percentile(lags, 0.5) * 1e3, "lag_p99_ms": percentile(lags, 0.99) * 1e3,
+        "fired": len(lags),
+    }
+
+
+# TimerWheel va har bir poll uchun vazifa (oldingi usul): ochiq polllar soni
+# bo‘yicha rejalash narxi, xotira, 100 ta loop aylanishi, javob (bekor qilish
+# + qayta rejalash) va muddatlar tugaganda CPU hamda kechikish. Masalan:
+#   python -m bench.timers --polls 10000 50000 100000
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench.timers")
+    parser.add_argument("--polls", type=int, nargs="+", default=[10_000, 50_000, 100_000])
+    parser.add_argument("--churn", type=int, default=20_000, help="o‘lchanadigan javoblar soni")
+    args = parser.parse_args(argv)
+    variants = {"task": TaskTimers, "wheel": TimerWheel}
+    print(f"{'polls':>7} {'timers':<6} {'sched us':>8} {'B/timer':>8} {'loop100 ms':>10} {'churn us':>8} "
+          f"{'expire cpu s':>12} {'lag p50 ms':>10} {'lag p99 ms':>10}")
+    for count in args.polls:
+        for name, make in variants.items():
+            result = asyncio.run(measure(make, count, args.churn, random.Random(1)))
+            print(f"{count:>7} {name:<6} {result['schedule_us']:>8.2f} {result['bytes_per_timer']:>8.0f} "
+                  f"{result['loop100_ms']:>10.2f} {result['churn_us']:>8.2f} {result['expire_cpu_s']:>12.2f} "
+                  f"{result['lag_p50_ms']:>10.1f} {result['lag_p99_ms']:>10.1f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -75,6 +75,29 @@ def load_questions():
     logger.info(f"Yuklangan savollar soni: {len(questions)}")
     return questions
 
+# Random rejim uchun savol tanlovchi: Fisher–Yates aralashtirishi dangasa
+# tarzda, har bir savol so‘ralganda bir qadam bajariladi. Faqat almashtirilgan
+# pozitsiyalar lug‘atda saqlanadi, shuning uchun har bir tanlov O(1).
+class QuestionSampler:
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.drawn = 0
+        self._swaps = {}
+        self._random = rng or random.Random()
+
+    def remaining(self):
+        return self.size - self.drawn
+
+    def draw(self):
+        if self.drawn >= self.size:
+            return None
+        i = self.drawn
+        j = self._random.randrange(i, self.size)
+        value = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.pop(i, i)
+        self.drawn += 1
+        return value
+
 # Foydalanuvchi ma’lumotlari
 user_data = {}
 QUESTIONS = load_questions()
@@ -150,7 +173,7 @@ async def choose_mode(message: types.Message, state: FSMContext):
         "question_count": 0,
         "active_poll": None,
         "poll_id": None,
-        "used_questions": [],
+        "sampler": QuestionSampler(len(QUESTIONS)) if mode == "Random" else None,
         "time_limit": None,
         "consecutive_skips": 0,
         "poll_message_id": None,
@@ -290,8 +313,8 @@ async def send_quiz_question(chat_id: int, state: FSMContext):
         return
     
     if user_data[user_id]["mode"] == "Random":
-        available_questions = [i for i in range(len(QUESTIONS)) if i not in user_data[user_id]["used_questions"]]
-        if not available_questions:
+        question_idx = user_data[user_id]["sampler"].draw()
+        if question_idx is None:
             await bot.send_message(
                 chat_id=chat_id,
                 text="❌ Savollar tugadi! Quizni yakunlayman."
@@ -300,7 +323,6 @@ async def send_quiz_question(chat_id: int, state: FSMContext):
             user_data.pop(user_id, None)
             await state.clear()
             return
-        question_idx = random.choice(available_questions)
     else:
         # Tartibli rejim
         question_idx = user_data[user_id]["start_index"] + user_data[user_id]["question_count"]
@@ -314,7 +336,6 @@ async def send_quiz_question(chat_id: int, state: FSMContext):
             await state.clear()
             return
     
-    user_data[user_id]["used_questions"].append(question_idx)
     question = QUESTIONS[question_idx]
     
     # Savol va variantlarni log qilish
@@ -2,125 +2,425 @@ import asyncio
 import os
 import logging
 import math
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.filters import Command
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
 from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
 from aiohttp import web
 import random
 
-# Logging sozlash
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+from quizbot.bank import load_bank
+from quizbot.campaigns import CampaignRunner, CampaignStore
+from quizbot.dedup import DedupCache, SessionLocks
+from quizbot.duplicates import load_deduplicated
+from quizbot.http import PooledAiohttpSession
+from quizbot.ingest import IngestQueue
+from quizbot.logs import EventLog, setup_logging
+from quizbot.metrics import MetricsRegistry
+from quizbot.outbound import PRIORITY_CONTROL, PRIORITY_FEEDBACK, PRIORITY_POLL, OutboundQueue
+from quizbot.payloads import PollPayloads, SentPoll, send_raw_poll
+from quizbot.polls import PollIndex
+from quizbot.registry import BankRegistry
+from quizbot.results import ResultsStore, board_key
+from quizbot.review import ReviewDeck, ReviewStore, now_minutes
+from quizbot.rooms import CoalescedEdit, Room
+from quizbot.router import broadcast, create_router_app, spawn_workers
+from quizbot.sampler import AdaptiveSampler, QuestionSampler
+from quizbot.sessions import SQLiteFSMStorage, create_session_store, fits_bank, redis_client
+from quizbot.stats import QuestionStats
+from quizbot.timers import TimerWheel
 
 # .env faylidan tokenni o‘qish
 load_dotenv()
+
+# Logging sozlash: LOG_FORMAT=json - JSON qatorlar; LOG_SAMPLE_RATE - har bir
+# savol/javob hodisasining yoziladigan ulushi (xatolar va yakunlar doim yoziladi)
+setup_logging(os.getenv("LOG_FORMAT", "text"), os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+events = EventLog(logger, float(os.getenv("LOG_SAMPLE_RATE", "1")))
+
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+QUESTIONS_FILE = "barcha_maruza_2_19.txt"
+BANKS_DIR = os.getenv("BANKS_DIR", ".")  # Savollar banklari katalogi
+BANKS_PATTERN = os.getenv("BANKS_PATTERN", QUESTIONS_FILE)  # Masalan: "*.txt"
+BANKS_MEMORY_MB = int(os.getenv("BANKS_MEMORY_MB", "64"))  # Yuklangan banklar uchun xotira byudjeti
+BANKS_WATCH_INTERVAL = float(os.getenv("BANKS_WATCH_INTERVAL", "0"))  # Fayllarni kuzatish oralig‘i (0 - o‘chiq)
+BANKS_DEDUP = os.getenv("BANKS_DEDUP", "0") == "1"  # Yuklashda deyarli bir xil savollarni olib tashlash
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")  # memory, sqlite yoki redis
+SESSION_DB = os.getenv("SESSION_DB", "sessions.sqlite3")
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1"))  # SQLite uchun (0 - darhol yozish)
+REVIEW_DB = os.getenv("REVIEW_DB", "reviews.sqlite3")  # Takrorlash rejimi tarixi
+RESULTS_DB = os.getenv("RESULTS_DB", "results.sqlite3")  # Yakunlangan sessiyalar tarixi va reytinglar
+QUESTION_STATS_DB = os.getenv("QUESTION_STATS_DB", "stats.sqlite3")  # Savollar bo‘yicha umumiy statistika
+QUESTION_STATS_FLUSH = float(os.getenv("QUESTION_STATS_FLUSH", "5"))
+ADAPTIVE_RANDOM = os.getenv("ADAPTIVE_RANDOM", "0") == "1"  # Random rejim savollarni o‘quvchi darajasiga moslaydi
+DIFFICULTY_BUCKETS = int(os.getenv("DIFFICULTY_BUCKETS", "5"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))  # 1 dan ko‘p bo‘lsa router + worker jarayonlari
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "8100"))  # Workerlar 127.0.0.1 dagi portlari
+WORKER_INDEX = os.getenv("WORKER_INDEX")  # Faqat worker jarayonlarida o‘rnatiladi
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # /metrics webhook portida emas, alohida manzilda
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))  # 0 - o‘chiq; i-worker METRICS_PORT + 1 + i da
+POLL_INDEX_TTL = float(os.getenv("POLL_INDEX_TTL", "900"))  # Kech javoblar shuncha soniya taniladi
+POLL_INDEX_SIZE = int(os.getenv("POLL_INDEX_SIZE", "200000"))
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))  # Bot API: soniyasiga umumiy xabarlar
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))  # Bitta shaxsiy chatga soniyasiga
+OUTBOUND_CHAT_BURST = int(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", str(20 / 60)))  # Guruhlarga soniyasiga
+BOT_HTTP_LIMIT = int(os.getenv("BOT_HTTP_LIMIT", "100"))  # Bot API ga bir vaqtdagi ulanishlar soni
+BOT_HTTP_KEEPALIVE = float(os.getenv("BOT_HTTP_KEEPALIVE", "30"))  # Bo‘sh ulanish shuncha soniya ochiq turadi
+BOT_HTTP_DNS_TTL = int(os.getenv("BOT_HTTP_DNS_TTL", "3600"))  # DNS keshi muddati
+BOT_HTTP_TRACE = os.getenv("BOT_HTTP_TRACE", "0") == "1"  # Ulanishlar puli statistikasi (har bir so‘rovga qo‘shimcha ish)
+INGEST_CONSUMERS = int(os.getenv("INGEST_CONSUMERS", "0"))  # 0 dan katta bo‘lsa webhook darhol javob beradi, updatelar navbatdan olinadi
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+COMPACT_FEEDBACK = os.getenv("COMPACT_FEEDBACK", "0") == "1"  # Natija alohida xabar o‘rniga keyingi savol sarlavhasida
+FEEDBACK_SUMMARY_EVERY = int(os.getenv("FEEDBACK_SUMMARY_EVERY", "0"))  # Compact rejimda har N savolda umumiy natija (0 - o‘chiq)
+ADMIN_IDS = {int(i) for i in os.getenv("ADMIN_IDS", "").replace(",", " ").split()}  # /reload huquqi borlar
+ROOM_QUESTIONS = int(os.getenv("ROOM_QUESTIONS", "10"))  # /room da savollar soni
+ROOM_TIME_LIMIT = int(os.getenv("ROOM_TIME_LIMIT", "30"))  # /room da har bir savol uchun soniya
+ROOM_BOARD_INTERVAL = float(os.getenv("ROOM_BOARD_INTERVAL", "5"))  # Natijalar xabari ko‘pi bilan shuncha soniyada bir yangilanadi
+CAMPAIGNS_DB = os.getenv("CAMPAIGNS_DB", "campaigns.sqlite3")  # Obunachilar va rejalashtirilgan kampaniyalar
+CAMPAIGN_RATE = float(os.getenv("CAMPAIGN_RATE", "20"))  # Kampaniyada soniyasiga ko‘pi bilan shuncha sessiya boshlanadi
+CAMPAIGN_CONCURRENCY = int(os.getenv("CAMPAIGN_CONCURRENCY", "50"))  # Barcha kampaniyalarda bir vaqtda kutiladigan boshlashlar
+CAMPAIGN_LIST = "daily"  # /subscribe ro‘yxati
+RAW_POLLS = os.getenv("RAW_POLLS", "1") == "1"  # sendPoll oldindan kodlangan JSON bilan (0 - bot.send_poll)
+BOT_API_URL = os.getenv("BOT_API_URL")  # Masalan, sinov uchun: http://127.0.0.1:8081 (python -m quizbot.fakeapi)
 
 # Holatlar
 class QuizStates(StatesGroup):
+    CHOOSE_BANK = State()
     CHOOSE_MODE = State()
     CHOOSE_GROUP = State()
     CHOOSE_TIME = State()
     HANDLE_QUIZ = State()
     PAUSE = State()
 
-# Savollarni fayldan o‘qish
-def load_questions():
-    questions = []
-    current_question = None
-    try:
-        with open("barcha_maruza_2_19.txt", "r", encoding="utf-8") as file:
-            lines = [line.strip() for line in file.readlines()]
-            if not lines:
-                logger.error("Fayl bo‘sh: barcha_maruza_2_19.txt")
-                return questions
-
-            i = 0
-            while i < len(lines):
-                line = lines[i]
-                if line and line != "+++++" and line != "====":
-                    if not current_question:  # Savol matni
-                        if line.strip():  # Bo‘sh savolni oldini olish
-                            current_question = {"question": line, "options": [], "correct": None}
-                        else:
-                            logger.warning(f"Bo‘sh savol topildi, o‘tkazib yuborildi: liniya {i+1}")
-                    else:  # Javob variantlari
-                        cleaned_line = line.strip('"')
-                        if cleaned_line:  # Bo‘sh variantni oldini olish
-                            current_question["options"].append(cleaned_line)
-                            if line.startswith("#"):
-                                current_question["correct"] = len(current_question["options"]) - 1
-                                current_question["options"][-1] = cleaned_line[1:] if cleaned_line.startswith("#") else cleaned_line
-                        else:
-                            logger.warning(f"Bo‘sh variant topildi: liniya {i+1}")
-                elif line == "+++++":
-                    if current_question and len(current_question["options"]) == 4 and current_question["correct"] is not None:
-                        questions.append(current_question)
-                    else:
-                        logger.warning(f"Noto‘g‘ri formatdagi savol topildi: {current_question}")
-                    current_question = None
-                i += 1
-            # Oxirgi savolni qo‘shish
-            if current_question and len(current_question["options"]) == 4 and current_question["correct"] is not None:
-                questions.append(current_question)
-            else:
-                logger.warning(f"Oxirgi savol noto‘g‘ri formatda: {current_question}")
-    except FileNotFoundError:
-        logger.error("Fayl topilmadi: barcha_maruza_2_19.txt")
-    except Exception as e:
-        logger.error(f"Faylni o‘qishda xato: {e}")
-    logger.info(f"Yuklangan savollar soni: {len(questions)}")
-    return questions
+# /metrics uchun asosiy kechikishlar
+metrics = MetricsRegistry()
+update_seconds = metrics.histogram("quizbot_update_seconds", "Update qayta ishlash vaqti")
+send_poll_seconds = metrics.histogram("quizbot_send_poll_seconds", "send_poll kechikishi (navbat bilan)")
+timeout_lag_seconds = metrics.histogram("quizbot_timeout_lag_seconds", "Poll timeout muddatidan kechikish",
+                                        (0.01, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0))
+parse_seconds = metrics.histogram("quizbot_bank_load_seconds", "Savollar bankini yuklash/parse vaqti")
+
+def timed_load_bank(path):
+    with parse_seconds.time():
+        bank = load_deduplicated(path) if BANKS_DEDUP else load_bank(path)
+        bank.search_index()  # /topic uchun indeks ham fon oqimida quriladi
+        return bank
 
 # Foydalanuvchi ma’lumotlari
 user_data = {}
-QUESTIONS = load_questions()
+banks = BankRegistry(BANKS_DIR, BANKS_PATTERN, BANKS_MEMORY_MB * 1024 * 1024, load=timed_load_bank)
+banks.discover()
 GROUP_SIZE = 30  # Tartibli rejimda guruh hajmi
 MAX_QUESTIONS_RANDOM = 50  # Random rejimda savollar soni
 MAX_QUESTIONS = GROUP_SIZE  # Tartibli rejimda savollar soni
-TOTAL_GROUPS = math.ceil(len(QUESTIONS) / GROUP_SIZE)  # Guruhlar soni
+POLL_QUESTION_LIMIT = 300  # Telegram poll savoli uzunligi chegarasi
+RESULT_MARKS = {"correct": "🎯 To‘g‘ri", "wrong": "❌ Noto‘g‘ri", "skipped": "⏰ O‘tkazildi"}
+
+# Bankdagi guruhlar soni
+def total_groups_for(bank):
+    return math.ceil(len(bank) / GROUP_SIZE)
+
+# Sessiyalar saqlagichi va FSM holatlari uchun saqlagich
+sessions = create_session_store(SESSION_BACKEND, SESSION_DB, REDIS_URL, SESSION_FLUSH_INTERVAL)
+reviews = ReviewStore(REVIEW_DB)
+results = ResultsStore(RESULTS_DB)
+question_stats = QuestionStats(QUESTION_STATS_DB, QUESTION_STATS_FLUSH, DIFFICULTY_BUCKETS)
+campaign_store = CampaignStore(CAMPAIGNS_DB)
+if SESSION_BACKEND == "redis":
+    from aiogram.fsm.storage.redis import RedisStorage
+    storage = RedisStorage(redis_client(REDIS_URL))
+elif SESSION_BACKEND == "sqlite":
+    storage = SQLiteFSMStorage(sessions)
+else:
+    storage = MemoryStorage()
 
 # Botni sozlash
-bot = Bot(token=BOT_TOKEN)
-storage = MemoryStorage()
+bot = Bot(token=BOT_TOKEN, session=PooledAiohttpSession(
+    limit=BOT_HTTP_LIMIT,
+    keepalive_timeout=BOT_HTTP_KEEPALIVE,
+    ttl_dns_cache=BOT_HTTP_DNS_TTL,
+    trace=BOT_HTTP_TRACE,
+    **({"api": TelegramAPIServer.from_base(BOT_API_URL)} if BOT_API_URL else {})
+))
 dp = Dispatcher(bot=bot, storage=storage)
 
+# Chiquvchi so‘rovlar navbati (Telegram flood limitlari bo‘yicha). Umumiy
+# limit bitta bot uchun: workerlar uni teng bo‘lishadi. Chat limitlari
+# bo‘linmaydi - bitta foydalanuvchining barcha updatelari bitta workerga tushadi.
+outbound = OutboundQueue(
+    OUTBOUND_GLOBAL_RATE / WEB_WORKERS if WORKER_INDEX is not None else OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST, OUTBOUND_GROUP_RATE
+)
+# Savollar bo‘yicha oldindan kodlangan sendPoll tanalari
+poll_payloads = PollPayloads(POLL_QUESTION_LIMIT)
+raw_polls = RAW_POLLS and isinstance(bot.session, AiohttpSession)
+
+# Ochiq polllarning vaqt tugashi muddatlari (kalit - user_id)
+timers = TimerWheel(on_lag=timeout_lag_seconds.observe)
+# poll_id -> (sessiya, chat, savol raqami): javoblar FSM holatisiz topiladi
+polls = PollIndex(POLL_INDEX_TTL, POLL_INDEX_SIZE)
+# Guruh chatlaridagi quizlar (kalit - chat_id). Guruh id lari manfiy, shuning
+# uchun polls va timers da foydalanuvchi kalitlari bilan to‘qnashmaydi.
+rooms = {}
+
+# Webhook updatelari navbati (INGEST_CONSUMERS > 0 bo‘lsa)
+async def process_update(update):
+    await dp.feed_raw_update(bot, update)
+
+ingest = IngestQueue(process_update, INGEST_CONSUMERS, INGEST_QUEUE_SIZE) if INGEST_CONSUMERS > 0 else None
+
+# Takroriy updatelar va javoblar; har bir savol bir marta hal qilinishi uchun
+# javob va timeout yo‘llari sessiya qulfi ostida ishlaydi
+answers_seen = DedupCache()
+session_locks = SessionLocks()
+
+if ingest is None:
+    updates_seen = DedupCache()
+
+    # Navbatsiz rejimda takroriy update_id lar shu yerda tashlanadi
+    @dp.update.outer_middleware()
+    async def drop_duplicate_updates(handler, event, data):
+        if updates_seen.seen(event.update_id):
+            events.info("Takroriy update e’tiborsiz qoldirildi", update_id=event.update_id)
+            return None
+        return await handler(event, data)
+
+@dp.update.outer_middleware()
+async def time_updates(handler, event, data):
+    with update_seconds.time():
+        return await handler(event, data)
+
+metrics.gauge("quizbot_active_sessions", "Xotiradagi faol sessiyalar", lambda: len(user_data))
+metrics.gauge("quizbot_open_polls", "Javob yoki timeout kutayotgan polllar", lambda: len(timers))
+metrics.gauge("quizbot_poll_index_size", "poll_id indeksidagi yozuvlar", lambda: len(polls))
+metrics.gauge("quizbot_poll_index_evictions_total", "Hajm chegarasi tufayli muddatidan oldin chiqarilgan polllar",
+              lambda: polls.evictions, "counter")
+metrics.gauge("quizbot_poll_index_expirations_total", "TTL tugagani uchun chiqarilgan polllar",
+              lambda: polls.expirations, "counter")
+metrics.gauge("quizbot_outbound_queue_depth", "Yuborilishini kutayotgan Bot API so‘rovlari", lambda: len(outbound))
+metrics.gauge("quizbot_outbound_sent_total", "Yuborilgan Bot API so‘rovlari", lambda: outbound.sent, "counter")
+metrics.gauge("quizbot_outbound_retries_total", "retry_after tufayli qayta urinishlar", lambda: outbound.retries, "counter")
+metrics.gauge("quizbot_outbound_failed_total", "Muvaffaqiyatsiz Bot API so‘rovlari", lambda: outbound.failed, "counter")
+if BOT_HTTP_TRACE:
+    metrics.gauge("quizbot_http_pool_wait_seconds_max", "Bo‘sh ulanishni eng uzoq kutish",
+                  lambda: bot.session.pool_stats.wait_max)
+    metrics.gauge("quizbot_http_pool_queued_total", "Bo‘sh ulanishni kutgan so‘rovlar",
+                  lambda: bot.session.pool_stats.queued, "counter")
+metrics.gauge("quizbot_active_rooms", "Guruh chatlaridagi faol quizlar", lambda: len(rooms))
+room_answers = metrics.counter("quizbot_room_answers_total", "Guruh polllariga qabul qilingan javoblar")
+metrics.gauge("quizbot_poll_payload_hits_total", "Keshdan olingan sendPoll bo‘laklari",
+              lambda: poll_payloads.hits, "counter")
+metrics.gauge("quizbot_poll_payload_misses_total", "Kodlangan sendPoll bo‘laklari", lambda: poll_payloads.misses, "counter")
+metrics.gauge("quizbot_loaded_banks_bytes", "Yuklangan banklar egallagan xotira", banks.memory_used)
+if ingest is not None:
+    metrics.gauge("quizbot_ingest_depth", "Update navbati uzunligi", lambda: len(ingest))
+    metrics.gauge("quizbot_ingest_dropped_total", "Navbat to‘lgani uchun qaytarilgan updatelar",
+                  lambda: ingest.dropped, "counter")
+    metrics.gauge("quizbot_ingest_duplicates_total", "Takroriy updatelar", lambda: ingest.duplicates, "counter")
+    metrics.gauge("quizbot_ingest_lag_seconds_max", "Navbatda eng uzoq kutish", lambda: ingest.lag_max)
+
+# Sessiya chatining FSM holati. Poll javobida aiogram chatni bilmaydi,
+# shuning uchun guruh chatlarida kalitni sessiyadan olamiz.
+def session_state(user_id):
+    chat_id = user_data[user_id].get("chat_id") or user_id
+    return FSMContext(storage=dp.storage, key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=user_id))
+
+# Sessiyani olish: avval jarayon ichidagi keshdan (user_data), bo‘lmasa
+# saqlagichdan (masalan, qayta ishga tushirilgandan keyin)
+async def get_session(user_id):
+    session = user_data.get(user_id)
+    if session is None and sessions.persistent:
+        session = await sessions.load(user_id)
+        if session is None:
+            return None
+        if session["bank_name"] not in banks.names():
+            await sessions.delete(user_id)
+            return None
+        bank = await banks.get(session["bank_name"])
+        if not fits_bank(session, bank):
+            # Savol pozitsiyalari eski bank tartibiga tegishli - sessiya davom ettirilmaydi
+            await sessions.delete(user_id)
+            chat_id = session["chat_id"] or user_id
+            await FSMContext(storage=dp.storage, key=StorageKey(bot_id=bot.id, chat_id=chat_id, user_id=user_id)).clear()
+            outbound.post(chat_id, PRIORITY_CONTROL, bot.send_message,
+                chat_id=chat_id,
+                text="⚠️ Savollar to‘plami yangilangani uchun tugallanmagan quiz to‘xtatildi. "
+                     "Yangi quizni /quiz buyrug‘i bilan boshlang."
+            )
+            logger.warning(f"Sessiya bank o‘zgargani uchun tiklanmadi: user_id={user_id}, bank={session['bank_name']}")
+            return None
+        session["bank"] = bank
+        if session["mode"] == "Takrorlash":
+            session["deck"] = await load_deck(user_id, session["bank_name"], session["bank"])
+        user_data[user_id] = session
+        logger.info(f"Sessiya saqlagichdan tiklandi: user_id={user_id}")
+    return session
+
+async def save_session(user_id):
+    if sessions.persistent and user_id in user_data:
+        await sessions.save(user_id, user_data[user_id])
+        await save_deck(user_id)
+
+async def end_session(user_id):
+    timers.cancel(user_id)
+    await save_deck(user_id)
+    user_data.pop(user_id, None)
+    if sessions.persistent:
+        await sessions.delete(user_id)
+
+async def new_session(user_id: int, chat_id: int, name: str, bank_name: str, bank, mode: str, topic_questions=None):
+    return {
+        "bank": bank,  # Sessiya oxirigacha shu bank bilan ishlaydi
+        "bank_name": bank_name,
+        "chat_id": chat_id,  # Savollar yuboriladigan chat
+        "mode": mode,
+        "score": 0,
+        "wrong": 0,
+        "skipped": 0,
+        "question_count": 0,
+        "question_idx": None,  # Ekrandagi savol indeksi
+        "permutation": None,  # Ekrandagi savol variantlari tartibi
+        "poll_id": None,
+        "sampler": new_sampler(mode, bank),
+        "time_limit": None,
+        "consecutive_skips": 0,
+        "poll_message_id": None,
+        "start_index": 0,  # Tartibli rejim uchun boshlang‘ich indeks
+        "group_number": None,  # Tanlangan guruh raqami
+        "last_result": None,  # Compact rejimda oldingi savol natijasi
+        "deck": await load_deck(user_id, bank_name, bank) if mode == "Takrorlash" else None,
+        "name": name,  # Reyting jadvali uchun
+        "topic_questions": topic_questions  # Mavzu va Kunlik rejimlarda tanlangan savollar
+    }
+
+def max_questions_for(session):
+    if session["mode"] == "Random":
+        return MAX_QUESTIONS_RANDOM
+    if session["mode"] in ("Mavzu", "Kunlik"):
+        return len(session["topic_questions"])
+    return MAX_QUESTIONS
+
+# Takrorlash rejimi: foydalanuvchining shu bank bo‘yicha SM-2 holati
+async def load_deck(user_id, bank_name, bank):
+    deck = await reviews.load(user_id, bank_name, bank)
+    if deck is None:
+        return ReviewDeck.new(len(bank), bank.layout())
+    return deck
+
+async def save_deck(user_id):
+    session = user_data.get(user_id)
+    if session is not None and session.get("deck") is not None:
+        await reviews.save(user_id, session["bank_name"], session["deck"])
+
+# Javob yoki timeout natijasini statistikaga, takrorlash holatiga va
+# moslashuvchan tanlovchiga yozish
+def record_answer(user_id, result):
+    session = user_data[user_id]
+    question_stats.record(session["bank_name"], session["bank"], session["question_idx"], result)
+    if session.get("deck") is not None:
+        session["deck"].review(session["question_idx"], result, now_minutes())
+    if isinstance(session["sampler"], AdaptiveSampler):
+        session["sampler"].record(result)
+
+def new_sampler(mode, bank):
+    if mode != "Random":
+        return None
+    if ADAPTIVE_RANDOM:
+        return AdaptiveSampler(len(bank), DIFFICULTY_BUCKETS)
+    return QuestionSampler(len(bank))
+
 @dp.message(Command(commands=["start"]))
 async def start_command(message: types.Message):
-    if not QUESTIONS:
+    names = banks.names()
+    bank = await banks.get(names[0]) if len(names) == 1 else None
+    if not names or (bank is not None and not bank):
         await message.reply(
-            "❌ Hozirda savollar mavjud emas. Iltimos, savollar faylini tekshiring (barcha_maruza_2_19.txt)."
+            "❌ Hozirda savollar mavjud emas. Iltimos, savollar faylini tekshiring."
         )
         return
+    if bank is not None:
+        available = f"{len(bank)} ta savol mavjud ({total_groups_for(bank)} guruh, har birida {GROUP_SIZE} gacha savol).\n"
+    else:
+        available = f"{len(names)} ta savollar to‘plami mavjud: {', '.join(names)}.\n"
     await message.reply(
         "🎉 JavaScript quiz botga xush kelibsiz! ❓\n"
-        f"{len(QUESTIONS)} ta savol mavjud ({TOTAL_GROUPS} guruh, har birida {GROUP_SIZE} gacha savol).\n"
+        f"{available}"
         f"Random rejim: {MAX_QUESTIONS_RANDOM} savol. Tartibli rejim: {GROUP_SIZE} savol.\n"
-        "Quizni boshlash uchun /quiz buyrug‘ini yuboring."
+        "Quizni boshlash uchun /quiz buyrug‘ini yuboring.\n"
+        "Mavzu bo‘yicha: /topic <so‘rov>. Natijalaringiz: /stats, reyting: /top.\n"
+        "Har kuni quiz olish uchun: /subscribe."
     )
 
 @dp.message(Command(commands=["quiz"]))
 async def quiz_start(message: types.Message, state: FSMContext):
-    if not QUESTIONS:
+    names = banks.names()
+    if not names:
+        await message.reply(
+            "❌ Hozirda savollar mavjud emas. Iltimos, savollar faylini tekshiring."
+        )
+        return
+    if len(names) == 1:
+        await state.update_data(bank=names[0])
+        await ask_mode(message, state)
+        return
+    # Savollar to‘plamini tanlash tugmalari
+    keyboard = ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text=name) for name in names[i:i + 2]] for i in range(0, len(names), 2)
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=True
+    )
+    await message.reply(
+        "📚 Qaysi savollar to‘plamidan quiz ishlaysiz?",
+        reply_markup=keyboard
+    )
+    await state.set_state(QuizStates.CHOOSE_BANK)
+
+@dp.message(QuizStates.CHOOSE_BANK)
+async def choose_bank(message: types.Message, state: FSMContext):
+    names = banks.names()
+    if message.text not in names:
+        keyboard = ReplyKeyboardMarkup(
+            keyboard=[
+                [KeyboardButton(text=name) for name in names[i:i + 2]] for i in range(0, len(names), 2)
+            ],
+            resize_keyboard=True,
+            one_time_keyboard=True
+        )
         await message.reply(
-            "❌ Hozirda savollar mavjud emas. Iltimos, savollar faylini tekshiring (barcha_maruza_2_19.txt)."
+            "❌ Iltimos, ro‘yxatdagi savollar to‘plamlaridan birini tanlang!",
+            reply_markup=keyboard
         )
         return
+    await state.update_data(bank=message.text)
+    logger.info(f"Savollar to‘plami tanlandi: user_id={message.from_user.id}, bank={message.text}")
+    await ask_mode(message, state)
+
+async def ask_mode(message: types.Message, state: FSMContext):
     # Rejim tanlash tugmalari
     keyboard = ReplyKeyboardMarkup(
         keyboard=[
-            [KeyboardButton(text="Random"), KeyboardButton(text="Tartibli")]
+            [KeyboardButton(text="Random"), KeyboardButton(text="Tartibli")],
+            [KeyboardButton(text="Takrorlash")]
         ],
         resize_keyboard=True,
         one_time_keyboard=True
     )
     await message.reply(
-        "🎯 Quiz boshlanmoqda! Rejimni tanlang: Random (test uchun) yoki Tartibli (o‘rganish uchun).",
+        "🎯 Quiz boshlanmoqda! Rejimni tanlang: Random (test uchun), Tartibli (o‘rganish uchun) "
+        "yoki Takrorlash (xato qilingan va takrorlash vaqti kelgan savollar).",
         reply_markup=keyboard
     )
     await state.set_state(QuizStates.CHOOSE_MODE)
@@ -129,59 +429,67 @@ async def quiz_start(message: types.Message, state: FSMContext):
 async def choose_mode(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     mode = message.text
-    if mode not in ["Random", "Tartibli"]:
+    if mode not in ["Random", "Tartibli", "Takrorlash"]:
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
-                [KeyboardButton(text="Random"), KeyboardButton(text="Tartibli")]
+                [KeyboardButton(text="Random"), KeyboardButton(text="Tartibli")],
+                [KeyboardButton(text="Takrorlash")]
             ],
             resize_keyboard=True,
             one_time_keyboard=True
         )
         await message.reply(
-            "❌ Iltimos, 'Random' yoki 'Tartibli' ni tanlang!",
+            "❌ Iltimos, 'Random', 'Tartibli' yoki 'Takrorlash' ni tanlang!",
             reply_markup=keyboard
         )
         return
     
-    # Foydalanuvchi ma’lumotlarini boshlash
-    user_data[user_id] = {
-        "mode": mode,
-        "score": 0,
-        "wrong": 0,
-        "skipped": 0,
-        "question_count": 0,
-        "active_poll": None,
-        "poll_id": None,
-        "used_questions": [],
-        "time_limit": None,
-        "consecutive_skips": 0,
-        "poll_message_id": None,
-        "timeout_task": None,
-        "start_index": 0,  # Tartibli rejim uchun boshlang‘ich indeks
-        "group_number": None  # Tanlangan guruh raqami
-    }
+    # Tanlangan savollar to‘plamini yuklash (birinchi marta tanlanganda)
+    bank_name = (await state.get_data()).get("bank")
+    if bank_name not in banks.names():
+        await message.reply(
+            "❌ Savollar to‘plami topilmadi. Iltimos, quizni /quiz buyrug‘i bilan qayta boshlang!",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        await state.clear()
+        return
+    bank = await banks.get(bank_name)
+    if not bank:
+        await message.reply(
+            f"❌ '{bank_name}' to‘plamida savollar mavjud emas.",
+            reply_markup=ReplyKeyboardRemove()
+        )
+        await state.clear()
+        return
+    total_groups = total_groups_for(bank)
     
+    # Foydalanuvchi ma’lumotlarini boshlash (eski sessiyaning javobi yoki timeouti bilan aralashmasin)
+    async with session_locks.get(user_id):
+        timers.cancel(user_id)
+        user_data[user_id] = await new_session(user_id, message.chat.id, message.from_user.full_name,
+                                               bank_name, bank, mode)
+        await save_session(user_id)
     logger.info(f"Rejim tanlandi: user_id={user_id}, mode={mode}")
     
     if mode == "Tartibli":
         # Guruh tugmalari
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
-                [KeyboardButton(text=str(i)) for i in range(1, min(4, TOTAL_GROUPS + 1))],
-                [KeyboardButton(text=str(i)) for i in range(4, min(7, TOTAL_GROUPS + 1))] if TOTAL_GROUPS > 3 else [],
-                [KeyboardButton(text=str(i)) for i in range(7, TOTAL_GROUPS + 1)] if TOTAL_GROUPS > 6 else []
+                [KeyboardButton(text=str(i)) for i in range(1, min(4, total_groups + 1))],
+                [KeyboardButton(text=str(i)) for i in range(4, min(7, total_groups + 1))] if total_groups > 3 else [],
+                [KeyboardButton(text=str(i)) for i in range(7, total_groups + 1)] if total_groups > 6 else []
             ],
             resize_keyboard=True,
             one_time_keyboard=True
         )
         await message.reply(
-            f"📚 Tartibli rejim tanlandi. {TOTAL_GROUPS} ta guruh mavjud (har birida {GROUP_SIZE} gacha savol).\n"
+            f"📚 Tartibli rejim tanlandi. {total_groups} ta guruh mavjud (har birida {GROUP_SIZE} gacha savol).\n"
             "Qaysi guruhni tanlaysiz? (1-guruh: 1-30, 2-guruh: 31-60, ...)",
             reply_markup=keyboard
         )
         await state.set_state(QuizStates.CHOOSE_GROUP)
     else:
-        # Random rejim uchun vaqt tanlash
+        # Random va Takrorlash rejimlari uchun vaqt tanlash
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
                 [KeyboardButton(text="5"), KeyboardButton(text="10"), KeyboardButton(text="15")],
@@ -200,25 +508,29 @@ async def choose_mode(message: types.Message, state: FSMContext):
 @dp.message(QuizStates.CHOOSE_GROUP)
 async def choose_group(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
+    await get_session(user_id)
+    bank = user_data[user_id]["bank"]
+    total_groups = total_groups_for(bank)
     try:
         group_number = int(message.text)
-        if group_number < 1 or group_number > TOTAL_GROUPS:
+        if group_number < 1 or group_number > total_groups:
             keyboard = ReplyKeyboardMarkup(
                 keyboard=[
-                    [KeyboardButton(text=str(i)) for i in range(1, min(4, TOTAL_GROUPS + 1))],
-                    [KeyboardButton(text=str(i)) for i in range(4, min(7, TOTAL_GROUPS + 1))] if TOTAL_GROUPS > 3 else [],
-                    [KeyboardButton(text=str(i)) for i in range(7, TOTAL_GROUPS + 1)] if TOTAL_GROUPS > 6 else []
+                    [KeyboardButton(text=str(i)) for i in range(1, min(4, total_groups + 1))],
+                    [KeyboardButton(text=str(i)) for i in range(4, min(7, total_groups + 1))] if total_groups > 3 else [],
+                    [KeyboardButton(text=str(i)) for i in range(7, total_groups + 1)] if total_groups > 6 else []
                 ],
                 resize_keyboard=True,
                 one_time_keyboard=True
             )
             await message.reply(
-                f"❌ Iltimos, 1 dan {TOTAL_GROUPS} gacha bo‘lgan guruh raqamini tanlang!",
+                f"❌ Iltimos, 1 dan {total_groups} gacha bo‘lgan guruh raqamini tanlang!",
                 reply_markup=keyboard
             )
             return
         user_data[user_id]["group_number"] = group_number
         user_data[user_id]["start_index"] = (group_number - 1) * GROUP_SIZE
+        await save_session(user_id)
         logger.info(f"Guruh tanlandi: user_id={user_id}, group_number={group_number}, start_index={user_data[user_id]['start_index']}")
     except ValueError:
         await message.reply(
@@ -237,7 +549,7 @@ async def choose_group(message: types.Message, state: FSMContext):
         one_time_keyboard=True
     )
     await message.reply(
-        f"⏳ Guruh {group_number} tanlandi ({user_data[user_id]['start_index'] + 1}-{min(user_data[user_id]['start_index'] + GROUP_SIZE, len(QUESTIONS))} savollar).\n"
+        f"⏳ Guruh {group_number} tanlandi ({user_data[user_id]['start_index'] + 1}-{min(user_data[user_id]['start_index'] + GROUP_SIZE, len(bank))} savollar).\n"
         "Har bir savol uchun qancha vaqt kerak? (soniyalarda)",
         reply_markup=keyboard
     )
@@ -247,6 +559,7 @@ async def choose_group(message: types.Message, state: FSMContext):
 async def choose_time(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     time_choice = message.text
+    await get_session(user_id)
     if time_choice not in ["5", "10", "15", "20", "30", "45", "60"]:
         keyboard = ReplyKeyboardMarkup(
             keyboard=[
@@ -263,230 +576,296 @@ async def choose_time(message: types.Message, state: FSMContext):
         )
         return
     
-    user_data[user_id]["time_limit"] = int(time_choice)
-    
     await message.reply(
         f"⏳ Har bir savol uchun {time_choice} soniya vaqt beriladi. Birinchi savol keladi...",
         reply_markup=ReplyKeyboardRemove()
     )
-    await send_quiz_question(chat_id=message.chat.id, state=state)
-    await state.set_state(QuizStates.HANDLE_QUIZ)
+    async with session_locks.get(user_id):
+        if await get_session(user_id) is not None:
+            user_data[user_id]["time_limit"] = int(time_choice)
+        await send_quiz_question(chat_id=message.chat.id, state=state, user_id=user_id)
+        await state.set_state(QuizStates.HANDLE_QUIZ)
 
-async def send_quiz_question(chat_id: int, state: FSMContext):
-    user_id = chat_id
-    if user_id not in user_data:
-        await bot.send_message(
+async def send_quiz_question(chat_id: int, state: FSMContext, user_id: int = None):
+    user_id = user_id or chat_id
+    if await get_session(user_id) is None:
+        await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
             chat_id=chat_id,
             text="❌ Iltimos, quizni /quiz buyrug‘i bilan boshlang!"
         )
         await state.clear()
         return
     
+    bank = user_data[user_id]["bank"]
     # Rejimga qarab maksimal savollar sonini aniqlash
-    max_questions = MAX_QUESTIONS_RANDOM if user_data[user_id]["mode"] == "Random" else MAX_QUESTIONS
+    max_questions = max_questions_for(user_data[user_id])
     
     if user_data[user_id]["question_count"] >= max_questions:
         await show_results(chat_id=chat_id, user_id=user_id)
-        user_data.pop(user_id, None)
+        await end_session(user_id)
         await state.clear()
         return
     
     if user_data[user_id]["mode"] == "Random":
-        available_questions = [i for i in range(len(QUESTIONS)) if i not in user_data[user_id]["used_questions"]]
-        if not available_questions:
-            await bot.send_message(
+        sampler = user_data[user_id]["sampler"]
+        if isinstance(sampler, AdaptiveSampler):
+            question_idx = sampler.draw(await question_stats.index(user_data[user_id]["bank_name"], bank))
+        else:
+            question_idx = sampler.draw()
+        if question_idx is None:
+            await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
                 chat_id=chat_id,
                 text="❌ Savollar tugadi! Quizni yakunlayman."
             )
             await show_results(chat_id=chat_id, user_id=user_id)
-            user_data.pop(user_id, None)
+            await end_session(user_id)
+            await state.clear()
+            return
+    elif user_data[user_id]["mode"] in ("Mavzu", "Kunlik"):
+        question_idx = user_data[user_id]["topic_questions"][user_data[user_id]["question_count"]]
+    elif user_data[user_id]["mode"] == "Takrorlash":
+        # Muddati kelgan savol, bo‘lmasa hali ko‘rilmagan keyingi savol
+        question_idx = user_data[user_id]["deck"].next(now_minutes())
+        if question_idx is None:
+            await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
+                chat_id=chat_id,
+                text="✅ Hozircha takrorlanadigan savol qolmadi. Keyinroq qaytib keling!"
+            )
+            await show_results(chat_id=chat_id, user_id=user_id)
+            await end_session(user_id)
             await state.clear()
             return
-        question_idx = random.choice(available_questions)
     else:
         # Tartibli rejim
         question_idx = user_data[user_id]["start_index"] + user_data[user_id]["question_count"]
-        if question_idx >= len(QUESTIONS):
-            await bot.send_message(
+        if question_idx >= len(bank):
+            await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
                 chat_id=chat_id,
                 text="❌ Tanlangan guruhda savollar tugadi! Quizni yakunlayman."
             )
             await show_results(chat_id=chat_id, user_id=user_id)
-            user_data.pop(user_id, None)
+            await end_session(user_id)
             await state.clear()
             return
     
-    user_data[user_id]["used_questions"].append(question_idx)
-    question = QUESTIONS[question_idx]
-    
-    # Random rejimda javob variantlarini aralashtirish
-    options = question["options"].copy()  # Asl ro‘yxatni o‘zgartirmaslik uchun nusxa olamiz
-    correct_answer = options[question["correct"]]  # To‘g‘ri javobni saqlab qo‘yamiz
+    # Random rejimda javob variantlarini aralashtirish: umumiy bank o‘zgarmaydi,
+    # sessiya faqat o‘z permutatsiyasini saqlaydi
+    permutation = tuple(range(bank.option_count(question_idx)))
     if user_data[user_id]["mode"] == "Random":
-        indices = list(range(len(options)))  # Variantlar indekslari
-        random.shuffle(indices)  # Indekslarni tasodifiy aralashtiramiz
-        # Yangi tartibda variantlarni joylashtiramiz
-        shuffled_options = [options[i] for i in indices]
-        # To‘g‘ri javobning yangi indeksini aniqlaymiz
-        new_correct_index = indices.index(question["correct"])
-        options = shuffled_options
-        question["correct"] = new_correct_index
+        permutation = tuple(random.sample(permutation, len(permutation)))
     
-    # Savol va variantlarni log qilish
-    logger.info(f"Savol yuborilmoqda (user_id={user_id}, mode={user_data[user_id]['mode']}, idx={question_idx}): {question['question']}")
-    logger.info(f"Variantlar: {options}")
+    # Savolni log qilish (matn faqat yozuv haqiqatan chiqarilganda formatlanadi)
+    events.info("Savol yuborilmoqda: %s", bank.question(question_idx),
+                user_id=user_id, mode=user_data[user_id]["mode"], idx=question_idx, permutation=permutation)
     
     user_data[user_id]["question_count"] += 1
-    user_data[user_id]["active_poll"] = question
+    user_data[user_id]["question_idx"] = question_idx
+    user_data[user_id]["permutation"] = permutation
     
-    # Eski timeout vazifasini bekor qilish
-    if user_data[user_id]["timeout_task"] is not None:
-        user_data[user_id]["timeout_task"].cancel()
-        logger.info(f"Eski timeout vazifasi bekor qilindi: user_id={user_id}")
+    # Eski timeout muddatini bekor qilish
+    if timers.cancel(user_id):
+        events.info("Eski timeout vazifasi bekor qilindi", user_id=user_id)
     
     # Poll yuborish
     try:
-        poll = await bot.send_poll(
-            chat_id=chat_id,
-            question=f"❓ Savol {user_data[user_id]['question_count']}/{max_questions}: {question['question']}",
-            options=options,  # Aralashtirilgan variantlar
-            type="quiz",
-            correct_option_id=question["correct"],  # Yangi to‘g‘ri indeks
-            is_anonymous=False,
-            open_period=user_data[user_id]["time_limit"],
-            explanation=f"✅ To‘g‘ri javob: {correct_answer}"  # To‘g‘ri javobni ko‘rsatish
-        )
-        user_data[user_id]["poll_id"] = poll.poll.id
+        with send_poll_seconds.time():
+            poll = await send_question_poll(chat_id, bank, question_idx, permutation,
+                                            poll_header(user_id, max_questions), user_data[user_id]["time_limit"])
+        user_data[user_id]["poll_id"] = poll.poll_id
         user_data[user_id]["poll_message_id"] = poll.message_id
-        logger.info(f"Poll yuborildi: poll_id={poll.poll.id}, message_id={poll.message_id}")
+        await save_session(user_id)
+        polls.add(poll.poll_id, user_id, chat_id, user_data[user_id]["question_count"])
+        events.info("Poll yuborildi", user_id=user_id, poll_id=poll.poll_id, message_id=poll.message_id)
         
         # Vaqt tugashini kuzatish
-        user_data[user_id]["timeout_task"] = asyncio.create_task(
-            handle_poll_timeout(chat_id, poll.poll.id, user_data[user_id]["time_limit"], state)
-        )
+        timers.schedule(user_id, user_data[user_id]["time_limit"], handle_poll_timeout, user_id, poll.poll_id, state)
+        events.info("Vaqt kuzatilmoqda", user_id=user_id, poll_id=poll.poll_id, time_limit=user_data[user_id]["time_limit"])
     except Exception as e:
         logger.error(f"Poll yuborishda xato (user_id={user_id}): {e}")
-        await bot.send_message(
+        await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
             chat_id=chat_id,
             text="❌ Savolni yuborishda xato yuz berdi. Iltimos, qayta urinib ko‘ring."
         )
         await state.clear()
         return
 
-async def handle_poll_timeout(chat_id: int, poll_id: str, time_limit: int, state: FSMContext):
-    user_id = chat_id
-    logger.info(f"Vaqt kuzatilmoqda: user_id={user_id}, poll_id={poll_id}, time_limit={time_limit}")
-    
-    try:
-        await asyncio.sleep(time_limit)
-    except asyncio.CancelledError:
-        logger.info(f"Timeout vazifasi bekor qilindi: user_id={user_id}, poll_id={poll_id}")
-        return
-    
-    if user_id not in user_data or user_data[user_id]["poll_id"] != poll_id:
-        logger.info(f"Vaqt tugashi e’tiborsiz qoldirildi: user_id={user_id}, poll_id={poll_id}")
+# Savol sarlavhasi; compact rejimda oldingi natija va joriy hisob ham qo‘shiladi
+def poll_header(user_id: int, max_questions: int) -> str:
+    session = user_data[user_id]
+    header = f"❓ Savol {session['question_count']}/{max_questions}: "
+    if COMPACT_FEEDBACK and session.get("last_result"):
+        header = (f"{RESULT_MARKS[session['last_result']]} | "
+                  f"✅ {session['score']} ❌ {session['wrong']} ⏭ {session['skipped']}\n{header}")
+    return header
+
+# Poll yuborish: tayyor JSON tanasi to‘g‘ridan-to‘g‘ri sendPoll ga (savol
+# matni, variantlar va izoh keshdan, sessiyadan faqat sarlavha va
+# permutatsiya); RAW_POLLS=0 yoki aiohttp bo‘lmagan sessiyada bot.send_poll
+async def send_question_poll(chat_id, bank, question_idx, permutation, header, open_period):
+    if raw_polls:
+        body = poll_payloads.body(bank, question_idx, permutation, header, chat_id, open_period)
+        return await outbound.call(chat_id, PRIORITY_POLL, send_raw_poll, bot, body)
+    options, correct_option_id = bank.arrange(question_idx, permutation)
+    message = await outbound.call(chat_id, PRIORITY_POLL, bot.send_poll,
+        chat_id=chat_id,
+        question=poll_payloads.question_text(bank, question_idx, header),
+        options=options,  # Aralashtirilgan variantlar
+        type="quiz",
+        correct_option_id=correct_option_id,  # Yangi to‘g‘ri indeks
+        is_anonymous=False,  # poll_answer updatelari faqat ochiq polllar uchun keladi
+        open_period=open_period,
+        explanation=f"✅ To‘g‘ri javob: {bank.correct_text(question_idx)}"  # To‘g‘ri javobni ko‘rsatish
+    )
+    return SentPoll(message.message_id, message.poll.id)
+
+# Compact rejimda natijani yozib qo‘yish yoki oddiy rejimda alohida xabar yuborish
+def report_result(user_id: int, chat_id: int, result: str, text: str):
+    session = user_data[user_id]
+    if not COMPACT_FEEDBACK:
+        outbound.post(chat_id, PRIORITY_FEEDBACK, bot.send_message, chat_id=chat_id, text=text)
         return
-    
-    user_data[user_id]["timeout_task"] = None
-    user_data[user_id]["skipped"] += 1
-    user_data[user_id]["consecutive_skips"] += 1
-    
-    logger.info(f"Savol o‘tkazib yuborildi: user_id={user_id}, consecutive_skips={user_data[user_id]['consecutive_skips']}")
-    
-    if user_data[user_id]["consecutive_skips"] >= 3:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="Davom ettirish"), KeyboardButton(text="Tugatish")]
-            ],
-            resize_keyboard=True,
-            one_time_keyboard=True
-        )
-        await bot.send_message(
-            chat_id=user_id,
-            text="⏸ Ketma-ket 3 ta savol o‘tkazib yuborildi. Quiz pauza qilindi.\nDavom ettirish yoki tugatishni tanlang:",
-            reply_markup=keyboard
+    session["last_result"] = result
+    if FEEDBACK_SUMMARY_EVERY > 0 and session["question_count"] % FEEDBACK_SUMMARY_EVERY == 0:
+        outbound.post(chat_id, PRIORITY_FEEDBACK, bot.send_message,
+            chat_id=chat_id,
+            text=(f"📊 {session['question_count']} ta savoldan keyin: "
+                  f"✅ {session['score']} | ❌ {session['wrong']} | ⏭ {session['skipped']}")
         )
-        await state.set_state(QuizStates.PAUSE)
-        return
-    
-    await bot.send_message(
-        chat_id=user_id,
-        text="⏰ Vaqt tugadi! Bu savol o‘tkazib yuborildi."
-    )
-    # Keyingi savolni yuborish
-    await send_quiz_question(chat_id=user_id, state=state)
 
-@dp.poll_answer(QuizStates.HANDLE_QUIZ)
-async def handle_poll_answer(poll_answer: types.PollAnswer, state: FSMContext):
-    user_id = poll_answer.user.id
+# Poll muddati tugaganda taymer g‘ildiragi tomonidan chaqiriladi
+async def handle_poll_timeout(user_id: int, poll_id: str, state: FSMContext):
+    async with session_locks.get(user_id):
+        if user_id not in user_data or user_data[user_id]["poll_id"] != poll_id:
+            events.info("Vaqt tugashi e’tiborsiz qoldirildi", user_id=user_id, poll_id=poll_id)
+            return
+        
+        chat_id = user_data[user_id]["chat_id"] or user_id
+        user_data[user_id]["poll_id"] = None  # Bu savolga kech kelgan javob hisoblanmaydi
+        user_data[user_id]["skipped"] += 1
+        user_data[user_id]["consecutive_skips"] += 1
+        record_answer(user_id, "skipped")
+        
+        events.info("Savol o‘tkazib yuborildi", user_id=user_id, consecutive_skips=user_data[user_id]["consecutive_skips"])
+        
+        if user_data[user_id]["consecutive_skips"] >= 3:
+            keyboard = ReplyKeyboardMarkup(
+                keyboard=[
+                    [KeyboardButton(text="Davom ettirish"), KeyboardButton(text="Tugatish")]
+                ],
+                resize_keyboard=True,
+                one_time_keyboard=True
+            )
+            await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
+                chat_id=chat_id,
+                text="⏸ Ketma-ket 3 ta savol o‘tkazib yuborildi. Quiz pauza qilindi.\nDavom ettirish yoki tugatishni tanlang:",
+                reply_markup=keyboard
+            )
+            await save_session(user_id)
+            await state.set_state(QuizStates.PAUSE)
+            return
+        
+        report_result(user_id, chat_id, "skipped", "⏰ Vaqt tugadi! Bu savol o‘tkazib yuborildi.")
+        # Keyingi savolni yuborish
+        await send_quiz_question(chat_id=chat_id, state=state, user_id=user_id)
+
+@dp.poll_answer()
+async def handle_poll_answer(poll_answer: types.PollAnswer):
+    voter_id = poll_answer.user.id if poll_answer.user else None
     poll_id = poll_answer.poll_id
     
-    logger.info(f"Poll javobi keldi: user_id={user_id}, poll_id={poll_id}")
+    events.info("Poll javobi keldi", user_id=voter_id, poll_id=poll_id)
     
-    if user_id not in user_data or user_data[user_id]["poll_id"] != poll_id:
-        logger.warning(f"Noto‘g‘ri user_id yoki poll_id: user_id={user_id}, poll_id={poll_id}")
+    # Sessiyani poll_id bo‘yicha topish; indeksda yo‘q bo‘lsa (masalan, qayta
+    # ishga tushirilgandan keyin) ovoz bergan foydalanuvchi bo‘yicha
+    ref = polls.get(poll_id)
+    if ref is not None and ref.session_key in rooms:
+        room_answer(rooms[ref.session_key], poll_answer)
+        return
+    user_id = ref.session_key if ref is not None else voter_id
+    if user_id is None or voter_id != user_id:
+        events.info("Boshqa foydalanuvchi sessiyasiga javob e’tiborsiz qoldirildi", user_id=voter_id, poll_id=poll_id)
+        return
+    if answers_seen.seen((user_id, poll_id)):
+        events.info("Takroriy javob e’tiborsiz qoldirildi", user_id=user_id, poll_id=poll_id)
         return
     
-    # Timeout vazifasini bekor qilish
-    if user_data[user_id]["timeout_task"] is not None:
-        user_data[user_id]["timeout_task"].cancel()
-        user_data[user_id]["timeout_task"] = None
-        logger.info(f"Timeout vazifasi javob tufayli bekor qilindi: user_id={user_id}, poll_id={poll_id}")
-    
-    correct_option = user_data[user_id]["active_poll"]["correct"]
-    selected_option = poll_answer.option_ids[0] if poll_answer.option_ids else None
-    
-    user_data[user_id]["consecutive_skips"] = 0
-    
-    try:
-        if selected_option == correct_option:
-            user_data[user_id]["score"] += 1
-            await bot.send_message(
-                chat_id=user_id,
-                text="🎯 To‘g‘ri javob!"
-            )
-        else:
-            user_data[user_id]["wrong"] += 1
-            correct_answer = user_data[user_id]["active_poll"]["options"][correct_option]
-            await bot.send_message(
-                chat_id=user_id,
-                text=f"❌ Noto‘g‘ri! To‘g‘ri javob: {correct_answer}"
-            )
-    except Exception as e:
-        logger.error(f"Javobni qayta ishlashda xato (user_id={user_id}): {e}")
-    
-    # Keyingi savolni yuborish
-    await send_quiz_question(chat_id=user_id, state=state)
+    async with session_locks.get(user_id):
+        session = await get_session(user_id)
+        if session is None or session["poll_id"] != poll_id:
+            if ref is not None:
+                events.info("Kech javob e’tiborsiz qoldirildi", user_id=user_id, poll_id=poll_id, savol=ref.slot)
+            else:
+                logger.warning(f"Noto‘g‘ri user_id yoki poll_id: user_id={user_id}, poll_id={poll_id}")
+            return
+        session["poll_id"] = None  # Savol shu javob bilan hal qilindi
+        session["name"] = session.get("name") or poll_answer.user.full_name  # Kampaniya sessiyalarida ism yo‘q
+        chat_id = session["chat_id"] or user_id
+        state = session_state(user_id)
+        
+        # Timeout muddatini bekor qilish
+        if timers.cancel(user_id):
+            events.info("Timeout vazifasi javob tufayli bekor qilindi", user_id=user_id, poll_id=poll_id)
+        
+        bank = user_data[user_id]["bank"]
+        question_idx = user_data[user_id]["question_idx"]
+        correct_option = user_data[user_id]["permutation"].index(bank.correct(question_idx))
+        selected_option = poll_answer.option_ids[0] if poll_answer.option_ids else None
+        
+        user_data[user_id]["consecutive_skips"] = 0
+        
+        try:
+            if selected_option == correct_option:
+                user_data[user_id]["score"] += 1
+                record_answer(user_id, "correct")
+                report_result(user_id, chat_id, "correct", "🎯 To‘g‘ri javob!")
+            else:
+                user_data[user_id]["wrong"] += 1
+                correct_answer = bank.correct_text(question_idx)
+                record_answer(user_id, "wrong")
+                report_result(user_id, chat_id, "wrong", f"❌ Noto‘g‘ri! To‘g‘ri javob: {correct_answer}")
+        except Exception as e:
+            logger.error(f"Javobni qayta ishlashda xato (user_id={user_id}): {e}")
+        
+        # Keyingi savolni yuborish
+        await send_quiz_question(chat_id=chat_id, state=state, user_id=user_id)
 
 @dp.message(QuizStates.PAUSE)
 async def pause_choice(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
     choice = message.text
-    
-    if choice == "Davom ettirish":
-        user_data[user_id]["consecutive_skips"] = 0
-        await message.reply(
-            "▶️ Quiz davom ettirilmoqda...",
-            reply_markup=ReplyKeyboardRemove()
-        )
-        await send_quiz_question(chat_id=user_id, state=state)
-        await state.set_state(QuizStates.HANDLE_QUIZ)
-    elif choice == "Tugatish":
-        await show_results(chat_id=user_id, user_id=user_id)
-        user_data.pop(user_id, None)
-        await state.clear()
-    else:
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="Davom ettirish"), KeyboardButton(text="Tugatish")]
-            ],
-            resize_keyboard=True,
-            one_time_keyboard=True
-        )
-        await message.reply(
-            "❌ Iltimos, 'Davom ettirish' yoki 'Tugatish' ni tanlang!",
-            reply_markup=keyboard
-        )
+    async with session_locks.get(user_id):
+        if await get_session(user_id) is None:
+            await message.reply(
+                "❌ Iltimos, quizni /quiz buyrug‘i bilan boshlang!",
+                reply_markup=ReplyKeyboardRemove()
+            )
+            await state.clear()
+            return
+        
+        if choice == "Davom ettirish":
+            user_data[user_id]["consecutive_skips"] = 0
+            await message.reply(
+                "▶️ Quiz davom ettirilmoqda...",
+                reply_markup=ReplyKeyboardRemove()
+            )
+            await send_quiz_question(chat_id=message.chat.id, state=state, user_id=user_id)
+            await state.set_state(QuizStates.HANDLE_QUIZ)
+        elif choice == "Tugatish":
+            await show_results(chat_id=message.chat.id, user_id=user_id)
+            await end_session(user_id)
+            await state.clear()
+        else:
+            keyboard = ReplyKeyboardMarkup(
+                keyboard=[
+                    [KeyboardButton(text="Davom ettirish"), KeyboardButton(text="Tugatish")]
+                ],
+                resize_keyboard=True,
+                one_time_keyboard=True
+            )
+            await message.reply(
+                "❌ Iltimos, 'Davom ettirish' yoki 'Tugatish' ni tanlang!",
+                reply_markup=keyboard
+            )
 
 async def show_results(chat_id: int, user_id: int):
     score = user_data[user_id]["score"]
@@ -494,18 +873,30 @@ async def show_results(chat_id: int, user_id: int):
     skipped = user_data[user_id]["skipped"]
     total = user_data[user_id]["question_count"]
     mode = user_data[user_id]["mode"]
-    max_questions = MAX_QUESTIONS_RANDOM if mode == "Random" else MAX_QUESTIONS
+    bank = user_data[user_id]["bank"]
+    max_questions = max_questions_for(user_data[user_id])
     extra_info = ""
     if mode == "Tartibli":
         group_number = user_data[user_id]["group_number"]
         last_index = user_data[user_id]["start_index"] + total
         extra_info = f"\nGuruh: {group_number} ({user_data[user_id]['start_index'] + 1}-{last_index} savollar).\n"
-        next_group = group_number + 1 if last_index < len(QUESTIONS) else None
+        next_group = group_number + 1 if last_index < len(bank) else None
         if next_group:
-            extra_info += f"Keyingi sesiyada {next_group}-guruh ({last_index + 1}-{min(last_index + GROUP_SIZE, len(QUESTIONS))}) ni tanlashingiz mumkin."
+            extra_info += f"Keyingi sesiyada {next_group}-guruh ({last_index + 1}-{min(last_index + GROUP_SIZE, len(bank))}) ni tanlashingiz mumkin."
         else:
             extra_info += "Bu oxirgi guruh edi!"
-    await bot.send_message(
+    logger.info("Quiz yakunlandi", extra={"fields": {
+        "user_id": user_id, "bank": user_data[user_id]["bank_name"], "mode": mode,
+        "total": total, "score": score, "wrong": wrong, "skipped": skipped
+    }})
+    if total > 0:
+        board = board_key(user_data[user_id]["bank_name"], mode,
+                          user_data[user_id]["group_number"] if mode == "Tartibli" else None)
+        try:
+            await results.record(user_id, user_data[user_id].get("name"), board, total, score, wrong, skipped)
+        except Exception as e:
+            logger.error(f"Natijani saqlashda xato (user_id={user_id}): {e}")
+    await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
         chat_id=chat_id,
         text=(
             f"🏆 Quiz tugadi! (Rejim: {mode})\n"
@@ -522,40 +913,476 @@ async def show_results(chat_id: int, user_id: int):
 @dp.message(Command(commands=["cancel"]))
 async def cancel_command(message: types.Message, state: FSMContext):
     user_id = message.from_user.id
-    if user_id in user_data:
-        # Timeout vazifasini bekor qilish
-        if user_data[user_id]["timeout_task"] is not None:
-            user_data[user_id]["timeout_task"].cancel()
-            user_data[user_id]["timeout_task"] = None
-        await show_results(chat_id=user_id, user_id=user_id)
-        user_data.pop(user_id, None)
+    # Javob yoki timeout shu sessiya bilan ishlayotgan bo‘lsa, u tugashini kutamiz
+    async with session_locks.get(user_id):
+        if await get_session(user_id) is not None:
+            # Timeout muddatini bekor qilish
+            timers.cancel(user_id)
+            await show_results(chat_id=message.chat.id, user_id=user_id)
+            await end_session(user_id)
+        await state.clear()
     await message.reply(
         "⏹ Quiz bekor qilindi. Yana o‘ynash uchun /quiz buyrug‘ini yuboring!",
         reply_markup=ReplyKeyboardRemove()
     )
-    await state.clear()
+
+# /topic <so‘rov> - savol, variant va teglar bo‘yicha topilgan savollardan quiz
+@dp.message(Command(commands=["topic"]))
+async def topic_command(message: types.Message, state: FSMContext):
+    user_id = message.from_user.id
+    parts = (message.text or "").split(maxsplit=1)
+    query = parts[1].strip() if len(parts) > 1 else ""
+    if not query:
+        await message.reply("🔎 Foydalanish: /topic <mavzu>, masalan: /topic promise")
+        return
+    # Faqat xotiradagi banklar va foydalanuvchi tanlagan (yoki yagona) bank
+    # qidiriladi - /topic boshqa banklarni yuklab, faollarini chiqarib yubormasin
+    names = banks.names()
+    session = await get_session(user_id)
+    selected = (await state.get_data()).get("bank") or (session and session["bank_name"])
+    if selected not in names:
+        selected = names[0] if len(names) == 1 or not banks.loaded() else None
+    best = None
+    for name in dict.fromkeys([*banks.loaded(), *([selected] if selected else [])]):
+        bank = banks.peek(name, touch=False) or await banks.get(name)
+        found = bank.search_index().search(query, MAX_QUESTIONS_RANDOM)
+        if found and (best is None or len(found) > len(best[2])):
+            best = (name, bank, found)
+    if best is None:
+        await message.reply(f"❌ '{query}' bo‘yicha savollar topilmadi.")
+        return
+    bank_name, bank, found = best
+    banks.peek(bank_name)  # Tanlangan bank endi eng oxirgi ishlatilgan
+    async with session_locks.get(user_id):
+        timers.cancel(user_id)
+        user_data[user_id] = await new_session(user_id, message.chat.id, message.from_user.full_name,
+                                               bank_name, bank, "Mavzu", found)
+        await save_session(user_id)
+        await state.set_state(QuizStates.CHOOSE_TIME)
+    logger.info(f"Mavzu tanlandi: user_id={user_id}, query={query}, bank={bank_name}, savollar={len(found)}")
+    
+    keyboard = ReplyKeyboardMarkup(
+        keyboard=[
+            [KeyboardButton(text="5"), KeyboardButton(text="10"), KeyboardButton(text="15")],
+            [KeyboardButton(text="20"), KeyboardButton(text="30"), KeyboardButton(text="45")],
+            [KeyboardButton(text="60")]
+        ],
+        resize_keyboard=True,
+        one_time_keyboard=True
+    )
+    await message.reply(
+        f"🔎 '{query}' bo‘yicha {len(found)} ta savol topildi ({bank_name}).\n"
+        "Har bir savol uchun qancha vaqt kerak? (soniyalarda)",
+        reply_markup=keyboard
+    )
+
+@dp.message(Command(commands=["stats"]))
+async def stats_command(message: types.Message):
+    user_id = message.from_user.id
+    (sessions_count, total, score, wrong, skipped), last = await results.user_stats(user_id)
+    if sessions_count == 0:
+        await message.reply("📈 Hali yakunlangan quizlaringiz yo‘q. /quiz bilan boshlang!")
+        return
+    lines = [
+        "📈 Sizning statistikangiz:",
+        f"  - Sessiyalar: {sessions_count}",
+        f"  - Savollar: {total} (✅ {score}, ❌ {wrong}, ⏭ {skipped})",
+        f"  - Aniqlik: {score * 100 // max(total, 1)}%",
+        "Oxirgi natijalar:"
+    ]
+    for board, board_total, board_score, _, rank in last:
+        lines.append(f"  • {board}: {board_score}/{board_total} (reytingda #{rank})")
+    await message.reply("\n".join(lines))
+
+# /top [to‘plam] [rejim] [guruh] - eng yaxshi natijalar
+@dp.message(Command(commands=["top"]))
+async def top_command(message: types.Message):
+    names = banks.names()
+    bank_name, mode, group_number = names[0] if names else None, "Random", None
+    for arg in (message.text or "").split()[1:]:
+        if arg in names:
+            bank_name = arg
+        elif arg in ("Random", "Tartibli", "Takrorlash", "Kunlik"):
+            mode = arg
+        elif arg.isdigit():
+            group_number = int(arg)
+    if bank_name is None:
+        await message.reply("❌ Hozirda savollar mavjud emas.")
+        return
+    if mode == "Tartibli" and group_number is None:
+        group_number = 1
+    board = board_key(bank_name, mode, group_number if mode == "Tartibli" else None)
+    top = await results.top(board, 10)
+    if not top:
+        await message.reply(f"🏆 {board} bo‘yicha hali natijalar yo‘q.")
+        return
+    lines = [f"🏆 Top-{len(top)} ({board}):"]
+    for place, (_, score, total, _, name) in enumerate(top, 1):
+        lines.append(f"{place}. {name or 'Foydalanuvchi'} — {score}/{total}")
+    await message.reply("\n".join(lines))
+
+# /room [to‘plam] [savollar soni] [soniya] - guruhda hamma uchun bitta quiz:
+# har bir savolga bitta poll, javoblar umumiy natijalar xabarida yig‘iladi.
+# /room stop - quizni boshlagan foydalanuvchi yoki admin to‘xtatadi.
+@dp.message(Command(commands=["room"]))
+async def room_command(message: types.Message):
+    chat_id = message.chat.id
+    if message.chat.type not in ("group", "supergroup"):
+        await message.reply("👥 Guruh rejimi faqat guruh chatlarida ishlaydi. Botni guruhga qo‘shib, /room yuboring.")
+        return
+    if WEB_WORKERS > 1:
+        # Router javoblarni ovoz bergan foydalanuvchi bo‘yicha taqsimlaydi
+        await message.reply("❌ Guruh rejimi hozircha faqat bitta worker jarayoni bilan ishlaydi.")
+        return
+    args = (message.text or "").split()[1:]
+    room = rooms.get(chat_id)
+    if args[:1] == ["stop"]:
+        if room is None:
+            await message.reply("ℹ️ Bu guruhda faol quiz yo‘q.")
+        elif message.from_user.id != room.owner_id and message.from_user.id not in ADMIN_IDS:
+            await message.reply("❌ Quizni faqat uni boshlagan foydalanuvchi to‘xtata oladi.")
+        else:
+            await finish_room(room)
+        return
+    if room is not None:
+        await message.reply("⏳ Bu guruhda quiz davom etmoqda. To‘xtatish uchun: /room stop")
+        return
+    
+    names = banks.names()
+    bank_name = names[0] if names else None
+    numbers = [int(arg) for arg in args if arg.isdigit()]
+    for arg in args:
+        if arg in names:
+            bank_name = arg
+    if bank_name is None:
+        await message.reply("❌ Hozirda savollar mavjud emas.")
+        return
+    bank = await banks.get(bank_name)
+    count = numbers[0] if numbers else ROOM_QUESTIONS
+    time_limit = min(max(numbers[1] if len(numbers) > 1 else ROOM_TIME_LIMIT, 5), 600)  # open_period chegaralari
+    if count <= 0 or len(bank) == 0:
+        await message.reply("❌ Savollar soni noto‘g‘ri yoki to‘plam bo‘sh.")
+        return
+    
+    room = Room(chat_id, message.from_user.id, bank_name, bank,
+                random.sample(range(len(bank)), min(count, len(bank))), time_limit)
+    board = await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message,
+        chat_id=chat_id,
+        text=room.render("📊 Natijalar")
+    )
+    room.board_message_id = board.message_id
+    room.board = CoalescedEdit(ROOM_BOARD_INTERVAL, lambda: update_room_board(room))
+    rooms[chat_id] = room
+    logger.info(f"Guruh quizi boshlandi: chat_id={chat_id}, bank={bank_name}, "
+                f"savollar={len(room.questions)}, vaqt={time_limit}")
+    await send_room_question(room)
+
+async def update_room_board(room, title="📊 Natijalar"):
+    await outbound.call(room.chat_id, PRIORITY_FEEDBACK, bot.edit_message_text,
+        chat_id=room.chat_id,
+        message_id=room.board_message_id,
+        text=room.render(title)
+    )
+
+async def send_room_question(room):
+    if room.finished():
+        await finish_room(room)
+        return
+    bank = room.bank
+    question_idx = room.questions[room.position]
+    permutation = tuple(random.sample(range(bank.option_count(question_idx)), bank.option_count(question_idx)))
+    try:
+        with send_poll_seconds.time():
+            poll = await send_question_poll(room.chat_id, bank, question_idx, permutation,
+                                            f"❓ Savol {room.position + 1}/{len(room.questions)}: ", room.time_limit)
+    except Exception as e:
+        logger.error(f"Guruh savolini yuborishda xato (chat_id={room.chat_id}): {e}")
+        await finish_room(room)
+        return
+    room.open_question(poll.poll_id, question_idx, permutation.index(bank.correct(question_idx)))
+    polls.add(poll.poll_id, room.chat_id, room.chat_id, room.position)
+    room.board.touch()
+    # Yo‘lda kelayotgan javoblar uchun 1 soniya qo‘shimcha
+    timers.schedule(room.chat_id, room.time_limit + 1, handle_room_timeout, room, poll.poll_id)
+    events.info("Guruh polli yuborildi", chat_id=room.chat_id, poll_id=poll.poll_id, idx=question_idx)
+
+async def handle_room_timeout(room, poll_id):
+    if rooms.get(room.chat_id) is not room or room.poll_id != poll_id:
+        return
+    room.poll_id = None  # Kech javoblar hisoblanmaydi
+    await send_room_question(room)
+
+# Guruh polliga javob: faqat xotiradagi hisoblagichlar oshiriladi, natijalar
+# xabari esa CoalescedEdit orqali oraliq bilan yangilanadi
+def room_answer(room, poll_answer: types.PollAnswer):
+    if poll_answer.user is None:
+        return
+    selected_option = poll_answer.option_ids[0] if poll_answer.option_ids else None
+    result = room.answer(poll_answer.poll_id, poll_answer.user.id, poll_answer.user.full_name, selected_option)
+    if result is None:
+        events.info("Takroriy yoki kech guruh javobi e’tiborsiz qoldirildi",
+                    chat_id=room.chat_id, user_id=poll_answer.user.id, poll_id=poll_answer.poll_id)
+        return
+    room_answers.inc()
+    question_stats.record(room.bank_name, room.bank, room.question_idx, result)
+    room.board.touch()
+
+async def finish_room(room):
+    if rooms.get(room.chat_id) is not room:
+        return
+    del rooms[room.chat_id]
+    timers.cancel(room.chat_id)
+    room.poll_id = None
+    await room.board.close()
+    logger.info("Guruh quizi yakunlandi", extra={"fields": {
+        "chat_id": room.chat_id, "bank": room.bank_name, "questions": room.position,
+        "participants": len(room.answers), "board_edits": room.board.edits, "coalesced": room.board.coalesced
+    }})
+    try:
+        await outbound.call(room.chat_id, PRIORITY_CONTROL, bot.send_message,
+            chat_id=room.chat_id,
+            text=room.render("🏆 Guruh quizi tugadi!") + "\n\nYana o‘ynash uchun /room buyrug‘ini yuboring!"
+        )
+    except Exception as e:
+        logger.error(f"Guruh natijalarini yuborishda xato (chat_id={room.chat_id}): {e}")
+
+# Kampaniya obunachisiga kunlik quizni boshlash: sessiya /quiz dagi kabi
+# ochiladi va birinchi savol send_quiz_question orqali yuboriladi. Savollar
+# kampaniya va uning boshlanish vaqtidan tanlanadi - o‘sha kuni barcha
+# obunachilar bir xil savollarni oladi (reyting: /top Kunlik).
+async def start_campaign_quiz(user_id, campaign):
+    async with session_locks.get(user_id):
+        if await get_session(user_id) is not None:
+            return False  # Foydalanuvchi hozir boshqa quizda
+        if campaign.bank not in banks.names():
+            raise ValueError(f"to‘plam topilmadi: {campaign.bank}")
+        bank = await banks.get(campaign.bank)
+        questions = random.Random(f"{campaign.id}:{campaign.start_at}").sample(
+            range(len(bank)), min(campaign.questions, len(bank))
+        )
+        user_data[user_id] = await new_session(user_id, user_id, None, campaign.bank, bank, "Kunlik", questions)
+        user_data[user_id]["time_limit"] = campaign.time_limit
+        state = session_state(user_id)
+        await state.set_state(QuizStates.HANDLE_QUIZ)
+        delivered = False
+        try:
+            await send_quiz_question(chat_id=user_id, state=state, user_id=user_id)
+            delivered = user_id in user_data and user_data[user_id]["poll_id"] is not None
+        finally:
+            if not delivered:
+                await end_session(user_id)
+                await state.clear()
+    if not delivered:
+        raise RuntimeError("poll yuborilmadi")
+    return True
+
+async def report_campaign(campaign, report):
+    if campaign.owner_id:
+        outbound.post(campaign.owner_id, PRIORITY_CONTROL, bot.send_message,
+            chat_id=campaign.owner_id,
+            text=(
+                f"📣 Kampaniya #{campaign.id} yakunlandi:\n"
+                f"  - Yuborildi: {report.sent}\n"
+                f"  - Xato: {report.failed}\n"
+                f"  - O‘tkazildi (quizda band): {report.skipped}\n"
+                f"  - Davomiyligi: {report.elapsed:.0f} s, tezlik: {report.rate:.1f} ta/s"
+            )
+        )
+
+campaign_runner = CampaignRunner(campaign_store, start_campaign_quiz, CAMPAIGN_RATE, CAMPAIGN_CONCURRENCY,
+                                  on_report=report_campaign)
+metrics.gauge("quizbot_campaign_sent_total", "Kampaniyada boshlangan sessiyalar",
+              lambda: campaign_runner.sent, "counter")
+metrics.gauge("quizbot_campaign_failed_total", "Kampaniyada yuborilmagan sessiyalar",
+              lambda: campaign_runner.failed, "counter")
+
+@dp.message(Command(commands=["subscribe"]))
+async def subscribe_command(message: types.Message):
+    await campaign_store.subscribe(CAMPAIGN_LIST, message.from_user.id)
+    await message.reply("🔔 Kunlik quizga obuna bo‘ldingiz. Bekor qilish uchun: /unsubscribe")
+
+@dp.message(Command(commands=["unsubscribe"]))
+async def unsubscribe_command(message: types.Message):
+    await campaign_store.unsubscribe(CAMPAIGN_LIST, message.from_user.id)
+    await message.reply("🔕 Kunlik quiz obunasi bekor qilindi.")
+
+# /campaign HH:MM [to‘plam] [savollar soni] [soniya] [oyna, daqiqa] - har kuni
+# obunachilarga quiz; /campaign - ro‘yxat; /campaign stop <id>
+@dp.message(Command(commands=["campaign"]))
+async def campaign_command(message: types.Message):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    args = (message.text or "").split()[1:]
+    if not args:
+        subscribers = await campaign_store.count(CAMPAIGN_LIST)
+        lines = [f"📣 Obunachilar: {subscribers}"]
+        for campaign in await campaign_store.all():
+            lines.append(
+                f"#{campaign.id} [{campaign.status}] {datetime.fromtimestamp(campaign.start_at):%Y-%m-%d %H:%M}, "
+                f"{campaign.bank}, {campaign.questions} savol, oyna {campaign.window / 60:.0f} daq, "
+                f"yuborildi {campaign.sent}, xato {campaign.failed}"
+            )
+        await message.reply("\n".join(lines))
+        return
+    if args[0] == "stop":
+        deleted = len(args) > 1 and args[1].isdigit() and await campaign_store.delete(int(args[1]))
+        await message.reply("⏹ Kampaniya o‘chirildi." if deleted else "❌ Kampaniya topilmadi.")
+        return
+    if WEB_WORKERS > 1:
+        # Router poll javoblarini foydalanuvchi bo‘yicha taqsimlaydi
+        await message.reply("❌ Kampaniyalar hozircha faqat bitta worker jarayoni bilan ishlaydi.")
+        return
+    try:
+        at = datetime.strptime(args[0], "%H:%M")
+    except ValueError:
+        await message.reply("📣 Foydalanish: /campaign 09:00 [to‘plam] [savollar soni] [soniya] [oyna, daqiqa]")
+        return
+    names = banks.names()
+    bank_name = next((arg for arg in args[1:] if arg in names), names[0] if names else None)
+    if bank_name is None:
+        await message.reply("❌ Hozirda savollar mavjud emas.")
+        return
+    numbers = [int(arg) for arg in args[1:] if arg.isdigit()]
+    questions, time_limit, window = (numbers + [10, 30, 30][len(numbers):])[:3]  # Standart: 10 savol, 30 s, 30 daqiqa
+    now = datetime.now()
+    start_at = now.replace(hour=at.hour, minute=at.minute, second=0, microsecond=0)
+    if start_at <= now:
+        start_at += timedelta(days=1)
+    campaign_id = await campaign_store.create(
+        CAMPAIGN_LIST, bank_name, max(questions, 1), min(max(time_limit, 5), 600), start_at.timestamp(),
+        window * 60, 24 * 60 * 60, message.from_user.id
+    )
+    campaign_runner.wake()
+    subscribers = await campaign_store.count(CAMPAIGN_LIST)
+    await message.reply(
+        f"📣 Kampaniya #{campaign_id}: har kuni {start_at:%H:%M} da ({bank_name}), "
+        f"birinchi marta {start_at:%Y-%m-%d}. Obunachilar: {subscribers}."
+    )
+
+@dp.message(Command(commands=["reload"]))
+async def reload_command(message: types.Message):
+    if message.from_user.id not in ADMIN_IDS:
+        return
+    # Yangi bank fon oqimida tahlil qilinadi, boshlangan quizlar eski bankda davom etadi
+    reloaded = await banks.reload()
+    workers = ""
+    if WORKER_INDEX is not None:
+        # Har bir worker banklarni o‘zi yuklaydi - qolganlariga ham buyruq yuboriladi
+        others = [i for i in range(WEB_WORKERS) if i != int(WORKER_INDEX)]
+        answers = await broadcast([f"http://127.0.0.1:{WORKER_BASE_PORT + i}/reload/{BOT_TOKEN}" for i in others])
+        workers = f"\nWorkerlar: {1 + sum(answer is not None for answer in answers)}/{WEB_WORKERS}."
+    await message.reply(
+        f"🔄 Qayta yuklandi: {', '.join(reloaded) if reloaded else 'hech narsa'}.\n"
+        f"Mavjud to‘plamlar: {', '.join(banks.names()) or 'yo‘q'}.{workers}"
+    )
+
+# Boshqa workerdan kelgan /reload buyrug‘i (faqat 127.0.0.1 da tinglanadi)
+async def reload_handler(request):
+    reloaded = await banks.reload()
+    return web.json_response({"worker": int(WORKER_INDEX), "reloaded": reloaded})
+
+banks_watch_task = None
+metrics_runner = None
 
 async def on_startup():
+    global banks_watch_task, metrics_runner
+    if METRICS_PORT:
+        port = METRICS_PORT if WORKER_INDEX is None else METRICS_PORT + 1 + int(WORKER_INDEX)
+        try:
+            metrics_runner = await metrics.serve(METRICS_HOST, port)
+            logger.info(f"Metrikalar: http://{METRICS_HOST}:{port}/metrics")
+        except OSError as e:
+            logger.error(f"Metrikalar portini ochib bo‘lmadi ({METRICS_HOST}:{port}): {e}")
+    if BANKS_WATCH_INTERVAL > 0:
+        banks_watch_task = asyncio.create_task(banks.watch(BANKS_WATCH_INTERVAL))
+    if ingest is not None:
+        ingest.start()
+    if WEB_WORKERS == 1:
+        # Kampaniya sessiyalari ochilgan jarayonda qoladi, javoblar esa router
+        # orqali boshqa workerlarga tushadi - kampaniyalar faqat bitta jarayonda
+        campaign_runner.start()
+    if WORKER_INDEX is not None:
+        # Workerlarda webhookni router o‘rnatadi
+        return
     # Webhook o'rnatish
     webhook_url = f"{os.getenv('WEBHOOK_HOST')}/webhook/{BOT_TOKEN}"
     await bot.set_webhook(webhook_url)
     logger.info(f"Webhook set to {webhook_url}")
 
 async def on_shutdown():
+    if ingest is not None:
+        await ingest.close()
+        logger.info(f"Update navbati: {ingest.stats()}")
+    if banks_watch_task is not None:
+        banks_watch_task.cancel()
+    await campaign_runner.close()
+    for room in list(rooms.values()):
+        await finish_room(room)
+    timers.close()
+    outbound.close()
+    if BOT_HTTP_TRACE:
+        logger.info(f"Bot API ulanishlar puli: {bot.session.pool_stats.snapshot()}")
+    await dp.storage.close()
+    await sessions.close()
+    for user_id in list(user_data):
+        await save_deck(user_id)
+    await reviews.close()
+    await question_stats.close()
+    await results.close()
+    await campaign_store.close()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
     # Webhookni o'chirish
-    await bot.delete_webhook()
+    if WORKER_INDEX is None:
+        await bot.delete_webhook()
     await bot.session.close()
     logger.info("Webhook deleted and session closed")
 
+# Router rejimi: Telegram updatelarni qabul qilib, foydalanuvchi id bo‘yicha
+# WEB_WORKERS ta worker jarayonidan biriga yo‘naltiradi
+def run_router():
+    path = f"/webhook/{BOT_TOKEN}"
+    processes = spawn_workers(os.path.abspath(__file__), WEB_WORKERS, WORKER_BASE_PORT)
+    app = create_router_app(
+        path, [f"http://127.0.0.1:{WORKER_BASE_PORT + i}{path}" for i in range(WEB_WORKERS)]
+    )
+
+    async def router_startup(app):
+        webhook_url = f"{os.getenv('WEBHOOK_HOST')}{path}"
+        await bot.set_webhook(webhook_url)
+        logger.info(f"Webhook set to {webhook_url} ({WEB_WORKERS} ta worker)")
+
+    async def router_shutdown(app):
+        await bot.delete_webhook()
+        await bot.session.close()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        logger.info("Webhook deleted, workers stopped")
+
+    app.on_startup.append(router_startup)
+    app.on_shutdown.append(router_shutdown)
+    web.run_app(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
+
 def main():
+    if WORKER_INDEX is None and WEB_WORKERS > 1:
+        run_router()
+        return
     # Webhook serverini sozlash
     app = web.Application()
-    webhook_requests_handler = SimpleRequestHandler(
-        dispatcher=dp,
-        bot=bot,
-        secret_token=""
-    )
-    webhook_requests_handler.register(app, path=f"/webhook/{BOT_TOKEN}")
+    if ingest is not None:
+        # Telegramga darhol javob qaytariladi, update navbatda qayta ishlanadi
+        ingest.register(app, path=f"/webhook/{BOT_TOKEN}")
+    else:
+        webhook_requests_handler = SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=""
+        )
+        webhook_requests_handler.register(app, path=f"/webhook/{BOT_TOKEN}")
+    if WORKER_INDEX is not None:
+        app.router.add_post(f"/reload/{BOT_TOKEN}", reload_handler)
     setup_application(app, dp, bot=bot)
     
     # Startup va shutdown funksiyalarini bog'lash
@@ -563,7 +1390,9 @@ def main():
     dp.shutdown.register(on_shutdown)
     
     # Serverni ishga tushirish
-    web.run_app(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
+    # Worker faqat routerdan keladigan so‘rovlarni qabul qiladi
+    host = "127.0.0.1" if WORKER_INDEX is not None else "0.0.0.0"
+    web.run_app(app, host=host, port=int(os.getenv("PORT", 8000)))
 
 if __name__ == "__main__":
     main()  # asyncio.run ni olib tashladik, chunki web.run_app o‘z event loop’ni boshqaradi
\ No newline at end of file
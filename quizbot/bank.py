@@ -0,0 +1,397 @@
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# Kompilyatsiya qilingan bank fayli: sarlavha, keyin savol/variant massivlari
+# va oxirida "\0" bilan ajratilgan UTF-8 satrlar jadvali. Massivlar mmap
+# orqali nusxa olinmasdan o‘qiladi.
+CACHE_SUFFIX = ".qbank"
+CACHE_MAGIC = b"QZBK"
+CACHE_VERSION = 2
+CACHE_HEADER = struct.Struct("<4sHBxqq32sIIIII")
+BYTEORDER = 0 if sys.byteorder == "little" else 1
+
+QUESTION_SEPARATOR = "+++++"
+OPTION_SEPARATOR = "===="
+TAG_PREFIX = "@"  # Savol matnidan keyin, birinchi "====" dan oldin: "@closures @promises"
+OPTIONS_PER_QUESTION = 4
+READ_BUFFER_SIZE = 1 << 16
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    line: int
+    message: str
+    level: str = "warning"  # "warning" - savol saqlanadi, "error" - savol tashlab yuboriladi
+
+    def __str__(self):
+        return f"{self.line}: {self.level}: {self.message}"
+
+
+def _finish_question(question, diagnostics):
+    problems = []
+    if len(question["options"]) != OPTIONS_PER_QUESTION:
+        problems.append(f"{OPTIONS_PER_QUESTION} ta variant kutilgan, {len(question['options'])} ta topildi")
+    if question["correct"] is None:
+        problems.append("to‘g‘ri javob (#) belgilanmagan")
+    if problems:
+        if diagnostics is not None:
+            diagnostics.append(Diagnostic(question["line"], "; ".join(problems), "error"))
+        return None
+    return question
+
+
+def parse_tags(line):
+    return [tag.lower() for tag in line.replace(",", " ").replace(TAG_PREFIX, " ").split()]
+
+
+# Savollarni satrma-satr o‘qib, har bir to‘g‘ri savolni darhol qaytaradi.
+# Xotirada faqat joriy savol turadi; topilgan muammolar diagnostics ro‘yxatiga
+# qator raqami bilan yoziladi.
+def iter_questions(lines, diagnostics=None):
+    current_question = None
+    options_started = False
+    line_number = 0
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line == QUESTION_SEPARATOR:
+            if current_question is not None:
+                question = _finish_question(current_question, diagnostics)
+                if question is not None:
+                    yield question
+            elif diagnostics is not None:
+                diagnostics.append(Diagnostic(line_number, "bo‘sh savol bloki"))
+            current_question = None
+        elif line == OPTION_SEPARATOR:
+            if current_question is not None:
+                options_started = True
+        elif current_question is None:  # Savol matni
+            current_question = {"question": line, "options": [], "correct": None, "tags": [], "line": line_number}
+            options_started = False
+        elif line.startswith(TAG_PREFIX) and not options_started:  # Teglar
+            current_question["tags"].extend(parse_tags(line))
+        else:  # Javob variantlari
+            cleaned_line = line.strip('"')
+            if line.startswith("#"):
+                cleaned_line = cleaned_line[1:] if cleaned_line.startswith("#") else cleaned_line
+            if not cleaned_line:
+                if diagnostics is not None:
+                    diagnostics.append(Diagnostic(line_number, "bo‘sh variant o‘tkazib yuborildi"))
+                continue
+            current_question["options"].append(cleaned_line)
+            if line.startswith("#"):
+                if current_question["correct"] is not None and diagnostics is not None:
+                    diagnostics.append(Diagnostic(line_number, "bir nechta to‘g‘ri javob belgilangan, oxirgisi olinadi"))
+                current_question["correct"] = len(current_question["options"]) - 1
+    # Oxirgi savolni qo‘shish
+    if current_question is not None:
+        question = _finish_question(current_question, diagnostics)
+        if question is not None:
+            yield question
+    elif line_number == 0 and diagnostics is not None:
+        diagnostics.append(Diagnostic(0, "fayl bo‘sh", "error"))
+
+
+def parse_file(path, diagnostics=None):
+    with open(path, "r", encoding="utf-8", buffering=READ_BUFFER_SIZE) as file:
+        yield from iter_questions(file, diagnostics)
+
+
+# Faylni to‘g‘ridan-to‘g‘ri kompilyatsiya qilingan bankka aylantirish;
+# xatolar log qilinadi va bo‘sh bank qaytariladi. prepare(path, questions)
+# savollar ro‘yxatini bankka yozishdan oldin o‘zgartirishi mumkin.
+def compile_file(path, prepare=None):
+    diagnostics = []
+    try:
+        questions = parse_file(path, diagnostics)
+        if prepare is not None:
+            questions = prepare(path, list(questions))
+        bank = QuestionBank.from_questions(questions)
+    except FileNotFoundError:
+        logger.error(f"Fayl topilmadi: {path}")
+        return QuestionBank.from_questions([])
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error(f"Faylni o‘qishda xato: {path} ({e})")
+        return QuestionBank.from_questions([])
+    for diagnostic in diagnostics:
+        log = logger.error if diagnostic.level == "error" else logger.warning
+        log(f"{path}:{diagnostic}")
+    logger.info(f"Yuklangan savollar soni: {len(bank)} ({path})")
+    return bank
+
+
+# Savollar banki: barcha matnlar bitta intern qilingan satrlar jadvalida,
+# savollar va variantlar esa shu jadvalga ko‘rsatuvchi massivlarda saqlanadi.
+# Bank yaratilgandan keyin o‘zgarmaydi, shuning uchun bir nechta sessiya
+# uni bemalol bo‘lishib ishlatadi; har bir sessiya faqat o‘z permutatsiyasini
+# saqlaydi.
+class QuestionBank:
+    __slots__ = ("_strings", "_question_ids", "_option_offsets", "_option_ids", "_correct",
+                 "_tag_offsets", "_tag_ids", "_search", "_keys", "_layout", "__weakref__")
+
+    def __init__(self, strings, question_ids, option_offsets, option_ids, correct, tag_offsets, tag_ids):
+        object.__setattr__(self, "_strings", tuple(strings))
+        object.__setattr__(self, "_question_ids", question_ids)
+        object.__setattr__(self, "_option_offsets", option_offsets)
+        object.__setattr__(self, "_option_ids", option_ids)
+        object.__setattr__(self, "_correct", correct)
+        object.__setattr__(self, "_tag_offsets", tag_offsets)
+        object.__setattr__(self, "_tag_ids", tag_ids)
+        object.__setattr__(self, "_search", None)
+        object.__setattr__(self, "_keys", None)
+        object.__setattr__(self, "_layout", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QuestionBank o‘zgarmas")
+
+    def __delattr__(self, name):
+        raise AttributeError("QuestionBank o‘zgarmas")
+
+    @classmethod
+    def from_questions(cls, questions):
+        strings = []
+        string_ids = {}
+        question_ids = array("I")
+        option_offsets = array("I", [0])
+        option_ids = array("I")
+        correct = array("B")
+        tag_offsets = array("I", [0])
+        tag_ids = array("I")
+
+        def intern(text):
+            text = sys.intern(text)
+            string_id = string_ids.get(text)
+            if string_id is None:
+                string_id = string_ids[text] = len(strings)
+                strings.append(text)
+            return string_id
+
+        for question in questions:
+            question_ids.append(intern(question["question"]))
+            for option in question["options"]:
+                option_ids.append(intern(option))
+            option_offsets.append(len(option_ids))
+            correct.append(question["correct"])
+            for tag in question.get("tags", ()):
+                tag_ids.append(intern(tag))
+            tag_offsets.append(len(tag_ids))
+        return cls(strings, question_ids, option_offsets, option_ids, correct, tag_offsets, tag_ids)
+
+    def __len__(self):
+        return len(self._question_ids)
+
+    def question(self, index):
+        return self._strings[self._question_ids[index]]
+
+    def options(self, index):
+        start, end = self._option_offsets[index], self._option_offsets[index + 1]
+        return tuple(self._strings[i] for i in self._option_ids[start:end])
+
+    def option_count(self, index):
+        return self._option_offsets[index + 1] - self._option_offsets[index]
+
+    def correct(self, index):
+        return self._correct[index]
+
+    def tags(self, index):
+        start, end = self._tag_offsets[index], self._tag_offsets[index + 1]
+        return tuple(self._strings[i] for i in self._tag_ids[start:end])
+
+    # Mavzu bo‘yicha qidiruv indeksi: bir marta quriladi va bank bilan birga
+    # turadi (bank qayta yuklanganda yoki LRU dan chiqqanda u ham ketadi)
+    def search_index(self):
+        if self._search is None:
+            from quizbot.search import SearchIndex
+            object.__setattr__(self, "_search", SearchIndex.build(self))
+        return self._search
+
+    # Savollarning barqaror kalitlari: savol matni, variantlar va to‘g‘ri javob
+    # raqamidan 64 bitli xesh. Bank qayta yuklanib yoki dublikatlardan
+    # tozalanib savollar surilsa ham kalit o‘zgarmaydi, shuning uchun saqlanadigan
+    # holat (statistika, takrorlash) pozitsiyaga emas, shu kalitga bog‘lanadi.
+    def keys(self):
+        if self._keys is None:
+            keys = array("q")
+            for index in range(len(self)):
+                text = "\0".join((self.question(index), *self.options(index), str(self._correct[index])))
+                keys.append(int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(),
+                                            "little", signed=True))
+            object.__setattr__(self, "_keys", keys)
+        return self._keys
+
+    # Kalitlar tartibining xeshi: bir xil bo‘lsa pozitsiyalar ham mos keladi
+    def layout(self):
+        if self._layout is None:
+            object.__setattr__(self, "_layout", hashlib.blake2b(self.keys().tobytes(), digest_size=16).digest())
+        return self._layout
+
+    def correct_text(self, index):
+        return self._strings[self._option_ids[self._option_offsets[index] + self._correct[index]]]
+
+    # Sessiya permutatsiyasi bo‘yicha variantlarni joylashtirish:
+    # permutation[k] - k-o‘rinda ko‘rsatiladigan asl variant indeksi.
+    def arrange(self, index, permutation):
+        options = self.options(index)
+        return [options[i] for i in permutation], permutation.index(self._correct[index])
+
+    # Bankning xotiradagi taxminiy hajmi (baytlarda), LRU byudjeti uchun
+    def nbytes(self):
+        return sum(sys.getsizeof(text) for text in self._strings) + sum(
+            memoryview(values).nbytes for values in self._arrays()
+        ) + (self._search.nbytes() if self._search is not None else 0) + (
+            memoryview(self._keys).nbytes if self._keys is not None else 0
+        )
+
+    def _arrays(self):
+        # 1 baytli massiv oxirida - qolganlari mmap ichida 4 baytga tekislangan
+        return (self._question_ids, self._option_offsets, self._option_ids,
+                self._tag_offsets, self._tag_ids, self._correct)
+
+    def save(self, path, mtime_ns, size, digest):
+        if any("\0" in text for text in self._strings):
+            raise ValueError("Satrlarda \\0 belgisi bor, keshga yozib bo‘lmaydi")
+        blob = "\0".join(self._strings).encode("utf-8")
+        header = CACHE_HEADER.pack(
+            CACHE_MAGIC, CACHE_VERSION, BYTEORDER, mtime_ns, size, digest,
+            len(self._strings), len(self), len(self._option_ids), len(self._tag_ids), len(blob)
+        )
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(header)
+            for values in self._arrays():
+                file.write(bytes(values))
+            file.write(blob)
+        os.replace(tmp_path, path)  # Boshqa jarayonlar yarim yozilgan faylni ko‘rmasligi uchun
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        magic, version, byteorder, _, _, _, n_strings, n_questions, n_options, n_tags, blob_len = \
+            CACHE_HEADER.unpack_from(buffer)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or byteorder != BYTEORDER:
+            raise ValueError("Kesh formati mos emas")
+        view = memoryview(buffer)
+        offset = CACHE_HEADER.size
+        arrays = []
+        for count, itemsize, code in (
+            (n_questions, 4, "I"), (n_questions + 1, 4, "I"), (n_options, 4, "I"),
+            (n_questions + 1, 4, "I"), (n_tags, 4, "I"), (n_questions, 1, "B")
+        ):
+            arrays.append(view[offset:offset + count * itemsize].cast(code))
+            offset += count * itemsize
+        strings = str(view[offset:offset + blob_len], "utf-8").split("\0") if n_strings else []
+        if len(strings) != n_strings:
+            raise ValueError("Kesh satrlar jadvali buzilgan")
+        question_ids, option_offsets, option_ids, tag_offsets, tag_ids, correct = arrays
+        return cls(strings, question_ids, option_offsets, option_ids, correct, tag_offsets, tag_ids)
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def cache_path_for(path, suffix=CACHE_SUFFIX):
+    return os.path.splitext(path)[0] + suffix
+
+
+def _map_cache(cache_path):
+    with open(cache_path, "rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    return buffer, CACHE_HEADER.unpack_from(buffer)
+
+
+# Bankni kompilyatsiya qilingan keshdan yuklash, kesh eskirgan bo‘lsa
+# matnli faylni qayta tahlil qilib keshni yangilash. Fayl o‘zgarish vaqti
+# farq qilsa ham mazmun xeshi bir xil bo‘lsa, kesh qayta ishlatiladi.
+def load_bank(path, compile=compile_file, cache_suffix=CACHE_SUFFIX):
+    try:
+        source_stat = os.stat(path)
+    except OSError:
+        return compile(path)
+
+    cache_path = cache_path_for(path, cache_suffix)
+    digest = None
+    try:
+        buffer, header = _map_cache(cache_path)
+        mtime_ns, size, cached_digest = header[3], header[4], header[5]
+        if size == source_stat.st_size:
+            if mtime_ns == source_stat.st_mtime_ns:
+                bank = QuestionBank.from_buffer(buffer)
+                logger.info(f"Savollar keshdan yuklandi: {cache_path} ({len(bank)} ta savol)")
+                return bank
+            digest = _file_digest(path)
+            if digest == cached_digest:
+                bank = QuestionBank.from_buffer(buffer)
+                logger.info(f"Savollar keshdan yuklandi, fayl mazmuni o‘zgarmagan: {cache_path} ({len(bank)} ta savol)")
+                _write_cache(bank, cache_path, source_stat, digest)
+                return bank
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"Kesh fayli yaroqsiz, qayta tuziladi: {cache_path} ({e})")
+
+    bank = compile(path)
+    if len(bank):
+        _write_cache(bank, cache_path, source_stat, digest or _file_digest(path))
+    return bank
+
+
+def _write_cache(bank, cache_path, source_stat, digest):
+    try:
+        bank.save(cache_path, source_stat.st_mtime_ns, source_stat.st_size, digest)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Keshni yozib bo‘lmadi: {cache_path} ({e})")
+
+
+def _check(paths):
+    failed = False
+    for path in paths:
+        diagnostics = []
+        try:
+            count = sum(1 for _ in parse_file(path, diagnostics))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"{path}: error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        for diagnostic in diagnostics:
+            print(f"{path}:{diagnostic}")
+        errors = sum(1 for diagnostic in diagnostics if diagnostic.level == "error")
+        print(f"{path}: {count} ta savol, {errors} ta xato, {len(diagnostics) - errors} ta ogohlantirish")
+        failed = failed or errors > 0
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quizbot.bank")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="savollar faylini botni ishga tushirmasdan tekshirish")
+    check.add_argument("files", nargs="+", metavar="FILE")
+    dedup = commands.add_parser("dedup", help="takroriy (deyarli bir xil) savollarni topish va "
+                                              "ularsiz kompilyatsiya qilingan bank yozish")
+    dedup.add_argument("files", nargs="+", metavar="FILE")
+    dedup.add_argument("--threshold", type=float, default=None, help="o‘xshashlik chegarasi (0-1)")
+    dedup.add_argument("--workers", type=int, default=None, help="MinHash uchun jarayonlar soni")
+    dedup.add_argument("--dry-run", action="store_true", help="faqat hisobot, bank yozilmaydi")
+    args = parser.parse_args(argv)
+    if args.command == "check":
+        return _check(args.files)
+    if args.command == "dedup":
+        from quizbot.duplicates import dedup_files
+        return dedup_files(args.files, args.threshold, args.workers, args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
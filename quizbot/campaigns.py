@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+Campaign = namedtuple("Campaign", (
+    "id", "list", "bank", "questions", "time_limit", "start_at", "window", "every", "owner_id",
+    "status", "cursor", "sent", "failed", "skipped", "started_at", "finished_at"
+))
+CampaignReport = namedtuple("CampaignReport", ("campaign_id", "sent", "failed", "skipped", "elapsed", "rate"))
+
+
+# Obunachilar ro‘yxatlari va kampaniyalar (SQLite). Obunachilar user_id
+# bo‘yicha tartibda o‘qiladi, shuning uchun kampaniyaning tekshiruv nuqtasi
+# (cursor) - oxirgi to‘liq yuborilgan partiyadagi eng katta user_id.
+class CampaignStore:
+    def __init__(self, path):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="campaigns-sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS subscribers (
+                list TEXT NOT NULL, user_id INTEGER NOT NULL, subscribed_at REAL NOT NULL,
+                PRIMARY KEY (list, user_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS campaigns (
+                id INTEGER PRIMARY KEY, list TEXT NOT NULL, bank TEXT NOT NULL, questions INTEGER NOT NULL,
+                time_limit INTEGER NOT NULL, start_at REAL NOT NULL, window REAL NOT NULL, every REAL NOT NULL,
+                owner_id INTEGER, status TEXT NOT NULL, cursor INTEGER NOT NULL DEFAULT 0,
+                sent INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0, started_at REAL, finished_at REAL
+            );
+        """)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def subscribe(self, list_name, user_id):
+        await self.run(self._db.execute,
+                       "INSERT OR IGNORE INTO subscribers (list, user_id, subscribed_at) VALUES (?, ?, ?)",
+                       (list_name, user_id, time.time()))
+
+    async def unsubscribe(self, list_name, user_id):
+        await self.run(self._db.execute, "DELETE FROM subscribers WHERE list = ? AND user_id = ?",
+                       (list_name, user_id))
+
+    def _count(self, list_name, after):
+        return self._db.execute("SELECT COUNT(*) FROM subscribers WHERE list = ? AND user_id > ?",
+                                (list_name, after)).fetchone()[0]
+
+    async def count(self, list_name, after=0):
+        return await self.run(self._count, list_name, after)
+
+    def _batch(self, list_name, after, limit):
+        return [row[0] for row in self._db.execute(
+            "SELECT user_id FROM subscribers WHERE list = ? AND user_id > ? ORDER BY user_id LIMIT ?",
+            (list_name, after, limit)
+        )]
+
+    async def batch(self, list_name, after, limit):
+        return await self.run(self._batch, list_name, after, limit)
+
+    def _create(self, list_name, bank, questions, time_limit, start_at, window, every, owner_id):
+        return self._db.execute(
+            "INSERT INTO campaigns (list, bank, questions, time_limit, start_at, window, every, owner_id, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'scheduled')",
+            (list_name, bank, questions, time_limit, start_at, window, every, owner_id)
+        ).lastrowid
+
+    async def create(self, list_name, bank, questions, time_limit, start_at, window=0, every=0, owner_id=None):
+        return await self.run(self._create, list_name, bank, questions, time_limit, start_at, window, every, owner_id)
+
+    def _select(self, where, args):
+        return [Campaign(*row) for row in self._db.execute(
+            f"SELECT {', '.join(Campaign._fields)} FROM campaigns {where} ORDER BY start_at", args
+        )]
+
+    # Uzilib qolgan (running) kampaniyalar ham qaytariladi - ular tekshiruv nuqtasidan davom etadi
+    async def due(self, now):
+        return await self.run(self._select, "WHERE status = 'running' OR (status = 'scheduled' AND start_at <= ?)",
+                              (now,))
+
+    async def all(self):
+        return await self.run(self._select, "WHERE status != 'deleted'", ())
+
+    async def start(self, campaign_id):
+        await self.run(self._db.execute,
+                       "UPDATE campaigns SET status = 'running', started_at = ? WHERE id = ? AND status = 'scheduled'",
+                       (time.time(), campaign_id))
+
+    def _status(self, campaign_id):
+        row = self._db.execute("SELECT status FROM campaigns WHERE id = ?", (campaign_id,)).fetchone()
+        return row[0] if row else None
+
+    async def status(self, campaign_id):
+        return await self.run(self._status, campaign_id)
+
+    async def checkpoint(self, campaign_id, cursor, sent, failed, skipped):
+        await self.run(self._db.execute,
+                       "UPDATE campaigns SET cursor = ?, sent = ?, failed = ?, skipped = ? WHERE id = ?",
+                       (cursor, sent, failed, skipped, campaign_id))
+
+    # Yakunlangan kampaniya: takrorlanadigan bo‘lsa keyingi vaqtga qayta rejalashtiriladi.
+    # Yuborish paytida o‘chirilgan kampaniya o‘chirilganligicha qoladi.
+    async def finish(self, campaign, next_start=None):
+        if next_start is None:
+            await self.run(self._db.execute,
+                           "UPDATE campaigns SET status = 'done', finished_at = ? WHERE id = ? AND status != 'deleted'",
+                           (time.time(), campaign.id))
+        else:
+            await self.run(self._db.execute,
+                           "UPDATE campaigns SET status = 'scheduled', start_at = ?, cursor = 0, sent = 0, "
+                           "failed = 0, skipped = 0, finished_at = ? WHERE id = ? AND status != 'deleted'",
+                           (next_start, time.time(), campaign.id))
+
+    async def delete(self, campaign_id):
+        cursor = await self.run(self._db.execute,
+                                "UPDATE campaigns SET status = 'deleted' WHERE id = ? AND status != 'deleted'",
+                                (campaign_id,))
+        return cursor.rowcount > 0
+
+    async def close(self):
+        await self.run(self._db.close)
+        self._executor.shutdown()
+
+
+# Rejalashtiruvchi va bir tekis tarqatuvchi: muddati kelgan kampaniya
+# obunachilariga start(user_id, campaign) orqali sessiya ochadi. Boshlashlar
+# window soniyaga yoyiladi, lekin soniyasiga max_rate tadan oshmaydi (har bir
+# partiyadan keyin qolgan vaqtga qarab qayta hisoblanadi); bir vaqtda ko‘pi
+# bilan concurrency ta boshlash kutiladi. Har bir partiyadan keyin tekshiruv
+# nuqtasi yoziladi - qayta ishga tushgandan keyin ko‘pi bilan bitta partiya
+# takrorlanadi. Kampaniya holati har bir partiyadan oldin va partiya ichida
+# status_interval soniyada bir marta qayta o‘qiladi: to‘xtatilgan (/campaign
+# stop) kampaniyaga yangi boshlashlar yuborilmaydi. start True (yuborildi),
+# False (o‘tkazildi) qaytaradi yoki xato ko‘taradi. Muddati kelgan har bir
+# kampaniya alohida vazifada yuboriladi; concurrency chegarasi hammasiga umumiy.
+class CampaignRunner:
+    def __init__(self, store, start, max_rate=20, concurrency=50, batch_size=500, poll_interval=30,
+                 on_report=None, status_interval=1.0):
+        self.store = store
+        self.max_rate = max_rate
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.status_interval = status_interval
+        self.sent = 0
+        self.failed = 0
+        self._start = start
+        self._on_report = on_report
+        self._task = None
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._deliveries = {}  # campaign.id -> yuborish vazifasi
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    # Yangi kampaniya qo‘shilganda rejalashtiruvchini darhol uyg‘otish
+    def wake(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                for campaign in await self.store.due(time.time()):
+                    # due() yuborilayotgan (running) kampaniyalarni ham qaytaradi
+                    if campaign.id not in self._deliveries:
+                        task = asyncio.create_task(self._deliver(campaign))
+                        self._deliveries[campaign.id] = task
+                        task.add_done_callback(lambda _, campaign_id=campaign.id: self._deliveries.pop(campaign_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Kampaniyalarni bajarishda xato: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, campaign):
+        try:
+            await self.deliver(campaign)
+        except Exception as e:
+            logger.error(f"Kampaniya #{campaign.id} ni bajarishda xato: {e}")
+
+    async def deliver(self, campaign):
+        loop = asyncio.get_running_loop()
+        await self.store.start(campaign.id)
+        cursor, sent, failed, skipped = campaign.cursor, campaign.sent, campaign.failed, campaign.skipped
+        remaining = await self.store.count(campaign.list, cursor)
+        logger.info(f"Kampaniya #{campaign.id} boshlandi: ro‘yxat={campaign.list}, qolgan={remaining}, "
+                    f"tekshiruv nuqtasi={cursor}")
+        started = loop.time()
+        deadline = max(campaign.start_at + campaign.window - time.time(), 0) + started
+        slots = self._slots
+
+        async def start_one(user_id):
+            try:
+                return await self._start(user_id, campaign)
+            except Exception as e:
+                logger.warning(f"Kampaniya #{campaign.id}: user_id={user_id} ga yuborilmadi ({e})")
+                return None
+            finally:
+                slots.release()
+
+        stopped = False
+        while not stopped:
+            batch = await self.store.batch(campaign.list, cursor, self.batch_size)
+            if not batch:
+                break
+            time_left = deadline - loop.time()
+            rate = min(self.max_rate, remaining / time_left) if time_left > 0 else self.max_rate
+            interval = 1 / rate if rate > 0 else 0
+            next_at = loop.time()
+            next_check = loop.time()  # Har bir partiyadan oldin
+            tasks = []
+            for user_id in batch:
+                delay = next_at - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_at += interval
+                if loop.time() >= next_check:
+                    if await self.store.status(campaign.id) != "running":
+                        stopped = True
+                        break
+                    next_check = loop.time() + self.status_interval
+                await slots.acquire()
+                tasks.append(loop.create_task(start_one(user_id)))
+            results = await asyncio.gather(*tasks)
+            if not results:
+                break
+            batch_sent, batch_failed = results.count(True), results.count(None)
+            sent, failed, skipped = sent + batch_sent, failed + batch_failed, skipped + results.count(False)
+            self.sent += batch_sent
+            self.failed += batch_failed
+            cursor = batch[len(results) - 1]
+            remaining -= len(results)
+            await self.store.checkpoint(campaign.id, cursor, sent, failed, skipped)
+
+        if stopped:
+            logger.info(f"Kampaniya #{campaign.id} to‘xtatildi: yuborildi={sent}, xato={failed}")
+            return None
+
+        elapsed = loop.time() - started
+        attempted = sent + failed - campaign.sent - campaign.failed  # Shu ishga tushirishda
+        report = CampaignReport(campaign.id, sent, failed, skipped, elapsed,
+                                attempted / elapsed if elapsed > 0 else 0.0)
+        next_start = None
+        if campaign.every > 0:
+            next_start = campaign.start_at + campaign.every
+            while next_start <= time.time():
+                next_start += campaign.every
+        await self.store.finish(campaign, next_start)
+        logger.info(f"Kampaniya #{campaign.id} yakunlandi", extra={"fields": report._asdict()})
+        if self._on_report is not None:
+            await self._on_report(campaign, report)
+        return report
+
+    async def close(self):
+        tasks = [self._task] if self._task is not None else []
+        tasks += self._deliveries.values()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
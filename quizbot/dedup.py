@@ -0,0 +1,42 @@
+import asyncio
+import time
+import weakref
+
+from quizbot.ttl import TTLMap
+
+
+# Yaqinda ko‘rilgan kalitlar (update_id, (user_id, poll_id)) oynasi. Telegram
+# updateni qayta yuborsa yoki webhook takrorlansa, ikkinchi nusxa tashlanadi.
+class DedupCache(TTLMap):
+    def __init__(self, ttl=10 * 60, maxsize=100_000, clock=time.monotonic):
+        super().__init__(ttl, maxsize, clock)
+        self.hits = 0
+
+    def add(self, key):
+        self.set(key)
+
+    # Kalit oynada bo‘lsa True, aks holda uni qo‘shib False qaytaradi
+    def seen(self, key):
+        if key in self:
+            self.hits += 1
+            return True
+        self.add(key)
+        return False
+
+
+# Har bir sessiya uchun alohida asyncio.Lock. Qulflar faqat kimdir ularni
+# ushlab turgan yoki kutayotgan paytda yashaydi, shuning uchun xotira faol
+# foydalanuvchilar soniga bog‘liq, jami foydalanuvchilarga emas.
+class SessionLocks:
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._locks)
+
+    def get(self, key):
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[key] = lock
+        return lock
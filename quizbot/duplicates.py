@@ -0,0 +1,184 @@
+import logging
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from zlib import crc32
+
+from quizbot.bank import QuestionBank, _file_digest, cache_path_for, compile_file, load_bank, parse_file
+from quizbot.search import APOSTROPHES, TOKEN
+
+logger = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".dedup.qbank"
+SHINGLE = 4
+NUM_PERM = 64
+BANDS = 16  # 16 x 4 qator: Jaccard ~0.5 dan boshlab nomzod bo‘ladi
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.8  # Bo‘laklar to‘plamlari bo‘yicha Jaccard o‘xshashligi
+MAX_COMPARE = 8  # Bitta LSH savatida har bir savol nechta oldingisi bilan solishtiriladi
+CHUNK_SIZE = 2000
+_SLOT_BITS = 6  # 2 ** 6 == NUM_PERM
+_SLOT_MASK = NUM_PERM - 1
+_VALUE_LIMIT = 1 << 32 - _SLOT_BITS
+_EMPTY = 0xFFFFFFFF
+
+
+def normalize(text):
+    return " ".join(text.lower().translate(APOSTROPHES).split())
+
+
+# Savol matnining 4 belgili bo‘laklari (kod va belgilar ham hisobga olinadi)
+# va variantlar so‘zlari. Variantlar tartibi ahamiyatsiz, ular to‘plam
+# sifatida olinadi.
+def shingles(question, options):
+    text = normalize(question)
+    result = {text[i:i + SHINGLE] for i in range(max(1, len(text) - SHINGLE + 1))}
+    for option in options:
+        result.update(f"#{term}" for term in TOKEN.findall(normalize(option)))
+    return result
+
+
+# One permutation hashing: har bir bo‘lak bitta 32 bitli xesh (CRC32) beradi, uning
+# pastki bitlari NUM_PERM ta katakdan birini, qolgani qiymatni tanlaydi -
+# NUM_PERM ta alohida xesh funksiyaga qaraganda bir necha barobar arzon.
+# Bo‘sh kataklar o‘ngdagi birinchi to‘la katakdan masofa bilan to‘ldiriladi.
+def signature(question, options):
+    slots = [_EMPTY] * NUM_PERM
+    for h in map(crc32, map(str.encode, shingles(question, options))):
+        slot, value = h & _SLOT_MASK, h >> _SLOT_BITS
+        if value < slots[slot]:
+            slots[slot] = value
+    for i in range(NUM_PERM):
+        if slots[i] == _EMPTY:
+            for distance in range(1, NUM_PERM):
+                value = slots[(i + distance) % NUM_PERM]
+                if value < _VALUE_LIMIT:
+                    slots[i] = distance << 32 - _SLOT_BITS | value
+                    break
+    return array("I", slots).tobytes()
+
+
+def _signatures(items):
+    return [signature(question, options) for question, options, _ in items]
+
+
+def similarity(first, second):
+    first, second = shingles(*first[:2]), shingles(*second[:2])
+    return len(first & second) / len(first | second)
+
+
+# MinHash imzolari (bir nechta jarayonda, bo‘laklab) va LSH savatlari:
+# faqat bir savatga tushgan savollar solishtiriladi, shuning uchun ish
+# hajmi savollar soniga deyarli chiziqli. Nomzod juftlar aniq Jaccard
+# o‘xshashligi bilan tekshiriladi (qisqa savollarda imzo bahosi qo‘pol).
+# Matni o‘xshash, lekin to‘g‘ri javobi boshqa savollar (5 == "5" va
+# 5 === "5") dublikat hisoblanmaydi. items - (savol, variantlar, to‘g‘ri
+# javob) lar; natija - har bir olib tashlanadigan savol uchun (indeks,
+# saqlanadigan savol indeksi, o‘xshashlik).
+def find_duplicates(items, threshold=THRESHOLD, workers=None):
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(items) > CHUNK_SIZE:
+        chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            signatures = [sig for part in pool.map(_signatures, chunks) for sig in part]
+    else:
+        signatures = _signatures(items)
+    answers = [normalize(answer) for _, _, answer in items]
+
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    best = {}
+    for band in range(BANDS):
+        buckets = {}
+        start, end = band * ROWS * 4, (band + 1) * ROWS * 4
+        for idx, sig in enumerate(signatures):
+            members = buckets.setdefault(sig[start:end], [])
+            for other in members[:MAX_COMPARE]:
+                if answers[other] != answers[idx] or find(other) == find(idx):
+                    continue
+                score = similarity(items[other], items[idx])
+                if score >= threshold:
+                    root_a, root_b = find(other), find(idx)
+                    parent[max(root_a, root_b)] = min(root_a, root_b)
+                    if score > best.get(idx, 0):
+                        best[idx] = score
+            members.append(idx)
+    return [(idx, find(idx), best.get(idx, threshold)) for idx in range(len(items)) if find(idx) != idx]
+
+
+def _items(questions):
+    return [(q["question"], q["options"], q["options"][q["correct"]]) for q in questions]
+
+
+def drop_duplicates(path, questions, threshold=THRESHOLD, workers=None):
+    duplicates = find_duplicates(_items(questions), threshold, workers)
+    for idx, original, score in duplicates:
+        logger.debug(f"{path}:{questions[idx]['line']}: {questions[original]['line']}-qatordagi savol "
+                     f"dublikati ({score:.2f})")
+    if duplicates:
+        logger.info(f"Dublikatlar: {len(questions)} ta savoldan {len(duplicates)} tasi olib tashlandi ({path})")
+    removed = {idx for idx, _, _ in duplicates}
+    return [q for idx, q in enumerate(questions) if idx not in removed]
+
+
+# Bot ichida bank fon oqimida yuklanadi, u yerdan jarayonlar ochilmaydi.
+# Katta banklar uchun kesh oldindan "python -m quizbot.bank dedup" bilan quriladi.
+def compile_deduplicated(path):
+    return compile_file(path, lambda path, questions: drop_duplicates(path, questions, workers=1))
+
+
+# Yuklash bosqichi: dublikatlarsiz bank alohida keshda saqlanadi, shuning
+# uchun BANKS_DEDUP yoqilib-o‘chirilganda oddiy kesh bilan aralashmaydi
+def load_deduplicated(path):
+    return load_bank(path, compile_deduplicated, CACHE_SUFFIX)
+
+
+def report(path, questions, duplicates):
+    lines = []
+    for idx, original, score in sorted(duplicates, key=lambda item: (item[1], item[0])):
+        lines.append(f"{path}:{questions[idx]['line']}: {questions[original]['line']}-qatordagi savol bilan "
+                     f"{score:.2f}: {questions[idx]['question'][:80]}")
+    groups = len({original for _, original, _ in duplicates})
+    lines.append(f"{path}: {len(questions)} ta savol, {groups} ta dublikat guruhi, "
+                 f"{len(duplicates)} ta savol olib tashlanadi")
+    return lines
+
+
+def dedup_files(paths, threshold=None, workers=None, dry_run=False):
+    threshold = THRESHOLD if threshold is None else threshold
+    failed = False
+    for path in paths:
+        try:
+            source_stat = os.stat(path)
+            questions = list(parse_file(path))
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"{path}: error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        started = time.perf_counter()
+        duplicates = find_duplicates(_items(questions), threshold, workers)
+        elapsed = time.perf_counter() - started
+        for line in report(path, questions, duplicates):
+            print(line)
+        print(f"{path}: {elapsed:.2f} s")
+        if dry_run or not questions:
+            continue
+        removed = {idx for idx, _, _ in duplicates}
+        bank = QuestionBank.from_questions(q for idx, q in enumerate(questions) if idx not in removed)
+        cache_path = cache_path_for(path, CACHE_SUFFIX)
+        try:
+            bank.save(cache_path, source_stat.st_mtime_ns, source_stat.st_size, _file_digest(path))
+        except (OSError, ValueError) as e:
+            print(f"{cache_path}: error: {e}", file=sys.stderr)
+            failed = True
+            continue
+        print(f"{path}: {len(bank)} ta savol yozildi: {cache_path}")
+    return 1 if failed else 0
@@ -0,0 +1,133 @@
+import argparse
+import itertools
+import json
+import logging
+import math
+import time
+from collections import Counter
+
+from aiohttp import web
+
+from quizbot.outbound import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+# Sinov uchun mahalliy Bot API: sendPoll, sendMessage, editMessageText va
+# webhook metodlariga Telegramga o‘xshash javob qaytaradi. Limitlar
+# OutboundQueue dagi kabi: umumiy, har bir shaxsiy chat (chat_rate,
+# chat_burst) va guruh (group_rate) paqirlari; birortasidan oshganda 429
+# (retry_after) qaytariladi. blocked_every > 0 bo‘lsa har N-foydalanuvchini
+# "botni bloklagan" deb 403 qaytaradi. on_send(method, chat_id, result) har
+# bir muvaffaqiyatli yuborishdan keyin chaqiriladi (masalan, yuklama
+# generatori polllarga javob berishi uchun). Botni shunga ulash:
+# BOT_API_URL=http://127.0.0.1:8081
+class FakeBotAPI:
+    def __init__(self, rate=30, chat_rate=1, chat_burst=3, group_rate=20 / 60, blocked_every=0, on_send=None):
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.blocked_every = blocked_every
+        self.on_send = on_send
+        self.calls = Counter()
+        self.errors = Counter()
+        self.started = time.monotonic()
+        self._bucket = TokenBucket(rate, rate, time.monotonic())
+        self._chats = {}
+        self._ids = itertools.count(1)
+
+    def _message(self, chat_id, **fields):
+        chat = {"id": chat_id, "type": "private" if chat_id > 0 else "group"}
+        if chat_id < 0:
+            chat["title"] = "Test"
+        return {"message_id": next(self._ids), "date": int(time.time()), "chat": chat, **fields}
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, self.chat_burst, now)
+        return bucket
+
+    def _error(self, code, description, **parameters):
+        self.errors[code] += 1
+        body = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.json_response(body)
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        data = await request.json() if request.content_type == "application/json" else await request.post()
+        self.calls[method] += 1
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake"}})
+        if method in ("setWebhook", "deleteWebhook"):
+            return web.json_response({"ok": True, "result": True})
+        now = time.monotonic()
+        chat_id = int(data.get("chat_id", 0))
+        chat = self._chat_bucket(chat_id, now)
+        wait = max(self._bucket.wait_time(now), chat.wait_time(now))
+        if wait > 0:
+            retry_after = math.ceil(wait)
+            return self._error(429, f"Too Many Requests: retry after {retry_after}", retry_after=retry_after)
+        self._bucket.take(now)
+        chat.take(now)
+        if self.blocked_every and chat_id > 0 and chat_id % self.blocked_every == 0:
+            return self._error(403, "Forbidden: bot was blocked by the user")
+        if method == "sendPoll":
+            options = data["options"]
+            options = [{"text": text if isinstance(text, str) else text["text"], "voter_count": 0}
+                       for text in (json.loads(options) if isinstance(options, str) else options)]
+            poll = {
+                "id": str(next(self._ids)), "question": data["question"], "options": options,
+                "total_voter_count": 0, "is_closed": False, "is_anonymous": data.get("is_anonymous") in (True, "true"),
+                "type": data.get("type", "regular"), "allows_multiple_answers": False,
+            }
+            if data.get("correct_option_id") is not None:
+                poll["correct_option_id"] = int(data["correct_option_id"])
+            result = self._message(chat_id, poll=poll)
+        elif method in ("sendMessage", "editMessageText"):
+            result = self._message(chat_id, text=data.get("text", ""))
+        else:
+            return self._error(404, "Not Found: method not found")
+        if self.on_send is not None:
+            self.on_send(method, chat_id, result)
+        return web.json_response({"ok": True, "result": result})
+
+    async def stats(self, request):
+        return web.json_response(self.snapshot())
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started
+        total = sum(self.calls.values())
+        return {"calls": dict(self.calls), "errors": dict(self.errors), "elapsed": round(elapsed, 3),
+                "rate": round(total / elapsed, 2) if elapsed > 0 else 0.0}
+
+    def app(self):
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quizbot.fakeapi")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float, default=30, help="soniyasiga umumiy so‘rovlar chegarasi")
+    parser.add_argument("--chat-rate", type=float, default=1, help="bitta shaxsiy chatga soniyasiga so‘rovlar")
+    parser.add_argument("--chat-burst", type=int, default=3)
+    parser.add_argument("--group-rate", type=float, default=20 / 60, help="bitta guruhga soniyasiga so‘rovlar")
+    parser.add_argument("--blocked-every", type=int, default=0, help="har N-foydalanuvchiga 403 qaytarish")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    api = FakeBotAPI(args.rate, args.chat_rate, args.chat_burst, args.group_rate, args.blocked_every)
+    try:
+        web.run_app(api.app(), host="127.0.0.1", port=args.port)
+    finally:
+        logger.info(f"Fake Bot API: {api.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
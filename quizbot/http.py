@@ -0,0 +1,85 @@
+import time
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiohttp import TraceConfig
+
+
+# Ulanishlar puli statistikasi: so‘rovlar bo‘sh ulanishni qancha kutgani,
+# nechta yangi ulanish ochilgani va nechtasi qayta ishlatilgani
+class PoolStats:
+    __slots__ = ("queued", "wait_total", "wait_max", "created", "create_total", "reused")
+
+    def __init__(self):
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.created = 0
+        self.create_total = 0.0
+        self.reused = 0
+
+    def trace_config(self):
+        config = TraceConfig()
+        config.on_connection_queued_start.append(self._queued_start)
+        config.on_connection_queued_end.append(self._queued_end)
+        config.on_connection_create_start.append(self._create_start)
+        config.on_connection_create_end.append(self._create_end)
+        config.on_connection_reuseconn.append(self._reused)
+        return config
+
+    async def _queued_start(self, session, ctx, params):
+        ctx.queued_at = time.monotonic()
+
+    async def _queued_end(self, session, ctx, params):
+        wait = time.monotonic() - ctx.queued_at
+        self.queued += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+    async def _create_start(self, session, ctx, params):
+        ctx.created_at = time.monotonic()
+
+    async def _create_end(self, session, ctx, params):
+        self.created += 1
+        self.create_total += time.monotonic() - ctx.created_at
+
+    async def _reused(self, session, ctx, params):
+        self.reused += 1
+
+    def snapshot(self):
+        return {
+            "queued": self.queued,
+            "wait_avg_ms": round(self.wait_total / self.queued * 1000, 2) if self.queued else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "created": self.created,
+            "connect_avg_ms": round(self.create_total / self.created * 1000, 2) if self.created else 0.0,
+            "reused": self.reused,
+        }
+
+
+# Bot API uchun sozlanadigan ulanishlar puli: ulanishlar soni, keep-alive
+# va DNS keshi. Sessiya va ulagichni aiogram o‘zi quradi (proxy, sarlavhalar
+# ham shu yerda), biz faqat ulagich parametrlarini to‘ldiramiz. Pul
+# statistikasi TraceConfig orqali faqat trace=True bo‘lganda yig‘iladi - har
+# bir so‘rovga qo‘shimcha chaqiruvlar qo‘shadi.
+class PooledAiohttpSession(AiohttpSession):
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30.0, ttl_dns_cache=3600, trace=False,
+                 **kwargs):
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+        )
+        self.trace = trace
+        self.pool_stats = PoolStats()
+        self._traced = None
+
+    async def create_session(self):
+        session = await super().create_session()
+        if self.trace and session is not self._traced:
+            # aiogram ClientSession ga trace_configs bermaydi: yangi sessiyaga bir marta qo‘shiladi
+            config = self.pool_stats.trace_config()
+            config.freeze()
+            session._trace_configs.append(config)
+            self._traced = session
+        return session
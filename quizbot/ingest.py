@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import time
+
+from aiohttp import web
+
+from quizbot.dedup import DedupCache
+from quizbot.router import SECRET_HEADER, shard_key
+
+logger = logging.getLogger(__name__)
+
+
+# Webhook updatelarini darhol tasdiqlab, jarayon ichidagi navbatga qo‘yish.
+# Har bir foydalanuvchi updatelari bitta shardga tushadi, shard esa bitta
+# iste’molchi korutina tomonidan ketma-ket qayta ishlanadi - tartib saqlanadi.
+class IngestQueue:
+    def __init__(self, process, consumers=32, maxsize=10000, dedup=None):
+        self.process = process
+        self.shards = [asyncio.Queue(maxsize=max(1, maxsize // consumers)) for _ in range(consumers)]
+        self.tasks = []
+        self.dedup = dedup if dedup is not None else DedupCache()  # Yaqindagi update_id lar
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.lag_count = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+
+    def __len__(self):
+        return sum(shard.qsize() for shard in self.shards)
+
+    def start(self):
+        for shard in self.shards:
+            self.tasks.append(asyncio.create_task(self._consume(shard)))
+        logger.info(f"Update navbati ishga tushdi: {len(self.shards)} ta iste’molchi")
+
+    def put(self, update):
+        update_id = update.get("update_id")
+        if update_id is not None and update_id in self.dedup:
+            self.duplicates += 1
+            return True
+        shard = self.shards[shard_key(update) % len(self.shards)]
+        try:
+            shard.put_nowait((time.monotonic(), update))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(f"Update navbati to‘la, update_id={update_id} qabul qilinmadi")
+            return False
+        if update_id is not None:
+            self.dedup.add(update_id)
+        self.enqueued += 1
+        return True
+
+    async def _consume(self, shard):
+        while True:
+            queued_at, update = await shard.get()
+            lag = time.monotonic() - queued_at
+            self.lag_count += 1
+            self.lag_total += lag
+            self.lag_max = max(self.lag_max, lag)
+            try:
+                await self.process(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Updateni qayta ishlashda xato (update_id={update.get('update_id')}): {e}")
+            else:
+                self.processed += 1
+            finally:
+                shard.task_done()
+
+    async def handle(self, request, secret_token=""):
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=401)
+        try:
+            update = json.loads(await request.read())
+        except ValueError:
+            return web.Response(status=400)
+        # Navbat to‘la bo‘lsa Telegram updateni keyinroq qayta yuboradi
+        return web.Response() if self.put(update) else web.Response(status=503)
+
+    def register(self, app, path, secret_token=""):
+        async def handler(request):
+            return await self.handle(request, secret_token)
+        app.router.add_post(path, handler)
+
+    def stats(self):
+        return {
+            "depth": len(self),
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "dropped": self.dropped,
+            "lag_avg_ms": round(self.lag_total / self.lag_count * 1000, 2) if self.lag_count else 0.0,
+            "lag_max_ms": round(self.lag_max * 1000, 2),
+        }
+
+    async def close(self, timeout=10.0):
+        try:
+            await asyncio.wait_for(asyncio.gather(*(shard.join() for shard in self.shards)), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Update navbati to‘liq bo‘shatilmadi: {len(self)} ta update qoldi")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector, web
+
+from quizbot.fakeapi import FakeBotAPI
+
+
+# Webhookka yuboriladigan sun’iy update: users ta foydalanuvchidan
+# navbatma-navbat kelgan buyruq xabari (masalan, /start)
+def make_update(update_id, user_id, text):
+    command = text.split()[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": f"User{user_id}"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}] if command[0] == "/" else [],
+        },
+    }
+
+
+def make_poll_answer(update_id, user_id, poll_id, option):
+    return {
+        "update_id": update_id,
+        "poll_answer": {
+            "poll_id": poll_id,
+            "user": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+            "option_ids": [option],
+        },
+    }
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def api_calls(session, api_url):
+    async with session.get(f"{api_url}/stats") as response:
+        return sum((await response.json())["calls"].values())
+
+
+# Yuklama generatori: webhookka concurrency ta parallel so‘rov bilan updates
+# ta update yuboradi va javob (ack) kechikishini o‘lchaydi. api_url berilsa
+# (python -m quizbot.fakeapi), bot shu vaqt ichida Bot API ga yuborgan
+# so‘rovlar soni kutiladi - bu updatelar qayta ishlanish tezligi.
+async def run(url, updates, users, concurrency, text, api_url=None, settle=30.0):
+    latencies = []
+    errors = 0
+    ids = itertools.count(int(time.time()) * 1000)
+    async with ClientSession(connector=TCPConnector(limit=concurrency),
+                             timeout=ClientTimeout(total=60)) as session:
+        calls_before = await api_calls(session, api_url) if api_url else 0
+        queue = asyncio.Queue()
+        for i in range(updates):
+            queue.put_nowait(json.dumps(make_update(next(ids), 1 + i % users, text)).encode())
+
+        async def sender():
+            nonlocal errors
+            while not queue.empty():
+                body = queue.get_nowait()
+                started = time.perf_counter()
+                try:
+                    async with session.post(url, data=body, headers={"Content-Type": "application/json"}) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except (ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+        acked = time.perf_counter() - started
+        result = {
+            "updates": updates, "errors": errors, "ack_seconds": round(acked, 3),
+            "ack_rate": round(updates / acked, 1),
+            "ack_p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "ack_p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+        if api_url:
+            # Har bir update bitta javob xabarini beradi deb olinadi
+            deadline = time.perf_counter() + settle
+            calls = await api_calls(session, api_url) - calls_before
+            while calls < updates and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+                calls = await api_calls(session, api_url) - calls_before
+            processed = time.perf_counter() - started
+            result.update(api_calls=calls, processed_seconds=round(processed, 3),
+                          processed_rate=round(calls / processed, 1))
+    return result
+
+
+# Fake Bot API ni shu jarayonda ishga tushirish: bot yuborgan har bir xabar
+# (method, result) ko‘rinishida chat "qutisiga" tushadi. Limitlar
+# ko‘tarilgan - botning o‘z o‘tkazuvchanligi o‘lchanadi. Bot
+# BOT_API_URL=http://127.0.0.1:<port> bilan ishga tushiriladi.
+async def start_api(port):
+    inboxes = defaultdict(asyncio.Queue)
+    api = FakeBotAPI(rate=1_000_000, chat_rate=1_000_000, chat_burst=1_000_000, group_rate=1_000_000,
+                     on_send=lambda method, chat_id, result: inboxes[chat_id].put_nowait((method, result)))
+    runner = web.AppRunner(api.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return api, runner, inboxes
+
+
+async def post_update(session, url, update):
+    async with session.post(url, data=json.dumps(update).encode(), headers={"Content-Type": "application/json"}) as response:
+        await response.read()
+        if response.status != 200:
+            raise ClientError(f"HTTP {response.status}")
+
+
+async def expect(inbox, method, timeout, counted=None):
+    while True:
+        sent, result = await asyncio.wait_for(inbox.get(), timeout)
+        if counted is not None:
+            counted[sent] += 1
+        if sent == method:
+            return result
+
+
+# Chatga quiet soniya davomida yangi xabar kelmaguncha kutish
+async def drain(inbox, quiet, counted=None):
+    while True:
+        try:
+            sent, _ = await asyncio.wait_for(inbox.get(), quiet)
+        except asyncio.TimeoutError:
+            return
+        if counted is not None:
+            counted[sent] += 1
+
+
+# Bot bironta chatga quiet soniya davomida hech narsa yubormaguncha kutish
+async def settle(inboxes, quiet=1.0, step=0.1):
+    last, still = None, 0.0
+    while still < quiet:
+        await asyncio.sleep(step)
+        total = sum(inbox.qsize() for inbox in inboxes.values())
+        still = still + step if total == last else 0.0
+        last = total
+
+
+# Bot (yoki barcha workerlar) updatelarni qabul qilib, javob yubora
+# boshlaguncha kutish: user_id=0 dan /start yuboriladi
+async def wait_ready(url, inboxes, timeout=120.0):
+    deadline = time.monotonic() + timeout
+    async with ClientSession(timeout=ClientTimeout(total=5)) as session:
+        for update_id in itertools.count(1):
+            try:
+                await post_update(session, url, make_update(update_id, 0, "/start"))
+                await expect(inboxes[0], "sendMessage", 5)
+                return
+            except (ClientError, asyncio.TimeoutError):
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.5)
+
+
+# Quiz sessiyalarini to‘liq takrorlash: har bir foydalanuvchi /quiz -> Random
+# -> vaqt tanlaydi, so‘ng questions ta pollga poll_answer yuboradi (accuracy
+# ulushi to‘g‘ri). O‘lchanadi: javobdan keyingi poll kelguncha kechikish,
+# soniyasiga javoblar va har bir savolga Bot API chaqiruvlari soni.
+async def run_quiz(url, inboxes, users, questions, accuracy=0.7, time_limit=60, timeout=30.0, seed=1):
+    ids = itertools.count(int(time.time()) * 1000)
+    rng = random.Random(seed)
+    latencies = []
+    calls = Counter()
+    errors = Counter()
+    windows = []
+
+    async with ClientSession(connector=TCPConnector(limit=0), timeout=ClientTimeout(total=timeout)) as session:
+        async def user(user_id):
+            inbox = inboxes[user_id]
+            try:
+                for text in ("/quiz", "Random"):
+                    await post_update(session, url, make_update(next(ids), user_id, text))
+                    await expect(inbox, "sendMessage", timeout)
+                await post_update(session, url, make_update(next(ids), user_id, str(time_limit)))
+                poll = (await expect(inbox, "sendPoll", timeout))["poll"]
+                started = time.perf_counter()
+                counted = Counter()
+                for _ in range(questions):
+                    correct = poll["correct_option_id"]
+                    option = correct if rng.random() < accuracy else (correct + 1) % len(poll["options"])
+                    answered = time.perf_counter()
+                    await post_update(session, url, make_poll_answer(next(ids), user_id, poll["id"], option))
+                    poll = (await expect(inbox, "sendPoll", timeout, counted))["poll"]
+                    latencies.append(time.perf_counter() - answered)
+                windows.append((started, time.perf_counter()))
+                return counted
+            except (ClientError, asyncio.TimeoutError) as e:
+                errors[type(e).__name__] += 1
+
+        async def finish(user_id, counted):
+            # Ustuvorligi past alohida xabarlar (compact bo‘lmagan rejimda) polllardan
+            # keyin yuboriladi - ular ham shu savollarning chaqiruvlari sifatida sanaladi
+            inbox = inboxes[user_id]
+            while not inbox.empty():
+                counted[inbox.get_nowait()[0]] += 1
+            calls.update(counted)
+            try:
+                await post_update(session, url, make_update(next(ids), user_id, "/cancel"))
+            except (ClientError, asyncio.TimeoutError) as e:
+                errors[type(e).__name__] += 1
+            await drain(inbox, 1.0)
+
+        results = await asyncio.gather(*(user(user_id) for user_id in range(1, users + 1)))
+        await settle(inboxes)
+        await asyncio.gather(*(finish(user_id, counted) for user_id, counted in enumerate(results, 1)
+                               if counted is not None))
+
+    answers = len(latencies)
+    elapsed = max(end for _, end in windows) - min(start for start, _ in windows) if windows else 0.0
+    return {
+        "users": users, "answers": answers, "errors": dict(errors),
+        "answer_rate": round(answers / elapsed, 1) if elapsed else 0.0,
+        "next_poll_p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "next_poll_p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "api_calls_per_question": round(sum(calls.values()) / answers, 3) if answers else 0.0,
+        "api_calls": dict(calls),
+    }
+
+
+async def quiz(url, users, questions, api_port, accuracy):
+    _, runner, inboxes = await start_api(api_port)
+    try:
+        await wait_ready(url, inboxes)
+        return await run_quiz(url, inboxes, users, questions, accuracy)
+    finally:
+        await runner.cleanup()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m quizbot.loadgen")
+    parser.add_argument("url", help="webhook manzili, masalan: http://127.0.0.1:8000/webhook/<BOT_TOKEN>")
+    parser.add_argument("--scenario", choices=("messages", "quiz"), default="messages",
+                        help="messages - bir xil xabarlar oqimi, quiz - poll_answer bilan to‘liq sessiyalar")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--text", default="/start", help="yuboriladigan xabar matni")
+    parser.add_argument("--api", help="fake Bot API manzili (/stats orqali qayta ishlangan updatelar sanaladi)")
+    parser.add_argument("--questions", type=int, default=10, help="quiz: har bir foydalanuvchi javob beradigan savollar")
+    parser.add_argument("--api-port", type=int, default=8081,
+                        help="quiz: shu jarayonda ishlaydigan fake Bot API porti (bot undan keyin ishga tushiriladi)")
+    parser.add_argument("--accuracy", type=float, default=0.7, help="quiz: to‘g‘ri javoblar ulushi")
+    args = parser.parse_args(argv)
+    if args.scenario == "quiz":
+        result = asyncio.run(quiz(args.url, args.users, args.questions, args.api_port, args.accuracy))
+    else:
+        result = asyncio.run(run(args.url, args.updates, args.users, args.concurrency, args.text, args.api))
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+
+
+# Yozuvlar hodisalar tsiklida formatlanmaydi: QueueHandler ularni navbatga
+# qo‘yadi, formatlash va stdout ga yozish QueueListener oqimida bajariladi
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# Hodisa maydonlari (EventLog.info(..., user_id=1)) xabar oxiriga qo‘shiladi
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(fmt="text", level=logging.INFO):
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    if fmt == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter(logging.BASIC_FORMAT))
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+    root = logging.getLogger()
+    root.handlers[:] = [_LazyQueueHandler(records)]
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+# Har savol/javob uchun yoziladigan hodisalar: faqat rate ulushi yoziladi.
+# Tashlangan yozuv uchun LogRecord ham yaratilmaydi. Xatolar va sessiya
+# yakunlari oddiy logger orqali doim yoziladi.
+class EventLog:
+    def __init__(self, logger, rate=1.0):
+        self.logger = logger
+        self.rate = rate
+        self.dropped = 0
+
+    def info(self, msg, *args, **fields):
+        if self.rate < 1.0 and random.random() >= self.rate:
+            self.dropped += 1
+            return
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(msg, *args, extra={"fields": fields} if fields else None, stacklevel=2)
@@ -0,0 +1,114 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+# Prometheus matn formatidagi oddiy metrikalar. Kuzatish bitta bisect va ikki
+# qo‘shishdan iborat, shuning uchun ishlab chiqarishda yoqilgan holda qoladi.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Oxirgisi +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def samples(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f'{self.name}_bucket{{le="{bound}"}}', total
+        total += self.counts[-1]
+        yield f'{self.name}_bucket{{le="+Inf"}}', total
+        yield f"{self.name}_sum", self.sum
+        yield f"{self.name}_count", total
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name, self.value
+
+
+# Qiymati so‘ralganda funksiyadan olinadigan metrika (navbat uzunligi va h.k.)
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, read, kind="gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def samples(self):
+        yield self.name, self.read()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help):
+        metric = Counter(name, help)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, read, kind="gauge"):
+        metric = Gauge(name, help, read, kind)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, value in metric.samples():
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request):
+        return web.Response(text=self.render(), headers={"Content-Type": CONTENT_TYPE})
+
+    # /metrics alohida manzilda: webhook porti internetga ochiq, metrikalar
+    # esa ichki holatni (navbatlar, sessiyalar soni) ko‘rsatadi
+    async def serve(self, host, port):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
@@ -0,0 +1,220 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Navbat ustuvorliklari: kichik raqam oldin yuboriladi
+PRIORITY_POLL = 0  # Keyingi savol
+PRIORITY_CONTROL = 1  # Pauza, natijalar kabi foydalanuvchi kutayotgan xabarlar
+PRIORITY_FEEDBACK = 2  # "🎯 To‘g‘ri javob!" kabi bezak xabarlar
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now):
+        if now < self.updated:  # retry_after tufayli bloklangan
+            return self.updated - now + max(0.0, 1 - self.tokens) / self.rate
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, until):
+        self.tokens = 1
+        self.updated = until
+
+    def full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Chat:
+    __slots__ = ("bucket", "jobs", "busy", "entry")
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.jobs = []  # (priority, seq, attempt, future, method, args, kwargs)
+        self.busy = False  # Chatda bir vaqtda bitta so‘rov - tartib saqlanadi
+        self.entry = None  # Navbatdagi amaldagi yozuv raqami (eskirganlari o‘tkazib yuboriladi)
+
+
+# Bot API ga chiquvchi so‘rovlar navbati: umumiy va har bir chat uchun token
+# paqirlari, ustuvorlik bo‘yicha tanlash va 429 (retry_after) dan keyin chatni
+# kutib qayta urinish. Bitta chatning so‘rovlari ketma-ket, turli chatlarniki
+# esa parallel (max_in_flight gacha) yuboriladi.
+class OutboundQueue:
+    def __init__(self, global_rate=30, chat_rate=1, chat_burst=3, group_rate=20 / 60,
+                 max_in_flight=64, max_retries=3, clock=time.monotonic):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        self._clock = clock
+        self._global = TokenBucket(global_rate, max(1, global_rate), clock())  # Kasr limitda ham bitta so‘rov sig‘adi
+        self._chats = {}
+        self._ready = []  # (priority, seq, chat_id) - hozir yuborsa bo‘ladigan chatlar
+        self._waiting = []  # (vaqt, seq, chat_id) - chat limiti tufayli kutayotganlar
+        self._seq = itertools.count()
+        self._tasks = set()
+        self._task = None
+        self._wakeup = None
+        self._slots = None
+        self._last_sweep = clock()
+
+    def __len__(self):
+        return sum(len(chat.jobs) for chat in self._chats.values())
+
+    def submit(self, chat_id, priority, method, /, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            rate = self.group_rate if chat_id < 0 else self.chat_rate
+            chat = self._chats[chat_id] = _Chat(TokenBucket(rate, self.chat_burst, self._clock()))
+        head = chat.jobs[0][0] if chat.jobs else None
+        heapq.heappush(chat.jobs, (priority, next(self._seq), 0, future, method, args, kwargs))
+        if not chat.busy and (chat.entry is None or priority < head):
+            # Yangi yozuv eskisini bekor qiladi: chat yuqoriroq ustuvorlik bilan navbatga turadi
+            self._schedule_chat(chat_id, chat)
+        self._wakeup.set()
+        return future
+
+    # Natijasi kerak bo‘lmagan xabarlar uchun: xato faqat log qilinadi
+    def post(self, chat_id, priority, method, /, *args, **kwargs):
+        future = self.submit(chat_id, priority, method, *args, **kwargs)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    async def call(self, chat_id, priority, method, /, *args, **kwargs):
+        return await self.submit(chat_id, priority, method, *args, **kwargs)
+
+    @staticmethod
+    def _log_failure(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Xabarni yuborishda xato: {future.exception()}")
+
+    def _schedule_chat(self, chat_id, chat):
+        now = self._clock()
+        delay = chat.bucket.wait_time(now)
+        chat.entry = next(self._seq)
+        if delay <= 0:
+            heapq.heappush(self._ready, (chat.jobs[0][0], chat.entry, chat_id))
+        else:
+            heapq.heappush(self._waiting, (now + delay, chat.entry, chat_id))
+
+    def _current(self, seq, chat_id):
+        chat = self._chats.get(chat_id)
+        return chat if chat is not None and chat.entry == seq else None
+
+    async def _run(self):
+        while True:
+            now = self._clock()
+            while self._waiting and self._waiting[0][0] <= now:
+                _, seq, chat_id = heapq.heappop(self._waiting)
+                chat = self._current(seq, chat_id)
+                if chat is not None:
+                    chat.entry = next(self._seq)
+                    heapq.heappush(self._ready, (chat.jobs[0][0], chat.entry, chat_id))
+            if now - self._last_sweep > 60:
+                self._sweep(now)
+            if not self._ready:
+                timeout = self._waiting[0][0] - now if self._waiting else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            delay = self._global.wait_time(now)
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            _, seq, chat_id = heapq.heappop(self._ready)
+            chat = self._current(seq, chat_id)
+            if chat is None:
+                continue
+            chat.entry = None
+            job = heapq.heappop(chat.jobs)
+            if job[3].cancelled():
+                if chat.jobs:
+                    self._schedule_chat(chat_id, chat)
+                continue
+            await self._slots.acquire()
+            now = self._clock()
+            self._global.take(now)
+            chat.bucket.take(now)
+            chat.busy = True
+            task = asyncio.create_task(self._send(chat_id, chat, job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, chat_id, chat, job):
+        priority, seq, attempt, future, method, args, kwargs = job
+        try:
+            result = await method(*args, **kwargs)
+        except TelegramRetryAfter as e:
+            if attempt < self.max_retries:
+                self.retries += 1
+                logger.warning(f"Flood limit: chat_id={chat_id}, {e.retry_after} soniyadan keyin qayta urinish")
+                chat.bucket.block(self._clock() + e.retry_after)
+                heapq.heappush(chat.jobs, (priority, seq, attempt + 1, future, method, args, kwargs))
+            else:
+                self.failed += 1
+                if not future.done():
+                    future.set_exception(e)
+        except Exception as e:
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.sent += 1
+            if not future.done():
+                future.set_result(result)
+        finally:
+            chat.busy = False
+            self._slots.release()
+            if chat.jobs:
+                self._schedule_chat(chat_id, chat)
+            self._wakeup.set()
+
+    # Bo‘sh va paqiri to‘lgan chatlarni xotiradan tozalash
+    def _sweep(self, now):
+        self._last_sweep = now
+        idle = [chat_id for chat_id, chat in self._chats.items()
+                if not chat.jobs and not chat.busy and chat.entry is None and chat.bucket.full(now)]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._tasks:
+            task.cancel()
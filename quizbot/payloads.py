@@ -0,0 +1,89 @@
+import asyncio
+import json
+import weakref
+from collections import namedtuple
+
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.methods import SendPoll
+from aiohttp import ClientError
+
+SentPoll = namedtuple("SentPoll", ("message_id", "poll_id"))
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _escape(text):
+    return json.dumps(text, ensure_ascii=False)[1:-1]
+
+
+# sendPoll so‘rov tanasi bo‘laklari: har bir savol uchun savol matni,
+# variantlar va izoh bir marta JSON ga kodlanadi; har bir yuborishda faqat
+# sarlavha (hisoblagich), permutatsiya, chat_id va vaqt qo‘shiladi.
+# JSON satrini bo‘laklab ekranlash mumkin, chunki ekranlash har bir belgi
+# uchun alohida. Kesh bank obyektiga bog‘liq va bank bilan birga o‘chadi.
+class PollPayloads:
+    def __init__(self, question_limit=300):
+        self.question_limit = question_limit
+        self.hits = 0
+        self.misses = 0
+        self._banks = weakref.WeakKeyDictionary()  # bank -> {idx: (savol, uzunlik, variantlar, izoh)}
+
+    def _entry(self, bank, index):
+        entries = self._banks.get(bank)
+        if entries is None:
+            entries = self._banks[bank] = {}
+        entry = entries.get(index)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        question = bank.question(index)
+        entry = entries[index] = (
+            _escape(question),
+            len(question),
+            tuple(f'{{"text":{json.dumps(option, ensure_ascii=False)}}}' for option in bank.options(index)),
+            f',"explanation":"✅ To‘g‘ri javob: {_escape(bank.correct_text(index))}"'
+        )
+        return entry
+
+    def question_text(self, bank, index, prefix):
+        text = prefix + bank.question(index)
+        if len(text) > self.question_limit:
+            text = text[:self.question_limit - 1] + "…"
+        return text
+
+    def body(self, bank, index, permutation, prefix, chat_id, open_period=None):
+        question, length, options, explanation = self._entry(bank, index)
+        if len(prefix) + length > self.question_limit:
+            question, prefix = _escape(self.question_text(bank, index, prefix)), ""
+        return "".join((
+            f'{{"chat_id":{chat_id},"question":"', _escape(prefix), question,
+            '","options":[', ",".join([options[i] for i in permutation]),
+            f'],"type":"quiz","correct_option_id":{permutation.index(bank.correct(index))},"is_anonymous":false',
+            f',"open_period":{open_period}' if open_period else "", explanation, "}"
+        )).encode("utf-8")
+
+
+# Tayyor tanani aiogram sessiyasining aiohttp mijozi orqali yuborish: SendPoll
+# modeli va Message javobi qurilmaydi. Xato bo‘lsa javob aiogramning
+# check_response iga beriladi - TelegramRetryAfter va boshqa istisnolar
+# bot.send_poll dagidek ko‘tariladi.
+async def send_raw_poll(bot, body):
+    session = bot.session
+    client = await session.create_session()
+    url = session.api.api_url(token=bot.token, method="sendPoll")
+    try:
+        async with client.post(url, data=body, headers=JSON_HEADERS, timeout=session.timeout) as response:
+            content = await response.text()
+    except asyncio.TimeoutError:
+        raise TelegramNetworkError(method=SendPoll(**json.loads(body)), message="Request timeout error")
+    except ClientError as e:
+        raise TelegramNetworkError(method=SendPoll(**json.loads(body)), message=f"{type(e).__name__}: {e}")
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = {}
+    if response.status == 200 and data.get("ok"):
+        result = data["result"]
+        return SentPoll(result["message_id"], result["poll"]["id"])
+    session.check_response(bot=bot, method=SendPoll(**json.loads(body)), status_code=response.status, content=content)
+    raise TelegramNetworkError(method=SendPoll(**json.loads(body)), message=f"Kutilmagan javob: {content[:200]}")
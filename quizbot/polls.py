@@ -0,0 +1,16 @@
+import time
+from collections import namedtuple
+
+from quizbot.ttl import TTLMap
+
+# Poll qaysi sessiyaga va sessiyaning nechanchi savoliga tegishli
+PollRef = namedtuple("PollRef", ("session_key", "chat_id", "slot"))
+
+
+# poll_id -> PollRef indeksi. Kech kelgan javoblar ham TTL davomida topiladi.
+class PollIndex(TTLMap):
+    def __init__(self, ttl=15 * 60, maxsize=200_000, clock=time.monotonic):
+        super().__init__(ttl, maxsize, clock)
+
+    def add(self, poll_id, session_key, chat_id, slot):
+        self.set(poll_id, PollRef(session_key, chat_id, slot))
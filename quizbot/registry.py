@@ -0,0 +1,141 @@
+import asyncio
+import glob
+import logging
+import os
+from collections import OrderedDict
+
+from quizbot.bank import load_bank
+
+logger = logging.getLogger(__name__)
+
+
+# Savollar banklari reyestri: katalogdagi bank fayllarini topadi, har birini
+# faqat birinchi marta tanlanganda yuklaydi va xotira byudjetidan oshganda
+# eng kam ishlatilganlarini chiqarib tashlaydi. Chiqarilgan bank uni
+# ishlatayotgan sessiyalarda havola orqali yashashda davom etadi.
+class BankRegistry:
+    def __init__(self, directory, pattern="*.txt", memory_budget=64 * 1024 * 1024, load=load_bank):
+        self.directory = directory
+        self.pattern = pattern
+        self.memory_budget = memory_budget
+        self.evictions = 0
+        self._load = load
+        self._paths = {}
+        self._banks = OrderedDict()  # nom -> bank, eng oxirgi ishlatilgan oxirida
+        self._sizes = {}
+        self._versions = {}  # nom -> yuklangan paytdagi (mtime_ns, size)
+        self._loading = {}
+
+    def discover(self):
+        paths = sorted(glob.glob(os.path.join(self.directory, self.pattern)))
+        self._paths = {os.path.splitext(os.path.basename(path))[0]: path for path in paths}
+        for name in list(self._banks):
+            if name not in self._paths:  # Fayl o‘chirilgan
+                self._drop(name)
+        logger.info(f"Topilgan savollar banklari: {list(self._paths)}")
+        return self.names()
+
+    def names(self):
+        return list(self._paths)
+
+    def path(self, name):
+        return self._paths[name]
+
+    def memory_used(self):
+        return sum(self._sizes.values())
+
+    # Yuklangan bankni olish (yuklamasdan); touch=False bo‘lsa LRU tartibi o‘zgarmaydi
+    def peek(self, name, touch=True):
+        bank = self._banks.get(name)
+        if bank is not None and touch:
+            self._banks.move_to_end(name)
+        return bank
+
+    def loaded(self):
+        return list(self._banks)
+
+    async def get(self, name):
+        bank = self.peek(name)
+        if bank is not None:
+            return bank
+        # Bir vaqtda kelgan so‘rovlar bitta yuklashni kutadi
+        loading = self._loading.get(name)
+        if loading is None:
+            loop = asyncio.get_running_loop()
+            loading = self._loading[name] = loop.run_in_executor(None, self._load_versioned, self._paths[name])
+        try:
+            bank, version = await asyncio.shield(loading)
+        finally:
+            self._loading.pop(name, None)
+        self._put(name, bank, version)
+        return bank
+
+    def _load_versioned(self, path):
+        version = self._stat(path)
+        return self._load(path), version
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _put(self, name, bank, version):
+        self._banks[name] = bank
+        self._banks.move_to_end(name)
+        self._sizes[name] = bank.nbytes()
+        self._versions[name] = version
+        self._evict()
+
+    def _drop(self, name):
+        self._banks.pop(name, None)
+        self._sizes.pop(name, None)
+        self._versions.pop(name, None)
+
+    # Fayli yuklangandan keyin o‘zgargan banklar
+    def changed(self):
+        return [name for name in self._banks if self._stat(self._paths[name]) != self._versions.get(name)]
+
+    # Bankni fon oqimida qayta tahlil qilib, tayyor bo‘lgach bir amal bilan
+    # almashtirish. Boshlangan sessiyalar eski bankni ushlab turadi, yangi
+    # sessiyalar esa yangisini oladi. Hali yuklanmagan banklar keyingi
+    # tanlovda o‘zi yangidan yuklanadi.
+    async def reload(self, names=None):
+        self.discover()
+        names = list(self._banks) if names is None else [name for name in names if name in self._paths]
+        loop = asyncio.get_running_loop()
+        reloaded = []
+        for name in names:
+            try:
+                bank, version = await loop.run_in_executor(None, self._load_versioned, self._paths[name])
+            except Exception as e:
+                logger.error(f"Savollar bankini qayta yuklashda xato: {name} ({e})")
+                continue
+            if not bank:
+                logger.error(f"Qayta yuklangan bank bo‘sh, eski versiya qoldirildi: {name}")
+                continue
+            self._put(name, bank, version)
+            reloaded.append(name)
+            logger.info(f"Savollar banki qayta yuklandi: {name} ({len(bank)} ta savol)")
+        return reloaded
+
+    # Fayllarni vaqti-vaqti bilan tekshirib, o‘zgarganlarini qayta yuklash
+    async def watch(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = self.changed()
+                if changed:
+                    await self.reload(changed)
+            except Exception as e:
+                logger.error(f"Savollar fayllarini kuzatishda xato: {e}")
+
+    def _evict(self):
+        while len(self._banks) > 1 and self.memory_used() > self.memory_budget:
+            name, _ = self._banks.popitem(last=False)
+            self._sizes.pop(name, None)
+            self._versions.pop(name, None)
+            self.evictions += 1
+            logger.info(f"Savollar banki xotiradan chiqarildi: {name}")
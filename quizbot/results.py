@@ -0,0 +1,119 @@
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def board_key(bank, mode, group_number=None):
+    return f"{bank}:{mode}:{group_number}" if group_number else f"{bank}:{mode}"
+
+
+# Yakunlangan sessiyalar tarixi va eng yaxshi natijalar (SQLite). results
+# jadvali foydalanuvchi bo‘yicha indekslangan, best jadvalida har bir
+# reyting (bank + rejim [+ guruh]) va foydalanuvchi uchun bittadan yozuv.
+# Top-N best_rank indeksidan o‘qiladi; o‘rin uchun best_scores jadvalida
+# har bir reyting va ball uchun foydalanuvchilar soni turadi. Jarayon ichida
+# kesh yo‘q, shuning uchun bir nechta worker bir xil natijalarni ko‘radi.
+# Tartib: ball kamayishi, keyin kim oldin erishgan, keyin user_id.
+class ResultsStore:
+    def __init__(self, path):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="results-sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, board TEXT NOT NULL,
+                total INTEGER NOT NULL, score INTEGER NOT NULL, wrong INTEGER NOT NULL,
+                skipped INTEGER NOT NULL, finished_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_user ON results (user_id, finished_at);
+            CREATE TABLE IF NOT EXISTS best (
+                board TEXT NOT NULL, user_id INTEGER NOT NULL, name TEXT, score INTEGER NOT NULL,
+                total INTEGER NOT NULL, achieved_at REAL NOT NULL, PRIMARY KEY (board, user_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS best_rank ON best (board, score DESC, achieved_at);
+            CREATE TABLE IF NOT EXISTS best_scores (
+                board TEXT NOT NULL, score INTEGER NOT NULL, users INTEGER NOT NULL, PRIMARY KEY (board, score)
+            ) WITHOUT ROWID;
+        """)
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _top(self, board, limit):
+        return self._db.execute(
+            "SELECT user_id, score, total, achieved_at, name FROM best WHERE board = ? "
+            "ORDER BY score DESC, achieved_at, user_id LIMIT ?", (board, limit)
+        ).fetchall()
+
+    async def top(self, board, limit=10):
+        return await self.run(self._top, board, limit)
+
+    # Yuqoriroq ballar best_scores dan yig‘iladi, faqat teng ballilar indeks
+    # bo‘yicha sanaladi: narx reytingdagi o‘ringa emas, shu balldagi
+    # foydalanuvchilar soniga bog‘liq
+    def _rank(self, board, user_id):
+        row = self._db.execute("SELECT score, achieved_at FROM best WHERE board = ? AND user_id = ?",
+                               (board, user_id)).fetchone()
+        if row is None:
+            return None
+        score, achieved_at = row
+        return self._db.execute(
+            "SELECT (SELECT COALESCE(SUM(users), 0) FROM best_scores WHERE board = ?1 AND score > ?2) + "
+            "(SELECT COUNT(*) FROM best WHERE board = ?1 AND score = ?2 AND "
+            "(achieved_at < ?3 OR (achieved_at = ?3 AND user_id < ?4))) + 1",
+            (board, score, achieved_at, user_id)
+        ).fetchone()[0]
+
+    async def rank(self, board, user_id):
+        return await self.run(self._rank, board, user_id)
+
+    # IMMEDIATE: eski ballni o‘qish va best_scores ni yangilash orasida boshqa
+    # worker yozolmaydi
+    def _insert(self, user_id, name, board, total, score, wrong, skipped, finished_at):
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.execute(
+                "INSERT INTO results (user_id, board, total, score, wrong, skipped, finished_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (user_id, board, total, score, wrong, skipped, finished_at)
+            )
+            row = self._db.execute("SELECT score FROM best WHERE board = ? AND user_id = ?",
+                                   (board, user_id)).fetchone()
+            if row is not None and score <= row[0]:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO best (board, user_id, name, score, total, achieved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (board, user_id, name, score, total, finished_at)
+            )
+            if row is not None:
+                self._db.execute("UPDATE best_scores SET users = users - 1 WHERE board = ? AND score = ?",
+                                 (board, row[0]))
+            self._db.execute(
+                "INSERT INTO best_scores (board, score, users) VALUES (?, ?, 1) "
+                "ON CONFLICT(board, score) DO UPDATE SET users = users + 1",
+                (board, score)
+            )
+
+    async def record(self, user_id, name, board, total, score, wrong, skipped):
+        await self.run(self._insert, user_id, name, board, total, score, wrong, skipped, time.time())
+
+    def _user_stats(self, user_id, recent):
+        summary = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(total), 0), COALESCE(SUM(score), 0), COALESCE(SUM(wrong), 0), "
+            "COALESCE(SUM(skipped), 0) FROM results WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        last = self._db.execute(
+            "SELECT board, total, score, finished_at FROM results WHERE user_id = ? "
+            "ORDER BY finished_at DESC LIMIT ?", (user_id, recent)
+        ).fetchall()
+        return summary, [(*row, self._rank(row[0], user_id)) for row in last]
+
+    async def user_stats(self, user_id, recent=5):
+        return await self.run(self._user_stats, user_id, recent)
+
+    async def close(self):
+        await self.run(self._db.close)
+        self._executor.shutdown()
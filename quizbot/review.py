@@ -0,0 +1,195 @@
+import asyncio
+import heapq
+import logging
+import sqlite3
+import struct
+import time
+import zlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Javob natijasining SM-2 bahosi (0-5)
+QUALITY = {"correct": 4, "wrong": 1, "skipped": 0}
+RELEARN_MINUTES = 10  # Xato javobdan keyin savol shu vaqtdan so‘ng qaytadi
+DAY_MINUTES = 24 * 60
+EASE_MIN = 130  # Osonlik koeffitsiyenti 100 ga ko‘paytirilgan holda
+EASE_START = 250
+DECK_HEADER = struct.Struct("<II16s")  # savollar soni, keyingi yangi savol, bank tartibi (layout)
+
+
+def now_minutes():
+    return int(time.time() // 60)
+
+
+# Bitta foydalanuvchining bitta bank bo‘yicha SM-2 holati. Har bir savol uchun
+# zich massivlar: osonlik (1 bayt), ketma-ket to‘g‘ri javoblar (1 bayt),
+# interval va keyingi muddat (daqiqalarda, 4 baytdan). due == 0 - hali
+# ko‘rilmagan savol. Muddatlar min-heapda turadi: keyingi savol O(log n) da
+# topiladi, eskirgan heap yozuvlari olishda tashlab ketiladi. layout - holat
+# qaysi bank tartibiga (QuestionBank.layout) mos ekani.
+class ReviewDeck:
+    __slots__ = ("ease", "reps", "interval", "due", "next_new", "layout", "_heap")
+
+    def __init__(self, ease, reps, interval, due, next_new, layout):
+        self.ease = ease
+        self.reps = reps
+        self.interval = interval
+        self.due = due
+        self.next_new = next_new
+        self.layout = layout
+        self._heap = [(d, i) for i, d in enumerate(due) if d]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def new(cls, size, layout):
+        return cls(array("B", bytes(size)), array("B", bytes(size)),
+                   array("I", bytes(4 * size)), array("I", bytes(4 * size)), 0, layout)
+
+    def __len__(self):
+        return len(self.due)
+
+    # Bank tartibi o‘zgarganda holatni savol kalitlari bo‘yicha yangi
+    # pozitsiyalarga ko‘chirish: old_keys - deck yozilgan paytdagi, keys -
+    # hozirgi bank kalitlari. Olib tashlangan savollar holati tashlanadi,
+    # yangi savollar hali ko‘rilmagan bo‘ladi.
+    def remap(self, old_keys, keys, layout):
+        positions = {key: idx for idx, key in enumerate(old_keys) if idx < len(self)}
+        deck = ReviewDeck.new(len(keys), layout)
+        for idx, key in enumerate(keys):
+            old = positions.get(key)
+            if old is not None:
+                deck.ease[idx], deck.reps[idx] = self.ease[old], self.reps[old]
+                deck.interval[idx], deck.due[idx] = self.interval[old], self.due[old]
+        while deck.next_new < len(deck) and deck.due[deck.next_new]:
+            deck.next_new += 1
+        deck._heap = [(d, i) for i, d in enumerate(deck.due) if d]
+        heapq.heapify(deck._heap)
+        return deck
+
+    def next(self, now):
+        heap = self._heap
+        while heap and self.due[heap[0][1]] != heap[0][0]:
+            heapq.heappop(heap)
+        if heap and heap[0][0] <= now:
+            return heap[0][1]
+        if self.next_new < len(self):
+            return self.next_new
+        return None
+
+    def next_due(self):
+        heap = self._heap
+        while heap and self.due[heap[0][1]] != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def review(self, idx, result, now):
+        quality = QUALITY[result]
+        if self.due[idx] == 0:
+            self.ease[idx] = EASE_START - EASE_MIN
+            if idx == self.next_new:
+                self.next_new += 1
+                while self.next_new < len(self) and self.due[self.next_new]:
+                    self.next_new += 1
+        ease = self.ease[idx] + EASE_MIN
+        if quality < 3:
+            self.reps[idx] = 0
+            interval = RELEARN_MINUTES
+        else:
+            reps = min(self.reps[idx] + 1, 255)
+            self.reps[idx] = reps
+            if reps == 1:
+                interval = DAY_MINUTES
+            elif reps == 2:
+                interval = 6 * DAY_MINUTES
+            else:
+                interval = self.interval[idx] * ease // 100
+        ease += 10 - (5 - quality) * (8 + (5 - quality) * 2)
+        self.ease[idx] = min(255, max(0, ease - EASE_MIN))
+        self.interval[idx] = min(interval, 0xFFFFFFFF - now)
+        self.due[idx] = now + self.interval[idx]
+        heapq.heappush(self._heap, (self.due[idx], idx))
+
+    def to_bytes(self):
+        return zlib.compress(
+            DECK_HEADER.pack(len(self), self.next_new, self.layout)
+            + self.ease.tobytes() + self.reps.tobytes() + self.interval.tobytes() + self.due.tobytes(),
+            1
+        )
+
+    @classmethod
+    def from_bytes(cls, blob):
+        data = zlib.decompress(blob)
+        size, next_new, layout = DECK_HEADER.unpack_from(data)
+        offset = DECK_HEADER.size
+        columns = []
+        for typecode in ("B", "B", "I", "I"):
+            column = array(typecode)
+            column.frombytes(data[offset:offset + column.itemsize * size])
+            offset += column.itemsize * size
+            columns.append(column)
+        return cls(*columns, next_new, layout)
+
+
+# Takrorlash holatlari uchun SQLite saqlagich: (user_id, bank) bo‘yicha
+# siqilgan bitta blob. layouts jadvalida har bir bank tartibining savol
+# kalitlari bir marta saqlanadi - bank o‘zgargandan keyin eski deck shu
+# kalitlar orqali yangi pozitsiyalarga ko‘chiriladi. Barcha chaqiruvlar
+# bitta fon oqimida bajariladi.
+class ReviewStore:
+    def __init__(self, path):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reviews-sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS decks (user_id INTEGER, bank TEXT, data BLOB NOT NULL, "
+            "PRIMARY KEY (user_id, bank)) WITHOUT ROWID"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS layouts (layout BLOB PRIMARY KEY, keys BLOB NOT NULL)")
+        self._layouts = set()  # Shu jarayonda yozilgan tartiblar
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _select(self, user_id, bank):
+        row = self._db.execute("SELECT data FROM decks WHERE user_id = ? AND bank = ?", (user_id, bank)).fetchone()
+        return row[0] if row else None
+
+    def _save_layout(self, layout, keys):
+        self._db.execute("INSERT OR IGNORE INTO layouts (layout, keys) VALUES (?, ?)", (layout, keys))
+
+    def _layout_keys(self, layout):
+        row = self._db.execute("SELECT keys FROM layouts WHERE layout = ?", (layout,)).fetchone()
+        return array("q", row[0]) if row else None
+
+    # Foydalanuvchi deckini joriy bank tartibida qaytarish (yo‘q bo‘lsa None)
+    async def load(self, user_id, bank_name, bank):
+        layout = bank.layout()
+        if layout not in self._layouts:
+            await self.run(self._save_layout, layout, bank.keys().tobytes())
+            self._layouts.add(layout)
+        blob = await self.run(self._select, user_id, bank_name)
+        if blob is None:
+            return None
+        deck = ReviewDeck.from_bytes(blob)
+        if deck.layout == layout:
+            return deck
+        old_keys = await self.run(self._layout_keys, deck.layout)
+        if old_keys is None:
+            logger.warning(f"Takrorlash holati eski bank tartibiga tegishli, qayta boshlanadi: "
+                           f"user_id={user_id}, bank={bank_name}")
+            return ReviewDeck.new(len(bank), layout)
+        return deck.remap(old_keys, bank.keys(), layout)
+
+    async def save(self, user_id, bank, deck):
+        await self.run(
+            self._db.execute,
+            "INSERT OR REPLACE INTO decks (user_id, bank, data) VALUES (?, ?, ?)",
+            (user_id, bank, deck.to_bytes())
+        )
+
+    async def close(self):
+        await self.run(self._db.close)
+        self._executor.shutdown()
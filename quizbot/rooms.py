@@ -0,0 +1,109 @@
+import asyncio
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Guruh chatidagi quiz: har bir savol uchun bitta poll, unga ko‘p o‘quvchi
+# javob beradi. Hisoblar oddiy lug‘atlarda: javob qayta ishlash await siz
+# bajariladi, shuning uchun hodisalar tsiklida qulf kerak emas.
+class Room:
+    __slots__ = ("chat_id", "owner_id", "bank_name", "bank", "questions", "time_limit", "position",
+                 "poll_id", "question_idx", "correct_option", "answered", "correct", "answers", "names",
+                 "board_message_id", "board")
+
+    def __init__(self, chat_id, owner_id, bank_name, bank, questions, time_limit):
+        self.chat_id = chat_id
+        self.owner_id = owner_id
+        self.bank_name = bank_name
+        self.bank = bank
+        self.questions = questions  # Savollar indekslari, berilish tartibida
+        self.time_limit = time_limit
+        self.position = 0  # Nechta savol yuborilgan
+        self.poll_id = None
+        self.question_idx = None
+        self.correct_option = None
+        self.answered = set()  # Joriy savolga javob berganlar
+        self.correct = {}  # user_id -> to‘g‘ri javoblar
+        self.answers = {}  # user_id -> jami javoblar
+        self.names = {}
+        self.board_message_id = None
+        self.board = None  # CoalescedEdit
+
+    def finished(self):
+        return self.position >= len(self.questions)
+
+    def open_question(self, poll_id, question_idx, correct_option):
+        self.position += 1
+        self.poll_id = poll_id
+        self.question_idx = question_idx
+        self.correct_option = correct_option
+        self.answered = set()
+
+    def answer(self, poll_id, user_id, name, option):
+        if poll_id != self.poll_id or user_id in self.answered:
+            return None
+        self.answered.add(user_id)
+        self.names[user_id] = name
+        self.answers[user_id] = self.answers.get(user_id, 0) + 1
+        if option == self.correct_option:
+            self.correct[user_id] = self.correct.get(user_id, 0) + 1
+            return "correct"
+        return "wrong"
+
+    def standings(self, limit=10):
+        return heapq.nsmallest(limit, self.answers,
+                               key=lambda user_id: (-self.correct.get(user_id, 0), self.answers[user_id], user_id))
+
+    def render(self, title, limit=10):
+        lines = [f"{title} ({self.bank_name}, savol {self.position}/{len(self.questions)})",
+                 f"👥 Qatnashchilar: {len(self.answers)} | joriy savolga javoblar: {len(self.answered)}"]
+        for place, user_id in enumerate(self.standings(limit), 1):
+            lines.append(f"{place}. {self.names.get(user_id) or 'Foydalanuvchi'} — "
+                         f"{self.correct.get(user_id, 0)}/{self.answers[user_id]}")
+        return "\n".join(lines)
+
+
+# Tez-tez o‘zgaradigan xabarni ko‘pi bilan interval soniyada bir marta
+# yangilash: oradagi barcha o‘zgarishlar bitta flush() chaqiruviga
+# (edit_message_text) birlashadi. flush paytida kelgan o‘zgarish keyingi
+# oraliqda yoziladi.
+class CoalescedEdit:
+    def __init__(self, interval, flush):
+        self.interval = interval
+        self.edits = 0
+        self.coalesced = 0  # Alohida tahrir talab qilmagan o‘zgarishlar
+        self._flush = flush
+        self._task = None
+        self._last = None
+
+    def touch(self):
+        if self._task is not None:
+            self.coalesced += 1
+            return
+        loop = asyncio.get_running_loop()
+        delay = 0 if self._last is None else max(0.0, self._last + self.interval - loop.time())
+        self._task = loop.create_task(self._run(delay))
+
+    async def _run(self, delay):
+        await asyncio.sleep(delay)
+        self._task = None
+        self._last = asyncio.get_running_loop().time()
+        self.edits += 1
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.warning(f"Xabarni yangilashda xato: {e}")
+
+    # Kutilayotgan yangilanishni darhol yozish (masalan, quiz tugaganda)
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        self.edits += 1
+        try:
+            await self._flush()
+        except Exception as e:
+            logger.warning(f"Xabarni yangilashda xato: {e}")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector, web
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+# Update qaysi foydalanuvchiga tegishli ekanini aniqlash. Bir foydalanuvchining
+# barcha updatelari (xabarlar, poll javoblari) bitta workerga tushishi kerak,
+# chunki uning sessiyasi va timeout vazifasi o‘sha jarayonda turadi.
+def shard_key(update):
+    for field, value in update.items():
+        if not isinstance(value, dict):
+            continue
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+        chat = value.get("chat") or value.get("voter_chat")
+        if chat:
+            return chat["id"]
+        if field == "poll":
+            return int.from_bytes(value["id"].encode()[-8:], "big")
+    return update.get("update_id", 0)
+
+
+# Workerlarni alohida jarayonlarda ishga tushirish: har biri o‘z portida
+# oddiy webhook serverini ko‘taradi (WORKER_INDEX muhit o‘zgaruvchisi bilan)
+def spawn_workers(script, count, base_port):
+    processes = []
+    for index in range(count):
+        env = dict(os.environ, WORKER_INDEX=str(index), PORT=str(base_port + index))
+        processes.append(subprocess.Popen([sys.executable, script], env=env))
+        logger.info(f"Worker ishga tushirildi: index={index}, port={base_port + index}")
+    return processes
+
+
+# Boshqaruv buyrug‘ini (masalan, /reload) barcha workerlarga yuborish:
+# har bir manzil uchun javob JSONi, xato bo‘lsa None qaytariladi
+async def broadcast(urls, timeout=60):
+    async def post(session, url):
+        try:
+            async with session.post(url) as response:
+                response.raise_for_status()
+                return await response.json()
+        except (ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.error(f"Workerga buyruq yuborishda xato: {url} ({e})")
+            return None
+
+    async with ClientSession(timeout=ClientTimeout(total=timeout)) as session:
+        return await asyncio.gather(*(post(session, url) for url in urls))
+
+
+def create_router_app(path, worker_urls, secret_token=""):
+    app = web.Application()
+    sessions = []
+
+    async def on_startup(app):
+        sessions.append(ClientSession(
+            connector=TCPConnector(limit=0, keepalive_timeout=60),
+            timeout=ClientTimeout(total=60)
+        ))
+
+    async def on_cleanup(app):
+        for session in sessions:
+            await session.close()
+
+    async def handle(request):
+        if secret_token and request.headers.get(SECRET_HEADER) != secret_token:
+            return web.Response(status=401)
+        body = await request.read()
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return web.Response(status=400)
+        worker_url = worker_urls[shard_key(update) % len(worker_urls)]
+        headers = {"Content-Type": "application/json"}
+        if secret_token:
+            headers[SECRET_HEADER] = secret_token
+        try:
+            async with sessions[0].post(worker_url, data=body, headers=headers) as response:
+                return web.Response(
+                    status=response.status,
+                    body=await response.read(),
+                    content_type=response.content_type
+                )
+        except (ClientError, asyncio.TimeoutError) as e:
+            # Telegram updateni keyinroq qayta yuboradi
+            logger.error(f"Workerga yuborishda xato: {worker_url} ({e})")
+            return web.Response(status=503)
+
+    app.router.add_post(path, handle)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
@@ -0,0 +1,140 @@
+import random
+from array import array
+
+RESULTS = ("correct", "wrong", "skipped")
+
+
+# Random rejim uchun savol tanlovchi: Fisher–Yates aralashtirishi dangasa
+# tarzda, har bir savol so‘ralganda bir qadam bajariladi. Faqat almashtirilgan
+# pozitsiyalar lug‘atda saqlanadi, shuning uchun har bir tanlov O(1).
+class QuestionSampler:
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.drawn = 0
+        self._swaps = {}
+        self._random = rng or random.Random()
+
+    def remaining(self):
+        return self.size - self.drawn
+
+    def draw(self):
+        if self.drawn >= self.size:
+            return None
+        i = self.drawn
+        j = self._random.randrange(i, self.size)
+        value = self._swaps.get(j, j)
+        self._swaps[j] = self._swaps.pop(i, i)
+        self.drawn += 1
+        return value
+
+    # Sessiyani saqlash uchun holat: qolgan savollar to‘plamini to‘liq
+    # aniqlaydi, tasodifiy generator holati esa saqlanmaydi
+    def state(self):
+        return [self.size, self.drawn, [x for pair in self._swaps.items() for x in pair]]
+
+    @classmethod
+    def from_state(cls, state, rng=None):
+        size, drawn, swaps = state
+        sampler = cls(size, rng)
+        sampler.drawn = drawn
+        sampler._swaps = dict(zip(swaps[::2], swaps[1::2]))
+        return sampler
+
+
+# Savollarni qiyinlik bo‘yicha guruhlarga (bucket) ajratuvchi indeks. Har bir
+# savol uchun to‘g‘ri/noto‘g‘ri/o‘tkazib yuborilgan hisoblagichlar turadi;
+# javobdan keyin faqat shu savol kerak bo‘lsa boshqa guruhga ko‘chiriladi
+# (guruh oxiridagi element bilan almashtirib) - O(1), qayta hisoblashsiz.
+class DifficultyIndex:
+    def __init__(self, size, buckets=5, counts=None):
+        self.size = size
+        self.buckets = buckets
+        self.counts = counts if counts is not None else array("I", bytes(12 * size))  # [c, w, s] * size
+        self._bucket_of = array("B", bytes(size))
+        self._position = array("I", bytes(4 * size))
+        self._members = [[] for _ in range(buckets)]
+        for idx in range(size):
+            bucket = self._bucket(idx)
+            self._bucket_of[idx] = bucket
+            self._position[idx] = len(self._members[bucket])
+            self._members[bucket].append(idx)
+
+    # To‘g‘ri javoblar ulushi Laplace tekislashi bilan: ma’lumotsiz savol o‘rtada
+    def _bucket(self, idx):
+        correct, wrong, skipped = self.counts[3 * idx:3 * idx + 3]
+        rate = (correct + 1) / (correct + wrong + skipped + 2)
+        return min(self.buckets - 1, int((1 - rate) * self.buckets))
+
+    def members(self, bucket):
+        return self._members[bucket]
+
+    def bucket_of(self, idx):
+        return self._bucket_of[idx]
+
+    def record(self, idx, result):
+        self.counts[3 * idx + RESULTS.index(result)] += 1
+        old, new = self._bucket_of[idx], self._bucket(idx)
+        if old == new:
+            return
+        members = self._members[old]
+        last = members.pop()
+        if last != idx:
+            position = self._position[idx]
+            members[position] = last
+            self._position[last] = position
+        self._bucket_of[idx] = new
+        self._position[idx] = len(self._members[new])
+        self._members[new].append(idx)
+
+
+# Moslashuvchan Random rejim: o‘quvchi darajasi to‘g‘ri javobda oshadi,
+# xato yoki o‘tkazib yuborishda pasayadi; savol shu darajadagi guruhdan
+# tasodifiy olinadi. Takrorlanmaslik uchun so‘ralgan savollar saqlanadi.
+class AdaptiveSampler:
+    STEP = 0.5
+    ATTEMPTS = 8
+
+    def __init__(self, size, buckets=5, rng=None):
+        self.size = size
+        self.buckets = buckets
+        self.level = (buckets - 1) / 2
+        self.asked = set()
+        self._random = rng or random.Random()
+
+    def remaining(self):
+        return self.size - len(self.asked)
+
+    def draw(self, index):
+        if len(self.asked) >= self.size:
+            return None
+        target = min(self.buckets - 1, max(0, round(self.level)))
+        order = sorted(range(self.buckets), key=lambda bucket: abs(bucket - target))
+        for bucket in order:
+            members = index.members(bucket)
+            for _ in range(min(self.ATTEMPTS, len(members))):
+                idx = members[self._random.randrange(len(members))]
+                if idx not in self.asked:
+                    self.asked.add(idx)
+                    return idx
+        # Guruhlar deyarli to‘liq so‘ralgan bo‘lsa - yaqin guruhdan birinchi bo‘sh savol
+        for bucket in order:
+            for idx in index.members(bucket):
+                if idx not in self.asked:
+                    self.asked.add(idx)
+                    return idx
+        return None
+
+    def record(self, result):
+        step = self.STEP if result == "correct" else -self.STEP
+        self.level = min(self.buckets - 1, max(0, self.level + step))
+
+    def state(self):
+        return ["adaptive", self.size, self.buckets, self.level, sorted(self.asked)]
+
+    @classmethod
+    def from_state(cls, state, rng=None):
+        _, size, buckets, level, asked = state
+        sampler = cls(size, buckets, rng)
+        sampler.level = level
+        sampler.asked = set(asked)
+        return sampler
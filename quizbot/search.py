@@ -0,0 +1,132 @@
+import bisect
+import re
+import sys
+from array import array
+
+TOKEN = re.compile(r"\w+")
+APOSTROPHES = str.maketrans("", "", "‘’'ʻʼ`")  # o‘zgaruvchi -> ozgaruvchi
+MIN_TERM = 2
+MIN_PREFIX = 3
+MAX_PREFIX_TERMS = 64
+MIN_FUZZY = 4
+
+# Maydon og‘irliklari: teg savol matnidan, savol matni variantlardan muhimroq
+TAG_WEIGHT = 3
+QUESTION_WEIGHT = 2
+OPTION_WEIGHT = 1
+
+
+def tokenize(text):
+    return [term for term in TOKEN.findall(text.lower().translate(APOSTROPHES)) if len(term) >= MIN_TERM]
+
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+# Damerau-Levenshtein masofasi 1 dan oshmaydimi (almashtirish, qo‘shish,
+# o‘chirish yoki yonma-yon harflar o‘rni almashishi)
+def _within_one(a, b):
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i + 1::-1][:2] and a[i + 2:] == b[i + 2:])
+    return a[i:] == b[i + 1:]
+
+
+# Bank ustidan teskari indeks: atama -> savollar ro‘yxati (og‘irligi bilan).
+# Saralangan lug‘at prefiks qidiruvini bisect bilan, o‘chirishlar lug‘ati
+# (SymSpell usuli) esa bitta xatoli qidiruvni to‘liq ko‘rib chiqishsiz beradi.
+class SearchIndex:
+    __slots__ = ("_postings", "_weights", "_vocabulary", "_deletes")
+
+    def __init__(self, postings, weights, deletes):
+        self._postings = postings  # atama -> array("I") savol indekslari
+        self._weights = weights  # atama -> array("B") mos og‘irliklar
+        self._vocabulary = sorted(postings)
+        self._deletes = deletes  # o‘chirilgan variant -> atamalar
+
+    @classmethod
+    def build(cls, bank):
+        terms = {}
+        for idx in range(len(bank)):
+            fields = [(bank.question(idx), QUESTION_WEIGHT), (" ".join(bank.tags(idx)), TAG_WEIGHT)]
+            fields.extend((option, OPTION_WEIGHT) for option in bank.options(idx))
+            for text, weight in fields:
+                for term in tokenize(text):
+                    entry = terms.setdefault(term, {})
+                    if entry.get(idx, 0) < weight:
+                        entry[idx] = weight
+        postings, weights, deletes = {}, {}, {}
+        for term, entry in terms.items():
+            term = sys.intern(term)
+            indexes = sorted(entry)
+            postings[term] = array("I", indexes)
+            weights[term] = array("B", (entry[idx] for idx in indexes))
+            if len(term) >= MIN_FUZZY:
+                for variant in _deletions(term):
+                    deletes.setdefault(variant, []).append(term)
+        return cls(postings, weights, deletes)
+
+    def __len__(self):
+        return len(self._postings)
+
+    def nbytes(self):
+        return sum(
+            sys.getsizeof(term) + memoryview(self._postings[term]).nbytes + memoryview(self._weights[term]).nbytes
+            for term in self._vocabulary
+        )
+
+    def _prefixed(self, prefix):
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = min(start + MAX_PREFIX_TERMS, len(vocabulary))
+        return [term for term in vocabulary[start:end] if term.startswith(prefix)]
+
+    def _fuzzy(self, term):
+        candidates = set(self._deletes.get(term, ()))
+        for variant in _deletions(term):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))
+        return [candidate for candidate in candidates if _within_one(term, candidate)]
+
+    # Bitta so‘rov atamasiga mos savollar: aniq moslik, prefiks, topilmasa
+    # bitta xato bilan. Taxminiy mosliklar og‘irligi kamroq.
+    def _match(self, term):
+        matched = [term] if term in self._postings else []
+        if len(term) >= MIN_PREFIX:
+            matched.extend(other for other in self._prefixed(term) if other != term)
+        fuzzy = False
+        if not matched and len(term) >= MIN_FUZZY:
+            matched = self._fuzzy(term)
+            fuzzy = True
+        scores = {}
+        for other in matched:
+            bonus = 2 if other == term else 1
+            for idx, weight in zip(self._postings[other], self._weights[other]):
+                score = weight * bonus if not fuzzy else weight
+                if scores.get(idx, 0) < score:
+                    scores[idx] = score
+        return scores
+
+    # Natija: savol indekslari - avval barcha atamalarga mos kelganlar,
+    # keyin ko‘proq atamaga mos kelganlar; teng bo‘lsa og‘irlik va tartib
+    def search(self, query, limit=None):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        hits = {}
+        for term in terms:
+            for idx, score in self._match(term).items():
+                count, total = hits.get(idx, (0, 0))
+                hits[idx] = (count + 1, total + score)
+        ranked = sorted(hits, key=lambda idx: (-hits[idx][0], -hits[idx][1], idx))
+        return ranked[:limit] if limit is not None else ranked
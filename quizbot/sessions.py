@@ -0,0 +1,239 @@
+import asyncio
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage
+
+from quizbot.sampler import AdaptiveSampler, QuestionSampler
+
+logger = logging.getLogger(__name__)
+
+# Sessiya qat’iy tartibdagi JSON massiv sifatida saqlanadi (kalit nomlarisiz).
+# Yangi maydonlar faqat oxiriga qo‘shiladi; eski yozuvlarda yo‘q maydonlar None bo‘ladi.
+# Bank obyekti, timeout vazifasi kabi jarayon ichidagi qiymatlar saqlanmaydi,
+# faqat bank tartibi (layout) yoziladi: sessiyadagi savol pozitsiyalari shu
+# tartibga tegishli.
+SESSION_FIELDS = (
+    "bank_name", "mode", "score", "wrong", "skipped", "question_count",
+    "question_idx", "permutation", "poll_id", "time_limit", "consecutive_skips",
+    "poll_message_id", "start_index", "group_number", "sampler", "chat_id",
+    "last_result", "name", "topic_questions", "layout",
+)
+
+
+def encode_session(session):
+    values = []
+    for field in SESSION_FIELDS:
+        value = session.get(field)
+        if field == "sampler" and value is not None:
+            value = value.state()
+        elif field == "layout" and session.get("bank") is not None:
+            value = session["bank"].layout().hex()
+        values.append(value)
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_session(blob):
+    session = dict(zip(SESSION_FIELDS, json.loads(blob)))
+    for field in SESSION_FIELDS:
+        session.setdefault(field, None)
+    if session["permutation"] is not None:
+        session["permutation"] = tuple(session["permutation"])
+    if session["sampler"] is not None:
+        state = session["sampler"]
+        sampler_type = AdaptiveSampler if state[0] == "adaptive" else QuestionSampler
+        session["sampler"] = sampler_type.from_state(state)
+    return session
+
+
+# Tiklangan sessiya shu bankka mosmi: bank fayli saqlashdan keyin o‘zgargan
+# bo‘lsa, question_idx, permutation, sampler va topic_questions boshqa
+# savollarni ko‘rsatadi (yoki bank chegarasidan chiqadi)
+def fits_bank(session, bank):
+    return session["layout"] == bank.layout().hex()
+
+
+# Jarayon ichidagi saqlagich: qayta ishga tushirishda hammasi yo‘qoladi.
+# persistent=False bo‘lgani uchun bot uni umuman chaqirmaydi.
+class MemorySessionStore:
+    persistent = False
+
+    def __init__(self):
+        self._sessions = {}
+
+    async def load(self, user_id):
+        blob = self._sessions.get(user_id)
+        return decode_session(blob) if blob is not None else None
+
+    async def save(self, user_id, session):
+        self._sessions[user_id] = encode_session(session)
+
+    async def delete(self, user_id):
+        self._sessions.pop(user_id, None)
+
+    async def close(self):
+        pass
+
+
+# SQLite saqlagichi: yozuvlar xotirada yig‘ilib, flush_interval soniyada bir
+# marta bitta tranzaksiyada yoziladi (0 bo‘lsa har bir saqlashda darhol).
+# Barcha SQLite chaqiruvlari bitta fon oqimida navbat bilan bajariladi.
+class SQLiteSessionStore:
+    persistent = True
+
+    def __init__(self, path, flush_interval=1.0):
+        self.flush_interval = flush_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sessions-sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (user_id INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS fsm (key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}')")
+        self._dirty = {}  # user_id -> kodlangan sessiya yoki None (o‘chirish)
+        self._flush_task = None
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def execute(self, sql, params=()):
+        return self._db.execute(sql, params).fetchall()
+
+    async def load(self, user_id):
+        if user_id in self._dirty:
+            blob = self._dirty[user_id]
+        else:
+            rows = await self.run(self.execute, "SELECT data FROM sessions WHERE user_id = ?", (user_id,))
+            blob = rows[0][0] if rows else None
+        return decode_session(blob) if blob is not None else None
+
+    async def save(self, user_id, session):
+        self._dirty[user_id] = encode_session(session)
+        await self._schedule_flush()
+
+    async def delete(self, user_id):
+        self._dirty[user_id] = None
+        await self._schedule_flush()
+
+    async def _schedule_flush(self):
+        if self.flush_interval <= 0:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Sessiyalarni yozishda xato: {e}")
+
+    async def flush(self):
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        await self.run(self._write, batch)
+
+    def _write(self, batch):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO sessions (user_id, data) VALUES (?, ?)",
+                [(user_id, blob) for user_id, blob in batch.items() if blob is not None]
+            )
+            self._db.executemany(
+                "DELETE FROM sessions WHERE user_id = ?",
+                [(user_id,) for user_id, blob in batch.items() if blob is None]
+            )
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self.run(self._db.close)
+        self._executor.shutdown()
+
+
+# Redis mijozi: ulanishlar puli to‘lsa so‘rov bo‘shagan ulanishni kutadi
+# (oddiy pul max_connections dan oshganda MaxConnectionsError ko‘taradi).
+# "redis" paketi ixtiyoriy.
+def redis_client(url, max_connections=50):
+    try:
+        from redis.asyncio import BlockingConnectionPool, Redis
+    except ImportError as e:
+        raise RuntimeError("SESSION_BACKEND=redis uchun 'redis' paketini o‘rnating") from e
+    return Redis.from_pool(BlockingConnectionPool.from_url(url, max_connections=max_connections))
+
+
+# Redis saqlagichi: har bir saqlash darhol yoziladi, bir nechta jarayon
+# bitta Redis bilan ishlashi mumkin.
+class RedisSessionStore:
+    persistent = True
+
+    def __init__(self, url, ttl=24 * 60 * 60, prefix="quizbot:session:"):
+        self.ttl = ttl
+        self.prefix = prefix
+        self.redis = redis_client(url)
+
+    async def load(self, user_id):
+        blob = await self.redis.get(f"{self.prefix}{user_id}")
+        return decode_session(blob) if blob is not None else None
+
+    async def save(self, user_id, session):
+        await self.redis.set(f"{self.prefix}{user_id}", encode_session(session), ex=self.ttl)
+
+    async def delete(self, user_id):
+        await self.redis.delete(f"{self.prefix}{user_id}")
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+# aiogram FSM holatlarini sessiyalar bilan bir SQLite faylida saqlash
+class SQLiteFSMStorage(BaseStorage):
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def _key(key):
+        return f"{key.bot_id}:{key.chat_id}:{key.user_id}:{key.thread_id}:{key.business_connection_id}:{key.destiny}"
+
+    async def set_state(self, key, state=None):
+        state = state.state if isinstance(state, State) else state
+        await self.store.run(
+            self.store.execute,
+            "INSERT INTO fsm (key, state) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET state = excluded.state",
+            (self._key(key), state)
+        )
+
+    async def get_state(self, key):
+        rows = await self.store.run(self.store.execute, "SELECT state FROM fsm WHERE key = ?", (self._key(key),))
+        return rows[0][0] if rows else None
+
+    async def set_data(self, key, data):
+        await self.store.run(
+            self.store.execute,
+            "INSERT INTO fsm (key, data) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET data = excluded.data",
+            (self._key(key), json.dumps(data, ensure_ascii=False))
+        )
+
+    async def get_data(self, key):
+        rows = await self.store.run(self.store.execute, "SELECT data FROM fsm WHERE key = ?", (self._key(key),))
+        return json.loads(rows[0][0]) if rows else {}
+
+    async def close(self):
+        pass
+
+
+def create_session_store(backend, sqlite_path="sessions.sqlite3", redis_url=None, flush_interval=1.0):
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(sqlite_path, flush_interval)
+    if backend == "redis":
+        return RedisSessionStore(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Noma’lum SESSION_BACKEND: {backend}")
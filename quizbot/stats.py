@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import sqlite3
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from quizbot.sampler import RESULTS, DifficultyIndex
+
+logger = logging.getLogger(__name__)
+
+UPSERT = (
+    "INSERT INTO question_counts (bank, key, correct, wrong, skipped) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT(bank, key) DO UPDATE SET correct = correct + excluded.correct, "
+    "wrong = wrong + excluded.wrong, skipped = skipped + excluded.skipped"
+)
+
+
+# Har bir savol bo‘yicha umumiy hisoblagichlar (to‘g‘ri, noto‘g‘ri, o‘tkazib
+# yuborilgan). Javoblar xotiradagi indeksni darhol yangilaydi, SQLite ga esa
+# o‘zgarishlar yig‘ilib flush_interval soniyada bir marta qo‘shiladi.
+# Hisoblagichlar savolning barqaror kaliti (QuestionBank.keys) bo‘yicha
+# saqlanadi: bank qayta yuklanib savollar surilsa ham statistika o‘z
+# savolida qoladi, indeks esa yangi tartib uchun qayta quriladi.
+class QuestionStats:
+    def __init__(self, path, flush_interval=5.0, buckets=5):
+        self.flush_interval = flush_interval
+        self.buckets = buckets
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats-sqlite")
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS question_counts (bank TEXT, key INTEGER, correct INTEGER NOT NULL, "
+            "wrong INTEGER NOT NULL, skipped INTEGER NOT NULL, PRIMARY KEY (bank, key)) WITHOUT ROWID"
+        )
+        self._indexes = {}  # bank -> (layout, DifficultyIndex)
+        self._pending = {}  # (bank, kalit) -> [correct, wrong, skipped]
+        self._flush_task = None
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _read_counts(self, bank, keys):
+        positions = {key: idx for idx, key in enumerate(keys)}
+        counts = array("I", bytes(12 * len(keys)))
+        rows = self._db.execute("SELECT key, correct, wrong, skipped FROM question_counts WHERE bank = ?", (bank,))
+        for key, correct, wrong, skipped in rows:
+            idx = positions.get(key)
+            if idx is not None:
+                counts[3 * idx:3 * idx + 3] = array("I", (correct, wrong, skipped))
+        return counts
+
+    # bank_name bo‘yicha qiyinlik indeksi, bank obyekti tartibida
+    async def index(self, bank_name, bank):
+        layout = bank.layout()
+        cached = self._indexes.get(bank_name)
+        if cached is not None and cached[0] == layout:
+            return cached[1]
+        keys = bank.keys()
+        # Yozilmagan o‘zgarishlar o‘qishdan oldin olinadi: o‘qish bilan bir vaqtda
+        # boshlangan flush undan keyin bajariladi (bitta fon oqimi)
+        pending = [(key, tuple(delta)) for (name, key), delta in self._pending.items() if name == bank_name]
+        counts = await self.run(self._read_counts, bank_name, keys)
+        positions = {key: idx for idx, key in enumerate(keys)}
+        for key, delta in pending:
+            idx = positions.get(key)
+            if idx is not None:
+                for i, value in enumerate(delta):
+                    counts[3 * idx + i] += value
+        index = DifficultyIndex(len(bank), self.buckets, counts)
+        self._indexes[bank_name] = (layout, index)
+        return index
+
+    def record(self, bank_name, bank, idx, result):
+        cached = self._indexes.get(bank_name)
+        if cached is not None and cached[0] == bank.layout():
+            cached[1].record(idx, result)
+        key = bank.keys()[idx]
+        delta = self._pending.get((bank_name, key))
+        if delta is None:
+            delta = self._pending[(bank_name, key)] = [0, 0, 0]
+        delta[RESULTS.index(result)] += 1
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except sqlite3.Error as e:
+            logger.error(f"Savollar statistikasini yozishda xato: {e}")
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        await self.run(self._write, batch)
+
+    def _write(self, batch):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(UPSERT, [(bank, key, *delta) for (bank, key), delta in batch.items()])
+
+    async def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        await self.run(self._db.close)
+        self._executor.shutdown()
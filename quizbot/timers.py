@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+# Bitta haydovchi vazifali vaqt g‘ildiragi: har bir ochiq poll uchun alohida
+# asyncio vazifasi o‘rniga muddatlar tick bo‘yicha slotlarga joylanadi.
+# Qo‘shish va bekor qilish O(1), haydovchi esa har tickda faqat bitta slotni
+# ko‘rib chiqadi. Kalit bo‘yicha faqat bitta muddat turadi.
+class TimerWheel:
+    def __init__(self, tick=0.1, slots=1024, on_lag=None):
+        self.tick = tick
+        self.on_lag = on_lag  # Muddatdan qancha kech chaqirilganini kuzatish uchun
+        self._slots = [{} for _ in range(slots)]
+        self._handles = {}  # kalit -> slot raqami
+        self._origin = None
+        self._current = 0  # Oxirgi ko‘rib chiqilgan tick
+        self._task = None
+        self._wakeup = None
+        self._running = set()
+
+    def __len__(self):
+        return len(self._handles)
+
+    def _now_tick(self, loop):
+        return math.floor((loop.time() - self._origin) / self.tick)
+
+    def schedule(self, key, delay, callback, *args):
+        loop = asyncio.get_running_loop()
+        if self._task is None:
+            self._origin = loop.time()
+            self._current = 0
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self.cancel(key)
+        deadline = max(self._current + 1, math.ceil((loop.time() + delay - self._origin) / self.tick))
+        slot = deadline % len(self._slots)
+        self._slots[slot][key] = (deadline, callback, args)
+        self._handles[key] = slot
+        self._wakeup.set()
+
+    def cancel(self, key):
+        slot = self._handles.pop(key, None)
+        if slot is None:
+            return False
+        del self._slots[slot][key]
+        return True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._handles:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            target = self._now_tick(loop)
+            # Kechikib uyg‘ongan bo‘lsak ham har bir slot ko‘pi bilan bir marta ko‘riladi
+            for tick in range(max(self._current + 1, target - len(self._slots) + 1), target + 1):
+                self._expire(self._slots[tick % len(self._slots)], target, loop.time())
+            self._current = max(self._current, target)
+            await asyncio.sleep(max(0.0, self._origin + (target + 1) * self.tick - loop.time()))
+
+    def _expire(self, slot, target, now):
+        if not slot:
+            return
+        due = [key for key, (deadline, _, _) in slot.items() if deadline <= target]
+        for key in due:
+            deadline, callback, args = slot.pop(key)
+            del self._handles[key]
+            if self.on_lag is not None:
+                self.on_lag(max(0.0, now - self._origin - deadline * self.tick))
+            try:
+                result = callback(*args)
+                if asyncio.iscoroutine(result):
+                    task = asyncio.ensure_future(result)
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+            except Exception as e:
+                logger.error(f"Taymer chaqiruvida xato (key={key}): {e}")
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()
@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# Muddati (TTL) va hajmi cheklangan lug‘at. Yozuvlar qo‘shilish tartibida
+# turadi, shuning uchun muddati o‘tganlar va hajm chegarasidan ortganlar
+# boshidan O(1) da olib tashlanadi; o‘qishda muddati o‘tgan yozuv topilsa
+# ham darhol o‘chiriladi.
+class TTLMap:
+    def __init__(self, ttl, maxsize, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.evictions = 0  # Hajm chegarasi tufayli muddatidan oldin chiqarilganlar
+        self.expirations = 0
+        self._clock = clock
+        self._entries = OrderedDict()  # kalit -> (expires_at, qiymat)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key, value=None):
+        now = self._clock()
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        self._trim(now)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return default
+        return entry[1]
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else default
+
+    def _trim(self, now):
+        entries = self._entries
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+        while entries:
+            key, (expires_at, _) = next(iter(entries.items()))
+            if expires_at > now:
+                break
+            del entries[key]
+            self.expirations += 1
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from quizbot.campaigns import CampaignRunner, CampaignStore
+
+
+def run_campaign(tmp_path, start, subscribers=5, every=24 * 60 * 60, **options):
+    async def scenario():
+        store = CampaignStore(str(tmp_path / "campaigns.sqlite3"))
+        for user_id in range(1, subscribers + 1):
+            await store.subscribe("daily", user_id)
+        campaign_id = await store.create("daily", "demo", 10, 30, time.time(), 0, every)
+        runner = CampaignRunner(store, lambda user_id, campaign: start(store, user_id, campaign),
+                                max_rate=1000, **options)
+        [campaign] = await store.due(time.time())
+        report = await runner.deliver(campaign)
+        status = await store.status(campaign_id)
+        await store.close()
+        return report, status
+
+    return asyncio.run(scenario())
+
+
+def test_deliver_reaches_every_subscriber_and_reschedules(tmp_path):
+    started = []
+
+    async def start(store, user_id, campaign):
+        started.append(user_id)
+        return True
+
+    report, status = run_campaign(tmp_path, start, batch_size=2)
+    assert started == [1, 2, 3, 4, 5]
+    assert report.sent == 5 and report.failed == 0
+    assert status == "scheduled"
+
+
+def test_stop_during_delivery_stops_fan_out(tmp_path):
+    started = []
+
+    async def start(store, user_id, campaign):
+        started.append(user_id)
+        if user_id == 2:
+            await store.delete(campaign.id)  # /campaign stop
+        return True
+
+    report, status = run_campaign(tmp_path, start, status_interval=0)
+    assert report is None
+    assert started == [1, 2]
+    assert status == "deleted"
+
+
+def test_stop_between_batches_keeps_campaign_deleted(tmp_path):
+    started = []
+
+    async def start(store, user_id, campaign):
+        started.append(user_id)
+        if user_id == 3:
+            await store.delete(campaign.id)
+        return True
+
+    report, status = run_campaign(tmp_path, start, batch_size=3, status_interval=60)
+    assert report is None
+    assert started == [1, 2, 3]
+    assert status == "deleted"
+
+
+def test_due_campaigns_run_concurrently_within_shared_limit(tmp_path):
+    started = {"a": [], "b": []}
+    in_flight = peak = 0
+
+    async def scenario():
+        store = CampaignStore(str(tmp_path / "campaigns.sqlite3"))
+        for user_id in range(1, 7):
+            await store.subscribe("a", user_id)
+            await store.subscribe("b", 100 + user_id)
+        ids = [await store.create(name, "demo", 10, 30, time.time()) for name in ("a", "b")]
+        both = asyncio.Event()
+        reports = {}
+        finished = asyncio.Event()
+
+        async def start(user_id, campaign):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            started[campaign.list].append(user_id)
+            if started["a"] and started["b"]:
+                both.set()
+            try:
+                await asyncio.wait_for(both.wait(), 2)  # Ketma-ket yuborilsa ikkinchisi boshlanmaydi
+                return True
+            finally:
+                in_flight -= 1
+
+        async def on_report(campaign, report):
+            reports[campaign.id] = report
+            if len(reports) == 2:
+                finished.set()
+
+        runner = CampaignRunner(store, start, max_rate=1000, concurrency=3, on_report=on_report)
+        runner.start()
+        await asyncio.wait_for(finished.wait(), 10)
+        await runner.close()
+        statuses = [await store.status(campaign_id) for campaign_id in ids]
+        await store.close()
+        return [reports[campaign_id] for campaign_id in ids], statuses
+
+    reports, statuses = asyncio.run(scenario())
+    assert [(report.sent, report.failed) for report in reports] == [(6, 0), (6, 0)]
+    assert statuses == ["done", "done"]
+    assert sorted(started["a"]) == list(range(1, 7)) and sorted(started["b"]) == list(range(101, 107))
+    assert peak <= 3  # concurrency ikkala kampaniyaga umumiy
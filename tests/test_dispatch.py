@@ -0,0 +1,125 @@
+import asyncio
+import importlib
+import itertools
+import os
+from collections import defaultdict
+from types import SimpleNamespace
+
+import pytest
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp.test_utils import TestServer
+
+from quizbot.fakeapi import FakeBotAPI
+from quizbot.loadgen import make_poll_answer, make_update
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# main.py bot, dispetcher va saqlagichlarni modul darajasida quradi, shuning
+# uchun muhit import qilishdan oldin sozlanadi. Barcha testlar bitta event
+# loopda ishlaydi: chiquvchi navbat va taymer vazifalari shu loopga bog‘langan.
+@pytest.fixture(scope="module")
+def bot_app(tmp_path_factory):
+    tmp = tmp_path_factory.mktemp("bot")
+    env = {"BOT_TOKEN": "123456:ABCdef", "BANKS_DIR": ROOT, "LOG_LEVEL": "WARNING"}
+    for name in ("SESSION_DB", "REVIEW_DB", "RESULTS_DB", "QUESTION_STATS_DB", "CAMPAIGNS_DB"):
+        env[name] = str(tmp / f"{name.lower()}.sqlite3")
+    saved = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        main = importlib.import_module("main")
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+    loop = asyncio.new_event_loop()
+    sent = defaultdict(list)
+    server = TestServer(FakeBotAPI(rate=1000, chat_rate=1000, chat_burst=1000, on_send=lambda method, chat_id, result:
+                                   sent[chat_id].append((method, result))).app())
+    loop.run_until_complete(server.start_server())
+    main.bot.session.api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+    ids = itertools.count(1)
+
+    async def feed(update):
+        await main.dp.feed_raw_update(main.bot, update)
+
+    # /quiz -> Random -> 60 soniya: birinchi poll yuborilgach uni qaytaradi
+    async def start_quiz(user_id):
+        for text in ("/quiz", "Random", "60"):
+            await feed(make_update(next(ids), user_id, text))
+        return polls_sent(user_id)[-1]
+
+    def polls_sent(user_id):
+        return [result["poll"] for method, result in sent[user_id] if method == "sendPoll"]
+
+    yield SimpleNamespace(main=main, run=loop.run_until_complete, feed=feed, start_quiz=start_quiz,
+                          polls_sent=polls_sent, ids=ids)
+
+    async def close():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await main.bot.session.close()
+        await server.close()
+
+    loop.run_until_complete(close())
+    loop.close()
+
+
+def wrong_option(poll):
+    return (poll["correct_option_id"] + 1) % len(poll["options"])
+
+
+def test_duplicate_update_id_is_handled_once(bot_app):
+    hits = bot_app.main.updates_seen.hits
+
+    async def scenario():
+        poll = await bot_app.start_quiz(101)
+        answer = make_poll_answer(next(bot_app.ids), 101, poll["id"], poll["correct_option_id"])
+        await bot_app.feed(answer)
+        await bot_app.feed(answer)  # Telegram updateni qayta yubordi
+        await asyncio.sleep(0.1)
+
+    bot_app.run(scenario())
+    session = bot_app.main.user_data[101]
+    assert (session["score"], session["wrong"]) == (1, 0)
+    assert len(bot_app.polls_sent(101)) == 2  # Birinchi savol va bitta keyingi savol
+    assert bot_app.main.updates_seen.hits == hits + 1  # Takror handlergacha yetib bormadi
+
+
+def test_concurrent_answers_to_one_poll_resolve_it_once(bot_app):
+    async def scenario():
+        poll = await bot_app.start_quiz(102)
+        await asyncio.gather(
+            bot_app.feed(make_poll_answer(next(bot_app.ids), 102, poll["id"], poll["correct_option_id"])),
+            bot_app.feed(make_poll_answer(next(bot_app.ids), 102, poll["id"], wrong_option(poll))),
+        )
+        await asyncio.sleep(0.1)
+
+    bot_app.run(scenario())
+    session = bot_app.main.user_data[102]
+    assert session["score"] + session["wrong"] == 1
+    assert len(bot_app.polls_sent(102)) == 2
+
+
+@pytest.mark.parametrize("timeout_first", [False, True])
+def test_answer_racing_timeout_resolves_question_once(bot_app, timeout_first):
+    user_id = 103 + timeout_first
+    main = bot_app.main
+
+    async def scenario():
+        poll = await bot_app.start_quiz(user_id)
+        answer = bot_app.feed(make_poll_answer(next(bot_app.ids), user_id, poll["id"], poll["correct_option_id"]))
+        timeout = main.handle_poll_timeout(user_id, poll["id"], main.session_state(user_id))
+        await asyncio.gather(*((timeout, answer) if timeout_first else (answer, timeout)))
+        await asyncio.sleep(0.1)
+
+    bot_app.run(scenario())
+    session = main.user_data[user_id]
+    assert session["score"] + session["skipped"] == 1
+    assert session["wrong"] == 0
+    assert len(bot_app.polls_sent(user_id)) == 2
@@ -0,0 +1,90 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import TCPConnector, web
+from aiohttp.test_utils import TestServer
+
+from quizbot.fakeapi import FakeBotAPI
+from quizbot.http import PooledAiohttpSession
+
+
+class CustomConnector(TCPConnector):
+    pass
+
+
+def test_connector_settings_keep_aiogram_connector_type():
+    async def scenario():
+        session = PooledAiohttpSession(limit=7, limit_per_host=3, keepalive_timeout=42, ttl_dns_cache=60)
+        session._connector_type = CustomConnector  # aiogram proxy sozlamasi shunday almashtiradi
+        client = await session.create_session()
+        connector = client.connector
+        await session.close()
+        return connector
+
+    connector = asyncio.run(scenario())
+    assert type(connector) is CustomConnector
+    assert (connector.limit, connector.limit_per_host) == (7, 3)
+    assert connector._keepalive_timeout == 42
+
+
+def send_messages(trace):
+    async def scenario():
+        server = TestServer(FakeBotAPI(rate=1000).app())
+        await server.start_server()
+        session = PooledAiohttpSession(limit=2, trace=trace,
+                                       api=TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/")))
+        bot = Bot(token="123456:ABCdef", session=session)
+        try:
+            await asyncio.gather(*(bot.send_message(chat_id=i, text="x") for i in range(1, 7)))
+        finally:
+            await session.close()
+            await server.close()
+        return session.pool_stats
+
+    return asyncio.run(scenario())
+
+
+def test_pool_stats_only_with_trace():
+    stats = send_messages(trace=True)
+    assert stats.created == 2 and stats.reused == 4 and stats.queued == 4
+    stats = send_messages(trace=False)
+    assert (stats.created, stats.reused, stats.queued) == (0, 0, 0)
+
+
+# Trace yoqilganda ham sessiyani aiogram quradi: sarlavhalar va ulagich
+# sozlamalari oddiy AiohttpSession bilan bir xil bo‘lishi kerak
+def test_traced_session_matches_aiogram_session():
+    headers = []
+
+    async def handle(request):
+        headers.append({name: request.headers.get(name) for name in ("User-Agent", "Accept-Encoding")})
+        return web.json_response({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake"}})
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", handle)
+        server = TestServer(app)
+        await server.start_server()
+        api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+        settings = []
+        for session in (AiohttpSession(api=api), PooledAiohttpSession(api=api),
+                        PooledAiohttpSession(api=api, trace=True)):
+            bot = Bot(token="123456:ABCdef", session=session)
+            try:
+                await bot.get_me()
+                await session.close()  # Yopilgan sessiya qayta quriladi va yana kuzatiladi
+                await bot.get_me()
+                connector = (await session.create_session()).connector
+                settings.append((type(connector), connector.limit, type(connector._ssl)))
+            finally:
+                await session.close()
+        await server.close()
+        return settings, session.pool_stats
+
+    settings, stats = asyncio.run(scenario())
+    assert len(headers) == 6 and all(entry == headers[0] for entry in headers)
+    assert "aiogram" in headers[0]["User-Agent"]
+    assert len(set(settings)) == 1
+    assert stats.created == 2
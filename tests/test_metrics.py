@@ -0,0 +1,34 @@
+import asyncio
+import socket
+
+from aiohttp import ClientSession
+
+from quizbot.metrics import MetricsRegistry
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_serve_exposes_only_metrics_on_given_address():
+    registry = MetricsRegistry()
+    registry.counter("quizbot_test_total", "Sinov").inc(3)
+    port = free_port()
+
+    async def scenario():
+        runner = await registry.serve("127.0.0.1", port)
+        try:
+            async with ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    metrics = response.status, await response.text()
+                async with session.get(f"http://127.0.0.1:{port}/webhook/x") as response:
+                    other = response.status
+        finally:
+            await runner.cleanup()
+        return metrics, other
+
+    (status, text), other = asyncio.run(scenario())
+    assert status == 200 and "quizbot_test_total 3" in text
+    assert other == 404
@@ -0,0 +1,114 @@
+import asyncio
+
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramRetryAfter
+from aiohttp.test_utils import TestServer
+
+from quizbot.fakeapi import FakeBotAPI
+from quizbot.outbound import PRIORITY_CONTROL, PRIORITY_FEEDBACK, PRIORITY_POLL, OutboundQueue
+
+
+# Navbat main.py dagi kabi chaqiriladi: chat_id ham navbatga (pozitsion), ham
+# Bot metodiga (kalit so‘z) beriladi
+async def with_fake_api(scenario, rate=30, limits=None, queue=None):
+    api = FakeBotAPI(rate, **(limits or {"chat_rate": 100, "chat_burst": 10}))
+    server = TestServer(api.app())
+    await server.start_server()
+    bot = Bot(token="123456:ABCdef", session=None)
+    bot.session.api = TelegramAPIServer.from_base(str(server.make_url("")).rstrip("/"))
+    try:
+        outbound = OutboundQueue(**(queue or {"global_rate": 100, "chat_rate": 100, "chat_burst": 10}))
+        return api, await scenario(bot, outbound)
+    finally:
+        await bot.session.close()
+        await server.close()
+
+
+def test_call_passes_chat_id_keyword_to_bot_method():
+    async def scenario(bot, outbound):
+        message = await outbound.call(42, PRIORITY_CONTROL, bot.send_message, chat_id=42, text="Salom")
+        poll = await outbound.call(42, PRIORITY_POLL, bot.send_poll, chat_id=42, question="2 + 2?",
+                                   options=["3", "4"], type="quiz", correct_option_id=1, is_anonymous=False)
+        return message, poll
+
+    api, (message, poll) = asyncio.run(with_fake_api(scenario))
+    assert message.chat.id == 42 and message.text == "Salom"
+    assert poll.chat.id == 42 and poll.poll.question == "2 + 2?"
+    assert api.calls["sendMessage"] == 1 and api.calls["sendPoll"] == 1
+
+
+def test_post_delivers_in_priority_order():
+    async def scenario(bot, outbound):
+        feedback = outbound.post(7, PRIORITY_FEEDBACK, bot.send_message, chat_id=7, text="feedback")
+        control = outbound.post(7, PRIORITY_CONTROL, bot.send_message, chat_id=7, text="control")
+        return [message.text for message in await asyncio.gather(feedback, control)], outbound.sent
+
+    api, (texts, sent) = asyncio.run(with_fake_api(scenario))
+    assert texts == ["feedback", "control"]
+    assert sent == 2 and api.calls["sendMessage"] == 2
+
+
+def test_retry_after_from_api_is_retried():
+    async def scenario(bot, outbound):
+        messages = await asyncio.gather(*(
+            outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message, chat_id=chat_id, text=str(chat_id))
+            for chat_id in (1, 2, 3)
+        ))
+        return [message.chat.id for message in messages], outbound.retries
+
+    api, (chat_ids, retries) = asyncio.run(with_fake_api(scenario, rate=1))
+    assert chat_ids == [1, 2, 3]
+    assert retries >= 1 and api.errors[429] == retries
+
+
+# Fake API Telegram kabi har bir chat va guruhni alohida cheklaydi. Navbat
+# ikki baravar past limit bilan ishlaydi: so‘rovlar tarmoqda turlicha
+# kechiksa ham API ga limitdan tez yetib kelmaydi
+CHAT_LIMITS = {"chat_rate": 10, "chat_burst": 2, "group_rate": 4}
+QUEUE_LIMITS = {"global_rate": 30, "chat_rate": 5, "chat_burst": 2, "group_rate": 2}
+SLOW_LIMITS = {"chat_rate": 0.1, "chat_burst": 2, "group_rate": 0.1}  # Burst davomida paqir to‘lmaydi
+BURST_CHATS = (1, 2, -100)
+
+
+async def burst(send):
+    return await asyncio.gather(*(send(chat_id, str(i)) for i in range(5) for chat_id in BURST_CHATS))
+
+
+def test_per_chat_limits_reject_unpaced_bursts():
+    async def scenario(bot, outbound):
+        async def send(chat_id, text):
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+            except TelegramRetryAfter as e:
+                return e.retry_after
+
+        return await burst(send)
+
+    api, retry_after = asyncio.run(with_fake_api(scenario, limits=SLOW_LIMITS))
+    assert api.errors[429] == 9  # Har bir chatda burst dan keyingi 3 ta
+    assert all(value >= 1 for value in retry_after if value is not None)
+
+
+def test_queue_paces_per_chat_bursts_without_429():
+    async def scenario(bot, outbound):
+        async def send(chat_id, text):
+            return await outbound.call(chat_id, PRIORITY_CONTROL, bot.send_message, chat_id=chat_id, text=text)
+
+        return await burst(send)
+
+    api, messages = asyncio.run(with_fake_api(scenario, limits=CHAT_LIMITS, queue=QUEUE_LIMITS))
+    assert len(messages) == 15 and api.calls["sendMessage"] == 15
+    assert api.errors[429] == 0
+
+
+def test_fractional_global_rate_still_sends():
+    # WEB_WORKERS ko‘p bo‘lsa har bir workerga soniyasiga 1 dan kam so‘rov tegadi
+    async def send(chat_id, text):
+        return text
+
+    async def scenario():
+        outbound = OutboundQueue(global_rate=0.5)
+        return await asyncio.wait_for(outbound.call(1, PRIORITY_CONTROL, send, chat_id=1, text="salom"), 2)
+
+    assert asyncio.run(scenario()) == "salom"
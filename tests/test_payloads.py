@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from aiogram import Bot
+from aiogram.methods import SendPoll
+
+from quizbot.bank import QuestionBank
+from quizbot.payloads import PollPayloads
+
+LIMIT = 300
+QUESTIONS = [
+    {"question": "2 + 2 nechiga teng?", "options": ["3", "4", "5", "22"], "correct": 1},
+    {"question": "Qaysi biri to‘g‘ri yozilgan?",
+     "options": ['"Qo‘shtirnoq"', "Ikki\nqator", "Teskari \\ chiziq", "O‘zbekcha — ñ 😀"], "correct": 3},
+    {"question": "Uzun savol " + "x" * 400, "options": ["a", "b", "c"], "correct": 2},
+    {"question": "Chegaraga yaqin " + "y" * 270, "options": ["ha", "yo‘q"], "correct": 0},
+]
+COMPACT_PREFIX = "✅ | ✅ 12 ❌ 3 ⏭ 1\n❓ Savol 17/50: "
+
+
+# aiogram (RAW_POLLS=0) so‘rovni shunday yuboradi: har bir maydon
+# prepare_value orqali satrga aylanadi, bo‘sh qiymatlar tashlab ketiladi
+def form_fields(bot, fields):
+    prepared = {key: bot.session.prepare_value(value, bot=bot, files={}) for key, value in fields.items()}
+    prepared = {key: value for key, value in prepared.items() if value}
+    prepared["options"] = json.dumps([option if isinstance(option, dict) else {"text": option}
+                                      for option in json.loads(prepared["options"])], ensure_ascii=False)
+    return prepared
+
+
+def send_poll(bot, payloads, bank, index, permutation, prefix, chat_id, open_period):
+    options, correct_option_id = bank.arrange(index, permutation)
+    method = SendPoll(
+        chat_id=chat_id, question=payloads.question_text(bank, index, prefix), options=options, type="quiz",
+        correct_option_id=correct_option_id, is_anonymous=False, open_period=open_period,
+        explanation=f"✅ To‘g‘ri javob: {bank.correct_text(index)}",
+    )
+    return form_fields(bot, method.model_dump(warnings=False))
+
+
+@pytest.mark.parametrize("index, permutation, prefix", [
+    (0, [0, 1, 2, 3], "❓ Savol 1/10: "),
+    (0, [2, 0, 3, 1], "❓ Savol 2/10: "),
+    (1, [3, 1, 0, 2], "❓ Savol 3/10: "),
+    (2, [1, 2, 0], "❓ Savol 4/10: "),  # Savolning o‘zi chegaradan uzun
+    (3, [1, 0], COMPACT_PREFIX),  # Savol sig‘adi, compact sarlavha bilan esa yo‘q
+    (3, [0, 1], ""),
+])
+@pytest.mark.parametrize("open_period", [None, 30])
+def test_raw_body_matches_send_poll(index, permutation, prefix, open_period):
+    bot = Bot("123456:ABCdef")
+    bank = QuestionBank.from_questions(QUESTIONS)
+    payloads = PollPayloads(LIMIT)
+    for _ in range(2):  # Kesh bo‘sh va to‘la holatda
+        body = json.loads(payloads.body(bank, index, permutation, prefix, 42, open_period))
+        assert form_fields(bot, body) == send_poll(bot, payloads, bank, index, permutation, prefix, 42, open_period)
+    assert len(body["question"]) <= LIMIT
@@ -0,0 +1,56 @@
+import asyncio
+
+from quizbot.registry import BankRegistry
+
+
+class FakeBank:
+    def __init__(self, path):
+        self.path = path
+
+    def __len__(self):
+        return 1
+
+    def nbytes(self):
+        return 10
+
+
+def make_registry(tmp_path, count=3, budget=25):
+    for i in range(count):
+        (tmp_path / f"bank{i}.txt").write_text("")
+    loads = []
+
+    def load(path):
+        loads.append(path)
+        return FakeBank(path)
+
+    registry = BankRegistry(str(tmp_path), memory_budget=budget, load=load)
+    registry.discover()
+    return registry, loads
+
+
+def test_peek_without_touch_keeps_lru_order(tmp_path):
+    registry, loads = make_registry(tmp_path)
+
+    async def scenario():
+        await registry.get("bank0")
+        await registry.get("bank1")
+        assert registry.peek("bank0", touch=False) is not None
+        assert registry.peek("bank2", touch=False) is None  # Yuklanmagan bank yuklanmaydi
+        await registry.get("bank2")  # Byudjet 2 ta bank: eng eski (bank0) chiqadi
+
+    asyncio.run(scenario())
+    assert registry.loaded() == ["bank1", "bank2"]
+    assert len(loads) == 3 and registry.evictions == 1
+
+
+def test_peek_with_touch_protects_bank_from_eviction(tmp_path):
+    registry, _ = make_registry(tmp_path)
+
+    async def scenario():
+        await registry.get("bank0")
+        await registry.get("bank1")
+        registry.peek("bank0")
+        await registry.get("bank2")
+
+    asyncio.run(scenario())
+    assert registry.loaded() == ["bank0", "bank2"]
@@ -0,0 +1,51 @@
+import asyncio
+import random
+
+from quizbot.results import ResultsStore, board_key
+
+
+def test_leaderboard_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+
+    async def scenario():
+        first, second = ResultsStore(path), ResultsStore(path)  # Ikki worker jarayoni kabi
+        board = board_key("demo", "Random")
+        await first.record(1, "Ali", board, 10, 7, 3, 0)
+        await second.record(2, "Vali", board, 10, 9, 1, 0)
+        await first.record(3, "Soli", board, 10, 7, 2, 1)
+        await second.record(1, "Ali", board, 10, 5, 5, 0)  # Eng yaxshi natija o‘zgarmaydi
+        top = [(user_id, score) for user_id, score, *_ in await first.top(board, 10)]
+        ranks = [await second.rank(board, user_id) for user_id in (1, 2, 3, 4)]
+        summary, last = await first.user_stats(1)
+        await first.close()
+        await second.close()
+        return top, ranks, summary, last
+
+    top, ranks, summary, last = asyncio.run(scenario())
+    assert top == [(2, 9), (1, 7), (3, 7)]  # Teng ballda oldin erishgan yuqorida
+    assert ranks == [2, 1, 3, None]
+    assert summary == (2, 20, 12, 8, 0)
+    assert [(board, score, rank) for board, _, score, _, rank in last] == [("demo:Random", 5, 2), ("demo:Random", 7, 2)]
+
+
+def test_rank_matches_full_ordering_after_improvements(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    rng = random.Random(3)
+    board = board_key("demo", "Random")
+
+    async def scenario():
+        stores = ResultsStore(path), ResultsStore(path)
+        for i in range(300):
+            await stores[i % 2].record(rng.randrange(40), "User", board, 10, rng.randint(0, 10), 0, 0)
+        ordered = [user_id for user_id, *_ in await stores[0].top(board, 100)]
+        ranks = {user_id: await stores[1].rank(board, user_id) for user_id in ordered}
+        counts = await stores[0].run(lambda: stores[0]._db.execute(
+            "SELECT (SELECT SUM(users) FROM best_scores WHERE board = ?1), "
+            "(SELECT COUNT(*) FROM best WHERE board = ?1)", (board,)).fetchone())
+        for store in stores:
+            await store.close()
+        return ordered, ranks, counts
+
+    ordered, ranks, (histogram, users) = asyncio.run(scenario())
+    assert ranks == {user_id: place for place, user_id in enumerate(ordered, 1)}
+    assert histogram == users == len(ordered)
@@ -0,0 +1,55 @@
+import asyncio
+
+from quizbot.bank import QuestionBank
+from quizbot.review import ReviewDeck, ReviewStore
+
+
+def make_bank(names):
+    return QuestionBank.from_questions(
+        {"question": f"{name}?", "options": [f"{name} a", f"{name} b"], "correct": 0} for name in names
+    )
+
+
+def test_deck_follows_questions_when_bank_is_reordered(tmp_path):
+    old_bank = make_bank(["alpha", "beta", "gamma", "delta"])
+    new_bank = make_bank(["new", "gamma", "alpha", "delta"])  # beta o‘chirildi, qolganlari surildi
+
+    async def scenario():
+        store = ReviewStore(str(tmp_path / "reviews.sqlite3"))
+        deck = ReviewDeck.new(len(old_bank), old_bank.layout())
+        assert await store.load(1, "demo", old_bank) is None
+        deck.review(0, "correct", 1000)  # alpha
+        deck.review(1, "wrong", 1000)  # beta
+        deck.review(2, "correct", 1000)  # gamma
+        deck.review(2, "correct", 3000)
+        await store.save(1, "demo", deck)
+        same = await store.load(1, "demo", old_bank)
+        moved = await store.load(1, "demo", new_bank)
+        await store.close()
+        return deck, same, moved
+
+    deck, same, moved = asyncio.run(scenario())
+    assert list(same.due) == list(deck.due)
+    assert moved.layout == new_bank.layout() and len(moved) == 4
+    assert (moved.reps[2], moved.due[2]) == (deck.reps[0], deck.due[0])  # alpha
+    assert (moved.reps[1], moved.due[1]) == (deck.reps[2], deck.due[2])  # gamma
+    assert moved.due[0] == 0 and moved.due[3] == 0  # new va delta hali ko‘rilmagan
+    assert moved.next_new == 0
+    assert moved.next(1000 + 24 * 60) == 2  # alpha muddati keldi, beta holati tashlandi
+
+
+def test_deck_without_known_layout_starts_over(tmp_path):
+    old_bank = make_bank(["alpha", "beta"])
+    new_bank = make_bank(["beta", "alpha"])
+
+    async def scenario():
+        store = ReviewStore(str(tmp_path / "reviews.sqlite3"))
+        deck = ReviewDeck.new(len(old_bank), old_bank.layout())  # Tartibi layouts jadvalida yo‘q
+        deck.review(0, "correct", 1000)
+        await store.save(1, "demo", deck)
+        loaded = await store.load(1, "demo", new_bank)
+        await store.close()
+        return loaded
+
+    loaded = asyncio.run(scenario())
+    assert list(loaded.due) == [0, 0] and loaded.layout == new_bank.layout()
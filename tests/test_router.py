@@ -0,0 +1,43 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from quizbot.router import broadcast, shard_key
+
+
+def test_shard_key_keeps_user_updates_together():
+    message = {"update_id": 1, "message": {"from": {"id": 42}, "chat": {"id": 42}}}
+    answer = {"update_id": 2, "poll_answer": {"poll_id": "p", "user": {"id": 42}}}
+    assert shard_key(message) == shard_key(answer) == 42
+
+
+def test_broadcast_reaches_every_worker_and_reports_failures():
+    async def scenario():
+        hits = []
+
+        async def reload(request):
+            hits.append(request.path)
+            return web.json_response({"worker": len(hits), "reloaded": ["bank"]})
+
+        async def broken(request):
+            return web.Response(status=500)
+
+        servers = []
+        for handler in (reload, reload, broken):
+            app = web.Application()
+            app.router.add_post("/reload/token", handler)
+            servers.append(TestServer(app))
+        for server in servers:
+            await server.start_server()
+        try:
+            urls = [str(server.make_url("/reload/token")) for server in servers]
+            answers = await broadcast(urls, timeout=5)
+        finally:
+            for server in servers:
+                await server.close()
+        assert len(hits) == 2
+        assert [answer is not None for answer in answers] == [True, True, False]
+        assert answers[0]["reloaded"] == ["bank"]
+
+    asyncio.run(scenario())
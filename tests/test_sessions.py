@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from quizbot.bank import QuestionBank
+from quizbot.sampler import QuestionSampler
+from quizbot.sessions import RedisSessionStore, SQLiteSessionStore, fits_bank
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def make_store(ttl=60):
+    store = RedisSessionStore("redis://localhost:6379/0", ttl=ttl)
+    store.redis = fakeredis.FakeAsyncRedis()
+    return store
+
+
+def make_session():
+    sampler = QuestionSampler(10)
+    sampler.draw()
+    return {"bank_name": "demo", "mode": "Random", "score": 3, "wrong": 1, "skipped": 0,
+            "question_count": 5, "question_idx": 7, "permutation": (2, 0, 1, 3), "sampler": sampler,
+            "name": "Ali"}
+
+
+def test_redis_store_roundtrip():
+    async def scenario():
+        store = make_store()
+        assert await store.load(1) is None
+        await store.save(1, make_session())
+        session = await store.load(1)
+        assert await store.load(2) is None
+        await store.close()
+        return session
+
+    session = asyncio.run(scenario())
+    assert session["bank_name"] == "demo"
+    assert session["score"] == 3
+    assert session["permutation"] == (2, 0, 1, 3)
+    assert session["sampler"].drawn == 1 and session["sampler"].remaining() == 9
+    assert session["poll_id"] is None
+
+
+def test_redis_store_overwrite_and_delete():
+    async def scenario():
+        store = make_store()
+        await store.save(1, make_session())
+        await store.save(1, {**make_session(), "score": 4})
+        score = (await store.load(1))["score"]
+        await store.delete(1)
+        deleted = await store.load(1)
+        await store.delete(1)  # Yo‘q kalitni o‘chirish xato emas
+        await store.close()
+        return score, deleted
+
+    assert asyncio.run(scenario()) == (4, None)
+
+
+def test_redis_store_sets_ttl_and_expires():
+    async def scenario():
+        store = make_store(ttl=1)
+        await store.save(1, make_session())
+        ttl = await store.redis.ttl(f"{store.prefix}1")
+        before = await store.load(1)
+        await asyncio.sleep(1.2)
+        after = await store.load(1)
+        await store.close()
+        return ttl, before, after
+
+    ttl, before, after = asyncio.run(scenario())
+    assert 0 < ttl <= 1
+    assert before is not None
+    assert after is None
+
+
+def test_redis_store_refreshes_ttl_on_save():
+    async def scenario():
+        store = make_store(ttl=1)
+        await store.save(1, make_session())
+        await asyncio.sleep(0.7)
+        await store.save(1, make_session())
+        await asyncio.sleep(0.7)
+        session = await store.load(1)
+        await store.close()
+        return session
+
+    assert asyncio.run(scenario()) is not None
+
+
+def make_bank(count):
+    return QuestionBank.from_questions(
+        {"question": f"q{i}?", "options": [f"{i} a", f"{i} b", f"{i} c"], "correct": i % 3} for i in range(count)
+    )
+
+
+def test_session_restored_against_shrunk_bank_does_not_fit(tmp_path):
+    bank = make_bank(10)
+    sampler = QuestionSampler(len(bank))
+    for _ in range(9):
+        sampler.draw()
+
+    async def scenario():
+        store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), flush_interval=0)
+        await store.save(1, {**make_session(), "bank": bank, "question_idx": 9, "sampler": sampler})
+        await store.close()
+        store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), flush_interval=0)
+        session = await store.load(1)
+        await store.close()
+        return session
+
+    session = asyncio.run(scenario())
+    assert fits_bank(session, bank)
+    assert fits_bank(session, make_bank(10))  # Qayta tahlil qilingan bir xil fayl
+    shrunk = make_bank(8)
+    assert not fits_bank(session, shrunk)  # question_idx=9 va sampler.size=10 endi chegaradan tashqarida
+    assert not fits_bank({**session, "layout": None}, bank)  # Tartibi yozilmagan sessiya
+
+
+def test_redis_store_waits_for_a_free_connection():
+    async def scenario():
+        store = RedisSessionStore("redis://localhost:6379/0")
+        pool = store.redis.connection_pool
+        await store.close()
+        return pool
+
+    from redis.asyncio import BlockingConnectionPool
+
+    pool = asyncio.run(scenario())
+    assert isinstance(pool, BlockingConnectionPool)
@@ -0,0 +1,33 @@
+import asyncio
+
+from quizbot.bank import QuestionBank
+from quizbot.stats import QuestionStats
+
+
+def make_bank(names):
+    return QuestionBank.from_questions(
+        {"question": f"{name}?", "options": [f"{name} a", f"{name} b"], "correct": 0} for name in names
+    )
+
+
+def test_stats_stay_with_their_question_after_reload(tmp_path):
+    path = str(tmp_path / "stats.sqlite3")
+    old_bank = make_bank(["alpha", "beta", "gamma"])
+    new_bank = make_bank(["gamma", "new", "alpha"])
+
+    async def scenario():
+        stats = QuestionStats(path, flush_interval=0)
+        await stats.index("demo", old_bank)
+        stats.record("demo", old_bank, 0, "correct")  # alpha
+        stats.record("demo", old_bank, 0, "correct")
+        stats.record("demo", old_bank, 2, "wrong")  # gamma
+        pending = list((await stats.index("demo", new_bank)).counts)  # Hali yozilmagan o‘zgarishlar ham
+        await stats.close()
+        stats = QuestionStats(path)
+        stored = list((await stats.index("demo", new_bank)).counts)
+        await stats.close()
+        return pending, stored
+
+    pending, stored = asyncio.run(scenario())
+    assert pending == stored == [0, 1, 0, 0, 0, 0, 2, 0, 0]
+
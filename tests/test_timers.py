@@ -0,0 +1,155 @@
+import asyncio
+
+from quizbot.timers import TimerWheel
+
+TICK = 0.01
+SLOTS = 8  # G‘ildirakning bir aylanishi 0.08 soniya
+
+
+def run(scenario):
+    async def wrapper():
+        wheel = TimerWheel(tick=TICK, slots=SLOTS)
+        try:
+            return await scenario(wheel)
+        finally:
+            wheel.close()
+
+    return asyncio.run(wrapper())
+
+
+def fire_log(fired, loop, started):
+    return lambda name: fired.append((name, loop.time() - started))
+
+
+def test_schedule_fires_once_after_delay():
+    async def scenario(wheel):
+        loop = asyncio.get_running_loop()
+        fired = []
+        started = loop.time()
+        wheel.schedule("a", 0.05, fire_log(fired, loop, started), "a")
+        assert len(wheel) == 1
+        await asyncio.sleep(0.2)
+        return fired, len(wheel)
+
+    fired, pending = run(scenario)
+    assert [name for name, _ in fired] == ["a"] and pending == 0
+    assert fired[0][1] >= 0.05 - TICK
+
+
+def test_cancel_prevents_callback():
+    async def scenario(wheel):
+        fired = []
+        wheel.schedule("a", 0.03, fired.append, "a")
+        wheel.schedule("b", 0.03, fired.append, "b")
+        cancelled = wheel.cancel("a"), wheel.cancel("a"), wheel.cancel("missing")
+        await asyncio.sleep(0.1)
+        return fired, cancelled
+
+    fired, cancelled = run(scenario)
+    assert fired == ["b"]
+    assert cancelled == (True, False, False)
+
+
+def test_reschedule_replaces_previous_deadline():
+    async def scenario(wheel):
+        loop = asyncio.get_running_loop()
+        fired = []
+        started = loop.time()
+        wheel.schedule("a", 0.03, fire_log(fired, loop, started), "first")
+        wheel.schedule("a", 0.12, fire_log(fired, loop, started), "second")
+        assert len(wheel) == 1
+        await asyncio.sleep(0.25)
+        return fired
+
+    fired = run(scenario)
+    assert [name for name, _ in fired] == ["second"]
+    assert fired[0][1] >= 0.12 - TICK
+
+
+def test_deadline_longer_than_one_turn_waits_for_its_round():
+    async def scenario(wheel):
+        loop = asyncio.get_running_loop()
+        fired = []
+        started = loop.time()
+        # Ikkalasi bir slotga tushadi, lekin turli aylanishlarda
+        wheel.schedule("near", 0.05, fire_log(fired, loop, started), "near")
+        wheel.schedule("far", 0.05 + 3 * SLOTS * TICK, fire_log(fired, loop, started), "far")
+        await asyncio.sleep(0.15)
+        early = list(fired)
+        await asyncio.sleep(0.3)
+        return early, fired
+
+    early, fired = run(scenario)
+    assert [name for name, _ in early] == ["near"]
+    assert [name for name, _ in fired] == ["near", "far"]
+    assert fired[1][1] >= 0.05 + 3 * SLOTS * TICK - TICK
+
+
+def test_coroutine_callback_is_run_as_task():
+    async def scenario(wheel):
+        done = asyncio.Event()
+        results = []
+
+        async def callback(value):
+            await asyncio.sleep(0)
+            results.append(value)
+            done.set()
+
+        wheel.schedule("a", 0.02, callback, 42)
+        await asyncio.wait_for(done.wait(), 1)
+        return results
+
+    assert run(scenario) == [42]
+
+
+def test_failing_callback_does_not_stop_the_wheel():
+    async def scenario(wheel):
+        fired = []
+
+        def broken():
+            raise RuntimeError("xato")
+
+        wheel.schedule("a", 0.02, broken)
+        wheel.schedule("b", 0.05, fired.append, "b")
+        await asyncio.sleep(0.15)
+        return fired
+
+    assert run(scenario) == ["b"]
+
+
+def test_close_cancels_driver_and_running_callbacks():
+    async def scenario(wheel):
+        fired = []
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        wheel.schedule("slow", 0.02, slow)
+        wheel.schedule("later", 0.2, fired.append, "later")
+        await asyncio.wait_for(started.wait(), 1)
+        wheel.close()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0.3)
+        return fired
+
+    assert run(scenario) == []
+
+
+def test_on_lag_reports_delay_after_deadline():
+    lags = []
+
+    async def scenario():
+        wheel = TimerWheel(tick=TICK, slots=SLOTS, on_lag=lags.append)
+        wheel.schedule("a", 0.03, lambda: None)
+        await asyncio.sleep(0.1)
+        wheel.close()
+
+    asyncio.run(scenario())
+    assert len(lags) == 1 and lags[0] >= 0